@@ -0,0 +1,52 @@
+"""Compare the search of `AlphaBetaPlayer` with leaves scored one at a time
+and with the `batch_leaves` option, which scores the leaves below each node
+two plies above the horizon with a single NumPy call, on the positions of the
+search benchmark corpus.
+
+Run from the project root with `python -m benchmarks.batch_leaves [DEPTH]`
+(requires NumPy). Both searches return the same moves; batching only pays off
+when the heuristic is costly to compute one position at a time.
+"""
+import sys
+import timeit
+
+from isolation import Board, BitBoard
+from game_agent import AlphaBetaPlayer
+from batch_evaluation import MobilityEvaluator
+from benchmarks.search_suite import load_corpus, setup
+
+HEURISTICS = {
+    "mobility": MobilityEvaluator(),
+    "second order + center": MobilityEvaluator(second_order=.5, center=.1),
+}
+
+
+def search_time(corpus, depth, board_class, evaluator, batch_leaves):
+    """Return the time in seconds to search every position of `corpus`. """
+    elapsed = 0.
+    for position in corpus:
+        player = AlphaBetaPlayer(score_fn=evaluator, batch_leaves=batch_leaves)
+        game = setup(position, player, board_class)
+        player.time_left = lambda: float("inf")
+        start = timeit.default_timer()
+        player.start_search(game)
+        player.search_root(game, depth)
+        elapsed += timeit.default_timer() - start
+    return elapsed
+
+
+def main():
+    depth = int(sys.argv[1]) if len(sys.argv) > 1 else 6
+    corpus = load_corpus()
+    print("{:<10}{:<24}{:>10}{:>10}{:>10}".format(
+        "Board", "Heuristic", "Single", "Batched", "Speedup"))
+    for board_class in (BitBoard, Board):
+        for name, evaluator in HEURISTICS.items():
+            single = search_time(corpus, depth, board_class, evaluator, False)
+            batched = search_time(corpus, depth, board_class, evaluator, True)
+            print("{:<10}{:<24}{:>10.3f}{:>10.3f}{:>9.2f}x".format(
+                board_class.__name__, name, single, batched, single / batched))
+
+
+if __name__ == "__main__":
+    main()
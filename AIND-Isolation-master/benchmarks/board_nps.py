@@ -0,0 +1,36 @@
+"""Compare the raw speed of the `Board` and `BitBoard` engines by counting
+the nodes of the same game tree (a "perft" count) from an opening position.
+
+Run from the project root with `python -m benchmarks.board_nps`.
+"""
+import timeit
+
+from isolation import Board, BitBoard
+
+DEPTH = 8
+
+
+def perft(game, depth):
+    """Count the leaf nodes of the game tree below `game` to a fixed depth. """
+    if depth == 0:
+        return 1
+    moves = game.get_legal_moves()
+    if not moves:
+        return 1
+    return sum(perft(game.forecast_move(m), depth - 1) for m in moves)
+
+
+def main():
+    for board_class in (Board, BitBoard):
+        game = board_class("Player1", "Player2")
+        game.apply_move((2, 3))
+        game.apply_move((0, 5))
+        start = timeit.default_timer()
+        nodes = perft(game, DEPTH)
+        elapsed = timeit.default_timer() - start
+        print("{:<10}{:>10} nodes in {:.3f}s ({:,.0f} nodes/sec)".format(
+            board_class.__name__, nodes, elapsed, nodes / elapsed))
+
+
+if __name__ == "__main__":
+    main()
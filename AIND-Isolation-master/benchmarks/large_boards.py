@@ -0,0 +1,105 @@
+"""Measure the board engines and the search on boards larger than 7x7.
+
+For every board size the benchmark times the basic board operations of
+`Board` and `BitBoard` on a midgame position, then the time and the nodes it
+takes `AlphaBetaPlayer` to search the first and second moves of the game
+(where the player to move can be placed on any open cell) and a midgame
+position to a fixed depth, with and without the `symmetric_placements`
+option.
+
+Run from the project root with `python -m benchmarks.large_boards [DEPTH]`.
+"""
+import random
+import sys
+import timeit
+
+from isolation import Board, BitBoard
+from game_agent import AlphaBetaPlayer
+from sample_players import improved_score
+
+SIZES = [9, 11, 15]
+# Fraction of the board filled in the midgame positions
+MIDGAME = 0.2
+
+
+def midgame_moves(size, seed=0):
+    """Return the moves of a random game up to the midgame. """
+    rng = random.Random(seed)
+    game = BitBoard("Player1", "Player2", size, size)
+    moves = []
+    while len(moves) < MIDGAME * size * size:
+        legal = game.get_legal_moves()
+        if not legal:
+            return midgame_moves(size, seed + 1)
+        moves.append(rng.choice(legal))
+        game.apply_move(moves[-1])
+    return moves
+
+
+def time_call(fn, number=2000):
+    """Return the average time of `fn()` in microseconds. """
+    return timeit.timeit(fn, number=number) / number * 1e6
+
+
+def board_operations(board_class, size, moves):
+    """Time the board operations on the position reached by `moves`. """
+    game = board_class("Player1", "Player2", size, size)
+    for move in moves:
+        game.apply_move(move)
+    move = game.get_legal_moves()[0]
+    return {"get_legal_moves": time_call(game.get_legal_moves),
+            "get_blank_spaces": time_call(game.get_blank_spaces),
+            "forecast_move": time_call(lambda: game.forecast_move(move)),
+            "to_string": time_call(game.to_string, 200)}
+
+
+def search(size, moves, depth, symmetric_placements):
+    """Search the position reached by `moves` to `depth` on a `BitBoard`.
+
+    Returns
+    -------
+    (float, int)
+        The time in seconds and the number of nodes searched.
+    """
+    player = AlphaBetaPlayer(score_fn=improved_score,
+                             symmetric_placements=symmetric_placements)
+    players = [player, "Opponent"] if len(moves) % 2 == 0 else ["Opponent", player]
+    game = BitBoard(*players, width=size, height=size)
+    for move in moves:
+        game.apply_move(move)
+    start = timeit.default_timer()
+    player.search_to_depth(game, depth)
+    return timeit.default_timer() - start, player.nodes
+
+
+def main():
+    depth = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    print("Board operations on midgame positions (microseconds)")
+    print("{:<8}{:<10}{:>17}{:>18}{:>15}{:>11}".format(
+        "Size", "Board", "get_legal_moves", "get_blank_spaces", "forecast_move", "to_string"))
+    for size in SIZES:
+        moves = midgame_moves(size)
+        for board_class in (Board, BitBoard):
+            times = board_operations(board_class, size, moves)
+            print("{:<8}{:<10}{:>17.2f}{:>18.2f}{:>15.2f}{:>11.1f}".format(
+                "{0}x{0}".format(size), board_class.__name__, times["get_legal_moves"],
+                times["get_blank_spaces"], times["forecast_move"], times["to_string"]))
+
+    print()
+    print("Alpha-beta search to depth {} on BitBoard".format(depth))
+    print("{:<8}{:<12}{:>10}{:>10}{:>12}{:>10}{:>9}".format(
+        "Size", "Position", "Nodes", "Time", "Symmetric", "Time", "Speedup"))
+    for size in SIZES:
+        midgame = midgame_moves(size)
+        positions = [("move 1", []), ("move 2", [(size // 2, size // 2 - 1)]),
+                     ("midgame", midgame)]
+        for name, moves in positions:
+            plain, plain_nodes = search(size, moves, depth, False)
+            pruned, pruned_nodes = search(size, moves, depth, True)
+            print("{:<8}{:<12}{:>10}{:>9.3f}s{:>12}{:>9.3f}s{:>8.2f}x".format(
+                "{0}x{0}".format(size), name, plain_nodes, plain, pruned_nodes, pruned,
+                plain / pruned))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Compare the depth reached per move by the single-process `AlphaBetaPlayer`
+and by `LazySMPPlayer` with an increasing number of processes, searching the
+same positions with the same time limit per move.
+
+Run from the project root with `python -m benchmarks.lazy_smp_depth [N ...]`
+where each N is a number of processes to test (default: 2 and 4). The gains
+depend on having at least N idle cores.
+"""
+import os
+import random
+import sys
+import timeit
+
+from isolation import BitBoard
+from game_agent import AlphaBetaPlayer
+from lazy_smp import LazySMPPlayer
+from move_ordering import MoveOrderer
+from sample_players import improved_score
+
+NUM_POSITIONS = 20
+TIME_LIMIT = 150
+TT_SIZE = 2 ** 16
+
+
+def openings(count, seed=0):
+    """Return the moves of `count` random positions from the early and middle
+    game in which the player to move has a choice.
+    """
+    rng = random.Random(seed)
+    result = []
+    while len(result) < count:
+        game = BitBoard("Player1", "Player2")
+        moves = []
+        for _ in range(rng.randint(2, 16)):
+            moves.append(rng.choice(game.get_legal_moves()))
+            game.apply_move(moves[-1])
+            if not game.get_legal_moves():
+                break
+        if len(game.get_legal_moves()) > 1:
+            result.append(moves)
+    return result
+
+
+def mean_depth(player, positions):
+    """Return the average depth completed by `player` on `positions`. """
+    for moves in positions:
+        players = [player, "Opponent"] if len(moves) % 2 == 0 else ["Opponent", player]
+        game = BitBoard(*players)
+        for move in moves:
+            game.apply_move(move)
+        start = timeit.default_timer()
+        player.get_move(game, lambda: TIME_LIMIT - 1000 * (timeit.default_timer() - start))
+    return sum(player.completed_depths) / len(player.completed_depths)
+
+
+def main():
+    workers = [int(arg) for arg in sys.argv[1:]] or [2, 4]
+    positions = openings(NUM_POSITIONS)
+    print("{} positions, {} ms per move, {} cores".format(
+        len(positions), TIME_LIMIT, os.cpu_count()))
+
+    player = AlphaBetaPlayer(score_fn=improved_score, tt_size=TT_SIZE,
+                             ordering=MoveOrderer())
+    print("{:<24}{:>8.2f}".format("AlphaBetaPlayer", mean_depth(player, positions)))
+    for count in workers:
+        player = LazySMPPlayer(workers=count, tt_size=TT_SIZE,
+                               score_fn=improved_score, ordering=MoveOrderer())
+        try:
+            depth = mean_depth(player, positions)
+        finally:
+            player.close()
+        print("{:<24}{:>8.2f}".format("LazySMPPlayer({})".format(count), depth))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+"""Reproducible search benchmark on a fixed corpus of positions.
+
+Every position of `positions.json` (midgame and endgame positions on boards
+of several sizes) is searched to a fixed depth by `MinimaxPlayer` and by
+`AlphaBetaPlayer` in several configurations. The suite reports the nodes
+searched, the nodes per second, the time to reach each depth and how often
+each configuration plays the same move as minimax, and writes every
+measurement as JSON so that runs can be compared across changes to
+`isolation.py` or `game_agent.py`.
+
+Run from the project root with `python -m benchmarks.search_suite`; see
+`--help` for the options. `--baseline` compares the run with the JSON output
+of a previous run, reporting the change in speed and the positions where a
+configuration now plays a different move.
+
+The positions are searched on `BitBoard` by default, which generates moves
+in a fixed order, so that the moves chosen only depend on the search;
+`--board board` searches them on `isolation.Board` instead, reseeding the
+shuffle of its move lists before every search.
+"""
+import argparse
+import copy
+import json
+import os
+import platform
+import random
+import sys
+import timeit
+
+from isolation import Board, BitBoard
+from game_agent import MinimaxPlayer, AlphaBetaPlayer
+from move_ordering import MoveOrderer
+from sample_players import improved_score
+
+CORPUS = os.path.join(os.path.dirname(__file__), "positions.json")
+SIZES = [(5, 5), (7, 7), (9, 9)]
+# Fraction of the board filled in each phase of the game
+PHASES = {"midgame": 0.2, "endgame": 0.5}
+POSITIONS_PER_PHASE = 5
+TT_SIZE = 2 ** 16
+
+CONFIGS = {
+    "minimax": None,
+    "alphabeta": {},
+    "alphabeta_tt": {"tt_size": TT_SIZE, "ordering": MoveOrderer()},
+    "alphabeta_pvs": {"tt_size": TT_SIZE, "ordering": MoveOrderer(), "pvs": True},
+}
+
+
+def make_corpus(seed=0):
+    """Return random positions of every size and phase in which the player
+    to move has a choice between at least two moves.
+    """
+    rng = random.Random(seed)
+    corpus = []
+    for width, height in SIZES:
+        for phase, filled in sorted(PHASES.items()):
+            count = 0
+            while count < POSITIONS_PER_PHASE:
+                game = BitBoard("Player1", "Player2", width, height)
+                moves = []
+                target = int(filled * width * height)
+                while game.move_count < target and game.get_legal_moves():
+                    moves.append(rng.choice(game.get_legal_moves()))
+                    game.apply_move(moves[-1])
+                if game.move_count == target and len(game.get_legal_moves()) > 1:
+                    corpus.append({"name": "{}x{}-{}-{}".format(width, height, phase, count),
+                                   "width": width, "height": height, "phase": phase,
+                                   "moves": [list(move) for move in moves]})
+                    count += 1
+    return corpus
+
+
+def save_corpus(corpus, path=CORPUS):
+    """Write `corpus` to the file at `path`, one position per line. """
+    with open(path, "w") as file:
+        file.write("[\n" + ",\n".join(json.dumps(position) for position in corpus) + "\n]\n")
+
+
+def load_corpus(path=CORPUS):
+    """Return the positions saved in the corpus file at `path`. """
+    with open(path) as file:
+        return json.load(file)
+
+
+def setup(position, player, board_class):
+    """Return a board of `board_class` for `position` with `player` to move. """
+    players = [player, "Opponent"]
+    if len(position["moves"]) % 2:
+        players.reverse()
+    game = board_class(*players, width=position["width"], height=position["height"])
+    for move in position["moves"]:
+        game.apply_move(tuple(move))
+    return game
+
+
+def run_minimax(position, depth, board_class):
+    """Search `position` to `depth` with `MinimaxPlayer`.
+
+    Returns
+    -------
+    ((int, int), int, list<float>)
+        The best move, the number of nodes searched and the time in seconds
+        to complete the search.
+    """
+    player = MinimaxPlayer(search_depth=depth, score_fn=improved_score)
+    game = setup(position, player, board_class)
+    player.time_left = lambda: float("inf")
+    random.seed(0)
+    start = timeit.default_timer()
+    move = player.minimax(game, depth)
+    return move, player.nodes, [timeit.default_timer() - start]
+
+
+def run_alphabeta(position, depth, board_class, config):
+    """Search `position` by iterative deepening up to `depth` with an
+    `AlphaBetaPlayer` built from the keyword arguments of `config`.
+
+    Returns
+    -------
+    ((int, int), int, list<float>)
+        The best move of the deepest iteration, the number of nodes searched
+        and the time in seconds to complete each depth.
+    """
+    # Every search starts with a fresh table and move orderer
+    player = AlphaBetaPlayer(score_fn=improved_score, **copy.deepcopy(config))
+    game = setup(position, player, board_class)
+    player.time_left = lambda: float("inf")
+    random.seed(0)
+    start = timeit.default_timer()
+    player.start_search(game)
+    move, value, times = (-1, -1), None, []
+    for d in range(1, depth + 1):
+        move, value = player.aspiration_search(game, d, value)
+        player._pv_move = move
+        times.append(timeit.default_timer() - start)
+    return move, player.nodes, times
+
+
+def run_suite(corpus, depth, board_class, configs=CONFIGS, verbose=False):
+    """Search every position of `corpus` with every configuration.
+
+    Returns
+    -------
+    list<dict>
+        One measurement per position and configuration.
+    """
+    results = []
+    for position in corpus:
+        reference = None
+        for name, config in configs.items():
+            if config is None:
+                move, nodes, times = run_minimax(position, depth, board_class)
+            else:
+                move, nodes, times = run_alphabeta(position, depth, board_class, config)
+            if reference is None:
+                reference = move
+            seconds = times[-1]
+            results.append({
+                "position": position["name"], "phase": position["phase"],
+                "size": "{}x{}".format(position["width"], position["height"]),
+                "config": name, "depth": depth, "move": list(move),
+                "agrees": move == reference, "nodes": nodes, "seconds": seconds,
+                "nps": nodes / seconds if seconds > 0 else None,
+                "time_to_depth": times})
+            if verbose:
+                print("{:<20}{:<16}{:>10}{:>10.4f}".format(
+                    position["name"], name, nodes, seconds), file=sys.stderr)
+    return results
+
+
+def summarize(results):
+    """Total the results of each configuration over all positions. """
+    summary = {}
+    for result in results:
+        total = summary.setdefault(result["config"], {
+            "positions": 0, "nodes": 0, "seconds": 0., "agreement": 0})
+        total["positions"] += 1
+        total["nodes"] += result["nodes"]
+        total["seconds"] += result["seconds"]
+        total["agreement"] += result["agrees"]
+    for total in summary.values():
+        total["nps"] = total["nodes"] / total["seconds"] if total["seconds"] else None
+        total["agreement"] /= total["positions"]
+    return summary
+
+
+def compare(report, baseline):
+    """Compare `report` with the report of a previous run.
+
+    Returns
+    -------
+    dict
+        For every configuration found in both runs, the ratio between the
+        nodes per second of the two runs, the ratio between the nodes
+        searched and the positions where the move changed.
+    """
+    before = {(r["position"], r["config"]): r for r in baseline["results"]}
+    comparison = {}
+    for name, total in report["summary"].items():
+        old = baseline["summary"].get(name)
+        if old is None:
+            continue
+        changed = [r["position"] for r in report["results"]
+                   if r["config"] == name and (r["position"], name) in before and
+                   r["move"] != before[r["position"], name]["move"]]
+        comparison[name] = {
+            "nps_ratio": total["nps"] / old["nps"] if total["nps"] and old["nps"] else None,
+            "nodes_ratio": total["nodes"] / old["nodes"] if old["nodes"] else None,
+            "changed_moves": changed}
+    return comparison
+
+
+def print_summary(report):
+    print("{:<16}{:>12}{:>10}{:>14}{:>11}".format(
+        "Config", "Nodes", "Seconds", "Nodes/sec", "Agreement"))
+    for name, total in report["summary"].items():
+        print("{:<16}{:>12}{:>10.3f}{:>14,.0f}{:>10.1f}%".format(
+            name, total["nodes"], total["seconds"], total["nps"] or 0,
+            100 * total["agreement"]))
+    for name, change in report.get("comparison", {}).items():
+        print("{:<16} nodes/sec x{:.3f}, nodes x{:.3f}, {} changed moves".format(
+            name, change["nps_ratio"] or 0, change["nodes_ratio"] or 0,
+            len(change["changed_moves"])))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--depth", type=int, default=7,
+                        help="search depth of every position")
+    parser.add_argument("--board", choices=["bitboard", "board"], default="bitboard",
+                        help="board engine used for the search")
+    parser.add_argument("--configs", nargs="+", choices=sorted(CONFIGS),
+                        default=list(CONFIGS),
+                        help="configurations to run; the first one is the " +
+                             "reference for move agreement")
+    parser.add_argument("--corpus", default=CORPUS,
+                        help="JSON file of positions to search")
+    parser.add_argument("--output", default=None,
+                        help="write the results to this JSON file " +
+                             "('-' for standard output)")
+    parser.add_argument("--baseline", default=None,
+                        help="JSON results of a previous run to compare with")
+    parser.add_argument("--make-corpus", action="store_true",
+                        help="generate a new corpus file at --corpus and exit")
+    parser.add_argument("--verbose", action="store_true",
+                        help="print every measurement as it is made")
+    args = parser.parse_args()
+
+    if args.make_corpus:
+        save_corpus(make_corpus(), args.corpus)
+        return
+
+    board_class = BitBoard if args.board == "bitboard" else Board
+    configs = {name: CONFIGS[name] for name in args.configs}
+    results = run_suite(load_corpus(args.corpus), args.depth, board_class, configs,
+                        args.verbose)
+    report = {"meta": {"depth": args.depth, "board": args.board,
+                       "python": platform.python_version(),
+                       "machine": platform.machine()},
+              "summary": summarize(results), "results": results}
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        report["comparison"] = compare(report, baseline)
+        if (baseline["meta"]["depth"], baseline["meta"]["board"]) != (args.depth, args.board):
+            print("The baseline was run with a different depth or board engine",
+                  file=sys.stderr)
+
+    if args.output == "-":
+        json.dump(report, sys.stdout, indent=1)
+        return
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=1)
+    print_summary(report)
+
+
+if __name__ == "__main__":
+    main()
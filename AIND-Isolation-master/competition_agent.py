@@ -68,12 +68,17 @@ class CustomPlayer:
         the PvP competition uses more accurate timers that are not cross-
         platform compatible, so a limit of 1ms (vs 10ms for the other classes)
         is generally sufficient.
+
+    book : `opening_book.OpeningBook` or None (optional)
+        An opening book consulted before searching; positions found in the
+        book are played without a search.
     """
 
-    def __init__(self, data=None, timeout=1.):
+    def __init__(self, data=None, timeout=1., book=None):
         self.score = custom_score
         self.time_left = None
         self.TIMER_THRESHOLD = timeout
+        self.book = book
 
     def get_move(self, game, time_left):
         """Search for the best move from the available legal moves and return a
@@ -102,5 +107,64 @@ class CustomPlayer:
             Board coordinates corresponding to a legal move; may return
             (-1, -1) if there are no available legal moves.
         """
-        # OPTIONAL: Finish this function!
-        raise NotImplementedError
+        self.time_left = time_left
+        legal_moves = game.get_legal_moves()
+        if not legal_moves:
+            return (-1, -1)
+
+        if self.book is not None:
+            entry = self.book.probe(game)
+            if entry is not None:
+                return entry[0]
+
+        best_move = legal_moves[0]
+        try:
+            # Iterative deepening until the search covers every open cell
+            for depth in range(1, len(game.get_blank_spaces()) + 1):
+                best_move = self.alphabeta(game, depth)
+        except SearchTimeout:
+            pass
+        return best_move
+
+    def alphabeta(self, game, depth):
+        """Return the best move for the active player in `game` found by a
+        depth-limited minimax search with alpha-beta pruning.
+        """
+        if self.time_left() < self.TIMER_THRESHOLD:
+            raise SearchTimeout()
+
+        best_move = (-1, -1)
+        alpha = float("-inf")
+        for move in game.get_legal_moves():
+            value = self._value(game.forecast_move(move), depth - 1, alpha,
+                                float("inf"), False)
+            if value > alpha or best_move == (-1, -1):
+                best_move, alpha = move, value
+        return best_move
+
+    def _value(self, game, depth, alpha, beta, maximizing):
+        """Return the alpha-beta value of `game` for this player. """
+        if self.time_left() < self.TIMER_THRESHOLD:
+            raise SearchTimeout()
+
+        moves = game.get_legal_moves()
+        if depth == 0 or not moves:
+            return self.score(game, self)
+
+        if maximizing:
+            value = float("-inf")
+            for move in moves:
+                value = max(value, self._value(game.forecast_move(move),
+                                               depth - 1, alpha, beta, False))
+                if value >= beta:
+                    return value
+                alpha = max(alpha, value)
+        else:
+            value = float("inf")
+            for move in moves:
+                value = min(value, self._value(game.forecast_move(move),
+                                               depth - 1, alpha, beta, True))
+                if value <= alpha:
+                    return value
+                beta = min(beta, value)
+        return value
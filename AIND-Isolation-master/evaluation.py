@@ -0,0 +1,84 @@
+"""Mobility shared by the heuristic evaluation functions.
+
+Most heuristics compare the number of moves available to each player, and
+check `is_loser()` / `is_winner()` before that, which generates the move
+lists of both players up to four times for every evaluated position, right
+after the search generated the moves of the active player itself.
+`EvalContext` generates each list once, reusing the moves already generated
+by the search, and the score functions that accept a `context` argument read
+the counts from it instead of the board.
+"""
+import inspect
+
+# Whether each score function accepts a context, see takes_context(); keyed
+# by _cache_key() so that it does not grow with every new score object
+_TAKES_CONTEXT = {}
+
+
+class EvalContext:
+    """The mobility of `player` and of its opponent in `game`.
+
+    Parameters
+    ----------
+    game : `isolation.Board`
+        The position being evaluated.
+
+    player : object
+        The player the position is evaluated for.
+
+    active_moves : list<(int, int)> (optional)
+        The legal moves of the active player if they are already known.
+
+    Attributes
+    ----------
+    own_moves : int
+        The number of legal moves of `player`.
+
+    opp_moves : int
+        The number of legal moves of the opponent of `player`.
+
+    utility : float
+        The value of `game.utility(player)`: -inf if `player` has lost, +inf
+        if it has won and 0 otherwise.
+    """
+    __slots__ = ("own_moves", "opp_moves", "utility")
+
+    def __init__(self, game, player, active_moves=None):
+        if active_moves is None:
+            active_moves = game.get_legal_moves()
+        waiting_moves = len(game.get_legal_moves(game.inactive_player))
+        if game.active_player == player:
+            self.own_moves, self.opp_moves = len(active_moves), waiting_moves
+            self.utility = 0. if active_moves else float("-inf")
+        else:
+            self.own_moves, self.opp_moves = waiting_moves, len(active_moves)
+            self.utility = 0. if active_moves else float("inf")
+
+
+def _cache_key(score_fn):
+    """Return the key of `score_fn` in _TAKES_CONTEXT: the function of plain
+    functions and bound methods, and the class of callable instances such as
+    `tuning.WeightedScore`, whose signature is that of their __call__().
+    """
+    if inspect.ismethod(score_fn):
+        return score_fn.__func__
+    if inspect.isfunction(score_fn) or inspect.isbuiltin(score_fn):
+        return score_fn
+    if inspect.isfunction(getattr(type(score_fn), "__call__", None)):
+        return type(score_fn)
+    return score_fn
+
+
+def takes_context(score_fn):
+    """Return True if `score_fn` accepts a `context` argument. """
+    key = _cache_key(score_fn)
+    try:
+        return _TAKES_CONTEXT[key]
+    except KeyError:
+        pass
+    try:
+        parameters = inspect.signature(score_fn).parameters
+    except (TypeError, ValueError):
+        parameters = {}
+    _TAKES_CONTEXT[key] = result = "context" in parameters
+    return result
@@ -2,6 +2,13 @@
 test your agent's strength against a set of known agents using tournament.py
 and include the results in your report.
 """
+import math
+
+from evaluation import EvalContext, takes_context
+from isolation.endgame import solve_partition
+from isolation.symmetry import canonical_key, distinct_placements, restore_move, transform_move
+from transposition import (TranspositionTable, EXACT, LOWER, UPPER,
+                           SECOND_PLAYER_KEY)
 
 
 class SearchTimeout(Exception):
@@ -9,7 +16,7 @@ class SearchTimeout(Exception):
     pass
 
 
-def custom_score(game, player):
+def custom_score(game, player, context=None):
     """Calculate the heuristic value of a game state from the point of view
     of the given player.
 
@@ -28,27 +35,30 @@ def custom_score(game, player):
         A player instance in the current game (i.e., an object corresponding to
         one of the player objects `game.__player_1__` or `game.__player_2__`.)
 
+    context : `evaluation.EvalContext` (optional)
+        The mobility of both players, passed by the search so that it is
+        computed once per position; computed from `game` if omitted.
+
     Returns
     -------
     float
         The heuristic value of the current game state to the specified player.
     """
     # TODO: finish this function!
-    if game.is_loser(player):
-        return float("-inf")
+    if context is None:
+        context = EvalContext(game, player)
+    if context.utility:
+        return context.utility
 
-    if game.is_winner(player):
-        return float("inf")
-
-    own_moves = len(game.get_legal_moves(player))
-    opp_moves = len(game.get_legal_moves(game.get_opponent(player)))
+    own_moves = context.own_moves
+    opp_moves = context.opp_moves
 
     win_probability = float(own_moves / (own_moves + opp_moves))
 
     return win_probability
 
 
-def custom_score_2(game, player):
+def custom_score_2(game, player, context=None):
     """Calculate the heuristic value of a game state from the point of view
     of the given player.
 
@@ -65,25 +75,28 @@ def custom_score_2(game, player):
         A player instance in the current game (i.e., an object corresponding to
         one of the player objects `game.__player_1__` or `game.__player_2__`.)
 
+    context : `evaluation.EvalContext` (optional)
+        The mobility of both players, passed by the search so that it is
+        computed once per position; computed from `game` if omitted.
+
     Returns
     -------
     float
         The heuristic value of the current game state to the specified player.
     """
     # TODO: finish this function!
-    if game.is_loser(player):
-        return float("-inf")
+    if context is None:
+        context = EvalContext(game, player)
+    if context.utility:
+        return context.utility
 
-    if game.is_winner(player):
-        return float("inf")
-
-    own_moves = len(game.get_legal_moves(player))
-    opp_moves = len(game.get_legal_moves(game.get_opponent(player)))
+    own_moves = context.own_moves
+    opp_moves = context.opp_moves
 
     return float(own_moves**2 - opp_moves**2)
 
 
-def custom_score_3(game, player):
+def custom_score_3(game, player, context=None):
     """Calculate the heuristic value of a game state from the point of view
     of the given player.
 
@@ -100,20 +113,23 @@ def custom_score_3(game, player):
         A player instance in the current game (i.e., an object corresponding to
         one of the player objects `game.__player_1__` or `game.__player_2__`.)
 
+    context : `evaluation.EvalContext` (optional)
+        The mobility of both players, passed by the search so that it is
+        computed once per position; computed from `game` if omitted.
+
     Returns
     -------
     float
         The heuristic value of the current game state to the specified player.
     """
     # TODO: finish this function!
-    if game.is_loser(player):
-        return float("-inf")
-
-    if game.is_winner(player):
-        return float("inf")
+    if context is None:
+        context = EvalContext(game, player)
+    if context.utility:
+        return context.utility
 
-    own_moves = len(game.get_legal_moves(player))
-    opp_moves = len(game.get_legal_moves(game.get_opponent(player)))
+    own_moves = context.own_moves
+    opp_moves = context.opp_moves
     score1 = float(own_moves / (own_moves + opp_moves))
     score2 = float(own_moves - opp_moves)
 
@@ -123,6 +139,37 @@ def custom_score_3(game, player):
         return score2 / score1
 
 
+def child_value(game, move, value_fn, in_place, *args):
+    """Return `value_fn(child, *args)` for the successor of `game` reached by
+    playing `move`.
+
+    With `in_place` the move is pushed onto `game` itself and popped again
+    when `value_fn` returns (or raises SearchTimeout), so the search walks
+    the whole tree on a single board instead of copying it for every node.
+    """
+    if not in_place:
+        return value_fn(game.forecast_move(move), *args)
+    game.push_move(move)
+    try:
+        return value_fn(game, *args)
+    finally:
+        game.pop_move()
+
+
+def leaf_value(player, game, moves):
+    """Return `player.score` for the leaf `game` from the point of view of
+    `player`, where `moves` are the legal moves of the active player already
+    generated by the search.
+
+    Score functions that accept a `context` argument receive the mobility of
+    both players in an `evaluation.EvalContext`, so the moves of each player
+    are generated once per leaf.
+    """
+    if takes_context(player.score):
+        return player.score(game, player, EvalContext(game, player, moves))
+    return player.score(game, player)
+
+
 class IsolationPlayer:
     """Base class for minimax and alphabeta agents -- this class is never
     constructed or tested directly.
@@ -156,7 +203,28 @@ class MinimaxPlayer(IsolationPlayer):
     """Game-playing agent that chooses a move using depth-limited minimax
     search. You must finish and test this player to make sure it properly uses
     minimax to return a good move before the search time limit expires.
+
+    Parameters
+    ----------
+    in_place : bool (optional)
+        Search the game tree with `Board.push_move()` / `Board.pop_move()`
+        on a single board rather than allocating a copy of the board for
+        every node with `Board.forecast_move()`.
+
+    check_interval : int (optional)
+        The number of nodes searched between reads of the clock; 1 reads it
+        at every node.
     """
+    def __init__(self, search_depth=3, score_fn=custom_score, timeout=10.,
+                 in_place=False, check_interval=1):
+        super().__init__(search_depth, score_fn, timeout)
+        self.in_place = in_place
+        self.check_interval = check_interval
+        self._countdown = 0
+        self.nodes = 0
+        self.leaves = 0
+        # Counters of the last call to get_move(), reported by Board.play()
+        self.search_stats = None
 
     def get_move(self, game, time_left):
         """Search for the best move from the available legal moves and return a
@@ -187,35 +255,51 @@ class MinimaxPlayer(IsolationPlayer):
             (-1, -1) if there are no available legal moves.
         """
         self.time_left = time_left
+        self.search_stats = None
         contingency = (-1, -1)
         legal_child_nodes = game.get_legal_moves()
         if len(legal_child_nodes) == 0:
             # self.score(game, self)
             return contingency
 
+        nodes, leaves, start = self.nodes, self.leaves, time_left()
+        depth = None
         try:
             # The try/except block will automatically catch the exception
             # raised when the timer is about to expire.
-            return self.minimax(game, self.search_depth)
+            move = self.minimax(game, self.search_depth)
+            depth = self.search_depth
+            return move
 
         except SearchTimeout:
             # self.score(game, self)
             return contingency
 
+        finally:
+            self.search_stats = {"source": "search", "nodes": self.nodes - nodes,
+                                 "leaves": self.leaves - leaves, "depth": depth,
+                                 "search_ms": start - self.time_left()}
+
     def min_value(self, game, depth):
         """ Return the value tree if we reach the maximum depth,
         otherwise return the minimum value over all legal child
         nodes.
         """
-        if self.time_left() < self.TIMER_THRESHOLD:
-            raise SearchTimeout()
+        self._countdown -= 1
+        if self._countdown <= 0:
+            self._countdown = self.check_interval
+            if self.time_left() < self.TIMER_THRESHOLD:
+                raise SearchTimeout()
+        self.nodes += 1
         moves = game.get_legal_moves()
-        if depth <= 0 or len(moves) == 0 or game.utility(self) != 0:
-            return self.score(game, self)
+        # The game is over exactly when the active player has no moves
+        if depth <= 0 or not moves:
+            self.leaves += 1
+            return leaf_value(self, game, moves)
 
         v = float("inf")
         for m in moves:
-            v = min(v, self.max_value(game.forecast_move(m), depth-1))
+            v = min(v, child_value(game, m, self.max_value, self.in_place, depth-1))
         return v
 
     def max_value(self, game, depth):
@@ -223,15 +307,21 @@ class MinimaxPlayer(IsolationPlayer):
         otherwise return the maximum value over all legal child
         nodes.
         """
-        if self.time_left() < self.TIMER_THRESHOLD:
-            raise SearchTimeout()
+        self._countdown -= 1
+        if self._countdown <= 0:
+            self._countdown = self.check_interval
+            if self.time_left() < self.TIMER_THRESHOLD:
+                raise SearchTimeout()
+        self.nodes += 1
         moves = game.get_legal_moves()
-        if depth <= 0 or len(moves) == 0 or game.utility(self) != 0:
-            return self.score(game, self)
+        # The game is over exactly when the active player has no moves
+        if depth <= 0 or not moves:
+            self.leaves += 1
+            return leaf_value(self, game, moves)
 
         v = float("-inf")
         for m in moves:
-            v = max(v, self.min_value(game.forecast_move(m), depth-1))
+            v = max(v, child_value(game, m, self.min_value, self.in_place, depth-1))
         return v
 
     def minimax(self, game, depth):
@@ -287,7 +377,7 @@ class MinimaxPlayer(IsolationPlayer):
             game_scores = dict()
 
             for move in legal_child_nodes:
-                value = self.min_value(game.forecast_move(move), depth-1)
+                value = child_value(game, move, self.min_value, self.in_place, depth-1)
                 game_scores[move] = value
 
             return max(game_scores, key=game_scores.get)
@@ -297,7 +387,129 @@ class AlphaBetaPlayer(IsolationPlayer):
     """Game-playing agent that chooses a move using iterative deepening minimax
     search with alpha-beta pruning. You must finish and test this player to
     make sure it returns a good move before the search time limit expires.
+
+    Parameters
+    ----------
+    in_place : bool (optional)
+        Search the game tree with `Board.push_move()` / `Board.pop_move()`
+        on a single board rather than allocating a copy of the board for
+        every node with `Board.forecast_move()`.
+
+    tt_size : int (optional)
+        The number of buckets in the transposition table; 0 disables the
+        table. The table is kept across iterative deepening iterations and
+        across moves.
+
+    ordering : object (optional)
+        A move orderer such as `move_ordering.MoveOrderer` used to sort the
+        moves of every node before they are searched; None searches the
+        moves in the order they are generated.
+
+    pvs : bool (optional)
+        Use principal variation search: only the first move of each node is
+        searched with the full (alpha, beta) window, and the remaining moves
+        are tested with a null window and re-searched only if they turn out
+        to be better. Works best together with move ordering.
+
+    aspiration : float or None (optional)
+        Half-width of the aspiration window centered on the value of the
+        previous iterative deepening iteration; the root is searched again
+        with a full window when the value falls outside of it. The width
+        should match the scale of `score_fn`. None always searches the root
+        with a full window.
+
+    book : `opening_book.OpeningBook` or None (optional)
+        An opening book consulted before searching; positions found in the
+        book are played without a search.
+
+    endgame_cells : int (optional)
+        Solve positions with at most this many open cells exactly as soon as
+        the players can no longer reach each other (see `isolation.endgame`),
+        both at the root and at every node of the search; 0 disables the
+        endgame solver.
+
+    time_manager : `time_manager.TimeManager` or None (optional)
+        Sets how often the search reads the clock and stops iterative
+        deepening early when the next iteration is predicted not to finish;
+        None reads the clock at every node and searches until the time runs
+        out.
+
+    symmetry_plies : int (optional)
+        Store the positions with fewer than this many moves in the
+        transposition table under their symmetry-canonical key (see
+        `isolation.symmetry`), so that the reflections and rotations of a
+        position share an entry. Symmetric transpositions are common in the
+        opening and rare later on, while computing the canonical key costs
+        about as much as searching a node; 0 disables it.
+
+    symmetric_placements : bool (optional)
+        Search a single placement move from every class of placements that
+        lead to symmetric positions (see
+        `isolation.symmetry.distinct_placements()`), which divides the
+        branching factor of the first move by up to eight; the bigger the
+        board, the more it pays off. The search returns the same values as
+        long as `score_fn` gives symmetric positions the same score, as
+        mobility heuristics do.
+
+    batch_leaves : bool (optional)
+        Score all the leaves below each node two plies above the search
+        horizon with a single call to `score_fn.score_frontier()` instead of
+        one call per leaf, which requires a batch evaluator such as
+        `batch_evaluation.MobilityEvaluator` (and NumPy). The leaves of a
+        batch are not pruned by alpha-beta, so this pays off for heuristics
+        that are costly to compute one position at a time.
+
+    tablebase : `tablebase.Tablebase` or None (optional)
+        An endgame tablebase probed at the root, where a position found in
+        the table is played without a search, and at the leaves of the
+        search, where it replaces the heuristic score with the exact value
+        of the positions with few enough open cells within reach of the
+        players.
     """
+    def __init__(self, search_depth=3, score_fn=custom_score, timeout=10.,
+                 in_place=False, tt_size=0, ordering=None, pvs=False,
+                 aspiration=None, book=None, endgame_cells=0, time_manager=None,
+                 symmetry_plies=0, symmetric_placements=False, batch_leaves=False,
+                 tablebase=None):
+        super().__init__(search_depth, score_fn, timeout)
+        if batch_leaves and not hasattr(score_fn, "score_frontier"):
+            raise ValueError("batch_leaves requires a score_fn with a score_frontier() method")
+        self.batch_leaves = batch_leaves
+        self.in_place = in_place
+        self.tt = TranspositionTable(tt_size) if tt_size else None
+        self._tt_salt = 0
+        self.ordering = ordering
+        self.pvs = pvs
+        self.aspiration = aspiration
+        self.book = book
+        self.endgame_cells = endgame_cells
+        self.tablebase = tablebase
+        self.time_manager = time_manager
+        self.symmetry_plies = symmetry_plies
+        self.symmetric_placements = symmetric_placements
+        self.check_interval = 1
+        self._countdown = 0
+        # Longest path lengths cached by the endgame solver during a search
+        self._endgame_memo = {}
+        self.endgame_solves = 0
+        self.tablebase_hits = 0
+        # Best root move of the last completed iterative deepening iteration
+        self._pv_move = None
+        self.nodes = 0
+        self.leaves = 0
+        self.cutoffs = 0
+        self.researches = 0
+        # Counters of the last call to get_move(), reported by Board.play()
+        self.search_stats = None
+        # Depth of the last iteration completed in each call to get_move() of
+        # the current game, and the move count of the last call, which tells
+        # when a new game has started
+        self.completed_depths = []
+        self._last_move_count = None
+        # (hash, best move, value, depth) of the position searched by ponder()
+        self._ponder_result = None
+        self.ponder_hits = 0
+        self.ponder_misses = 0
 
     def get_move(self, game, time_left):
         """Search for the best move from the available legal moves and return a
@@ -325,6 +537,17 @@ class AlphaBetaPlayer(IsolationPlayer):
             (-1, -1) if there are no available legal moves.
         """
         self.time_left = time_left
+        if self._last_move_count is not None and game.move_count <= self._last_move_count:
+            self.completed_depths.clear()
+        self._last_move_count = game.move_count
+        self.start_search(game)
+        manager = self.time_manager
+        if manager is not None:
+            manager.start()
+            self.check_interval = manager.check_interval
+        search_nodes, search_start = self.nodes, time_left()
+        counters = self.counters()
+        self.search_stats = None
         best_move = (-1, -1)
         legal_moves = game.get_legal_moves()
         if len(legal_moves) > 0:
@@ -335,21 +558,227 @@ class AlphaBetaPlayer(IsolationPlayer):
         # Initialize the best move so that this function returns something
         # in case the search fails due to timeout
 
+        if self.book is not None:
+            entry = self.book.probe(game)
+            if entry is not None:
+                self.search_stats = {"source": "book", "depth": entry[2]}
+                return entry[0]
+
+        if self.endgame_cells:
+            if game.width * game.height - game.move_count <= self.endgame_cells:
+                solved = solve_partition(game, self, self._endgame_memo)
+                if solved is not None:
+                    self.endgame_solves += 1
+                    self.search_stats = {"source": "endgame", "depth": None}
+                    return solved[1]
+
+        if self.tablebase is not None:
+            move = self.tablebase.best_move(game)
+            if move is not None:
+                self.search_stats = {"source": "tablebase", "depth": None}
+                return move
+
+        # (nodes, milliseconds) of every completed iteration
+        iterations = []
+
         try:
             # The try/except block will automatically catch the exception
             # raised when the timer is about to expire.
 
             depth = 1
+            value = None
+
+            # Resume from the deepest iteration completed while pondering if
+            # the opponent played the predicted move
+            ponder_result, self._ponder_result = self._ponder_result, None
+            if ponder_result is not None:
+                key, move, ponder_value, ponder_depth = ponder_result
+                if key == game.hash() and move in legal_moves:
+                    self.ponder_hits += 1
+                    best_move, value, depth = move, ponder_value, ponder_depth + 1
+                    self._pv_move = move
+                else:
+                    self.ponder_misses += 1
+
             # Iterative deepening will continuously run, one level deeper
-            # each time until there is a winner or timeout
-            while True:
-                if self.time_left() < self.TIMER_THRESHOLD:
+            # each time until there is a winner or timeout, or until the
+            # search covers every open cell and cannot go any deeper
+            max_depth = len(game.get_blank_spaces())
+            while depth <= max_depth:
+                remaining = self.time_left()
+                if remaining < self.TIMER_THRESHOLD:
                     raise SearchTimeout()
-                best_move = self.alphabeta(game, depth)
+                if manager is not None and not manager.next_iteration_fits(
+                        remaining - self.TIMER_THRESHOLD):
+                    break
+                iteration_nodes = self.nodes
+                best_move, value = self.aspiration_search(game, depth, value)
+                iterations.append((self.nodes - iteration_nodes,
+                                   remaining - self.time_left()))
+                if manager is not None:
+                    manager.iteration_done(*iterations[-1])
+                self._pv_move = best_move
                 depth += 1
 
         except SearchTimeout:
-            return best_move
+            pass
+
+        elapsed = search_start - self.time_left()
+        if manager is not None:
+            manager.search_done(self.nodes - search_nodes, elapsed)
+        self.completed_depths.append(depth - 1)
+        self.search_stats = self.search_summary(counters, depth - 1, iterations, elapsed)
+        return best_move
+
+    def counters(self):
+        """Return the cumulative search counters reported by search_summary(). """
+        probes, hits = (self.tt.probes, self.tt.hits) if self.tt is not None else (0, 0)
+        return self.nodes, self.leaves, self.cutoffs, probes, hits
+
+    def search_summary(self, counters, depth, iterations, elapsed):
+        """Summarize a search for the telemetry of `Board.play()`.
+
+        Parameters
+        ----------
+        counters : tuple
+            The values returned by counters() before the search.
+
+        depth : int
+            The depth of the last completed iteration.
+
+        iterations : list<(int, float)>
+            The nodes and milliseconds of every completed iteration.
+
+        elapsed : float
+            The duration of the whole search in milliseconds.
+
+        Returns
+        -------
+        dict
+            The nodes, leaf evaluations, cutoffs and transposition table
+            probes and hits of the search, the depth completed, the nodes and
+            duration of each iteration, and the effective branching factor
+            (the ratio between the nodes of the last two iterations; None
+            with fewer than two iterations).
+        """
+        nodes, leaves, cutoffs, probes, hits = (
+            now - before for now, before in zip(self.counters(), counters))
+        branching = None
+        if len(iterations) > 1 and iterations[-2][0]:
+            branching = iterations[-1][0] / iterations[-2][0]
+        return {"source": "search", "nodes": nodes, "leaves": leaves,
+                "cutoffs": cutoffs, "depth": depth, "search_ms": elapsed,
+                "iteration_nodes": [n for n, _ in iterations],
+                "iteration_ms": [ms for _, ms in iterations],
+                "tt_probes": probes, "tt_hits": hits,
+                "branching_factor": branching}
+
+    def ponder(self, game, stop):
+        """Search on the opponent's time while it selects its move in `game`
+        (see the `ponder` option of `Board.play()`).
+
+        The opponent's reply is predicted from the best move stored for the
+        position in the transposition table, or else with a one-ply search
+        using `self.score`, and the position after the reply is searched by
+        iterative deepening until `stop` is set. If the opponent plays the
+        predicted move, get_move() resumes from the deepest iteration
+        completed here; otherwise it still starts with the entries left in
+        the transposition table.
+
+        Parameters
+        ----------
+        game : `isolation.Board`
+            A copy of the game with the opponent to move.
+
+        stop : `threading.Event`
+            Set when the opponent has selected its move.
+        """
+        self._ponder_result = None
+        replies = game.get_legal_moves()
+        if not replies:
+            return
+
+        reply = None
+        if self.tt is not None:
+            # This player is player 1 whenever the opponent moves on an odd move count
+            self._tt_salt = 0 if game.move_count % 2 == 1 else SECOND_PLAYER_KEY
+            hash_move = self.tt_lookup(game, 0, float("-inf"), float("inf"))[3]
+            if hash_move in replies:
+                reply = hash_move
+        if reply is None:
+            reply = min(replies, key=lambda m: self.score(game.forecast_move(m), self))
+
+        board = game.forecast_move(reply)
+        if not board.get_legal_moves():
+            return
+        self.time_left = lambda: float("-inf") if stop.is_set() else float("inf")
+        self.start_search(board)
+        value = None
+        try:
+            for depth in range(1, len(board.get_blank_spaces()) + 1):
+                move, value = self.aspiration_search(board, depth, value)
+                self._pv_move = move
+                self._ponder_result = (board.hash(), move, value, depth)
+        except SearchTimeout:
+            pass
+
+    def start_search(self, game):
+        """Reset the per-search state before searching a new root position. """
+        if self.tt is not None:
+            self.tt.new_search()
+            # Player 1 holds the initiative whenever the move count is even
+            self._tt_salt = 0 if game.move_count % 2 == 0 else SECOND_PLAYER_KEY
+        if self.ordering is not None:
+            self.ordering.new_search()
+        self._pv_move = None
+        self._endgame_memo = {}
+
+    def search_to_depth(self, game, depth):
+        """Run the iterative deepening search of get_move() without a time
+        limit, stopping after the iteration at `depth`. This is intended for
+        benchmarks that compare search configurations on equal terms.
+
+        Returns
+        -------
+        (int, int)
+            The best move found by the deepest iteration; (-1, -1) if there
+            are no legal moves.
+        """
+        self.time_left = lambda: float("inf")
+        self.start_search(game)
+        best_move, value = (-1, -1), None
+        for d in range(1, depth + 1):
+            best_move, value = self.aspiration_search(game, d, value)
+            self._pv_move = best_move
+        return best_move
+
+    def aspiration_search(self, game, depth, previous_value=None):
+        """Search the root to `depth` inside an aspiration window centered
+        on `previous_value`, the value of the previous iteration, widening the
+        window to the failing side and searching again whenever the value
+        falls outside of it.
+
+        Returns
+        -------
+        ((int, int), float)
+            The best move and its value.
+        """
+        inf = float("inf")
+        if (self.aspiration is None or previous_value is None or
+                abs(previous_value) == inf):
+            return self.search_root(game, depth)
+
+        alpha = previous_value - self.aspiration
+        beta = previous_value + self.aspiration
+        while True:
+            move, value = self.search_root(game, depth, alpha, beta)
+            if value <= alpha and alpha > -inf:
+                alpha = -inf
+            elif value >= beta and beta < inf:
+                beta = inf
+            else:
+                return move, value
+            self.researches += 1
 
     def alpha_beta_min_value(self, game, depth, alpha, beta):
 
@@ -357,24 +786,68 @@ class AlphaBetaPlayer(IsolationPlayer):
         otherwise return the minimum value over all legal child
         nodes.
         """
-        if self.time_left() < self.TIMER_THRESHOLD:
-            raise SearchTimeout()
+        self._countdown -= 1
+        if self._countdown <= 0:
+            self._countdown = self.check_interval
+            if self.time_left() < self.TIMER_THRESHOLD:
+                raise SearchTimeout()
+        self.nodes += 1
+
+        if self.endgame_cells:
+            value = self.endgame_value(game)
+            if value is not None:
+                return value
 
         moves = game.get_legal_moves()
-        if depth <= 0 or len(moves) == 0 or game.utility(self) != 0:
+        # The game is over exactly when the active player has no moves
+        if depth <= 0 or not moves:
             # Compute a score of the game state using our heuristic value function.
-            return self.score(game, self)
+            self.leaves += 1
+            if moves and self.tablebase is not None:
+                value = self.tablebase_value(game)
+                if value is not None:
+                    return value
+            return leaf_value(self, game, moves)
+
+        # The bound of the value is stored against the window the node was
+        # searched with, before any stored bound narrows it
+        window = (alpha, beta)
+        hash_move = None
+        if self.tt is not None:
+            stored, alpha, beta, hash_move = self.tt_lookup(game, depth, alpha, beta)
+            if stored is not None:
+                return stored
+        if self.symmetric_placements:
+            moves = distinct_placements(game, moves)
+        if self.batch_leaves and depth <= 2:
+            return self.frontier_value(game, moves, depth, window, False)
+        if self.ordering is not None:
+            moves = self.ordering.order(game, moves, hash_move)
 
         v = float("inf")
-        for m in moves:
+        best_move = moves[0]
+        for i, m in enumerate(moves):
             # v is the value of the game state after performing the legal move m. the v*s are inputs into a minimizing
             # node
-            v = min(v, self.alpha_beta_max_value(game.forecast_move(m), depth - 1, alpha, beta))
+            if self.pvs and i > 0:
+                value = self.null_window_value(game, m, self.alpha_beta_max_value,
+                                               depth - 1, alpha, beta, False)
+            else:
+                value = child_value(game, m, self.alpha_beta_max_value, self.in_place,
+                                    depth - 1, alpha, beta)
+            if value < v:
+                v, best_move = value, m
             # alpha is the minimum possible value of the maximizing parent layer directly above node v.
             if v <= alpha:
-                return v
+                self.cutoffs += 1
+                if self.ordering is not None:
+                    self.ordering.record_cutoff(game, m, depth, i)
+                break
             # beta is the maximum possible value of the current minimizing layer.
             beta = min(beta, v)
+
+        if self.tt is not None:
+            self.tt_save(game, depth, v, window, best_move)
         return v
 
     def alpha_beta_max_value(self, game, depth, alpha, beta):
@@ -383,27 +856,193 @@ class AlphaBetaPlayer(IsolationPlayer):
         nodes.
         """
         # Test if we still have time.
-        if self.time_left() < self.TIMER_THRESHOLD:
-            raise SearchTimeout()
+        self._countdown -= 1
+        if self._countdown <= 0:
+            self._countdown = self.check_interval
+            if self.time_left() < self.TIMER_THRESHOLD:
+                raise SearchTimeout()
+        self.nodes += 1
+
+        if self.endgame_cells:
+            value = self.endgame_value(game)
+            if value is not None:
+                return value
 
         moves = game.get_legal_moves()
-        if depth <= 0 or len(moves) == 0 or game.utility(self) != 0:
+        # The game is over exactly when the active player has no moves
+        if depth <= 0 or not moves:
             # Compute a score of the game state using our heuristic value function.
-            return self.score(game, self)
+            self.leaves += 1
+            if moves and self.tablebase is not None:
+                value = self.tablebase_value(game)
+                if value is not None:
+                    return value
+            return leaf_value(self, game, moves)
+
+        # The bound of the value is stored against the window the node was
+        # searched with, before any stored bound narrows it
+        window = (alpha, beta)
+        hash_move = None
+        if self.tt is not None:
+            stored, alpha, beta, hash_move = self.tt_lookup(game, depth, alpha, beta)
+            if stored is not None:
+                return stored
+        if self.symmetric_placements:
+            moves = distinct_placements(game, moves)
+        if self.batch_leaves and depth <= 2:
+            return self.frontier_value(game, moves, depth, window, True)
+        if self.ordering is not None:
+            moves = self.ordering.order(game, moves, hash_move)
 
         v = float("-inf")
-        for m in game.get_legal_moves():
+        best_move = moves[0]
+        for i, m in enumerate(moves):
             # v is the value of the game state after performing the legal move m. the v*s are inputs into a maximizing
             # layer.
-            v = max(v, self.alpha_beta_min_value(game.forecast_move(m), depth - 1, alpha, beta))
+            if self.pvs and i > 0:
+                value = self.null_window_value(game, m, self.alpha_beta_min_value,
+                                               depth - 1, alpha, beta, True)
+            else:
+                value = child_value(game, m, self.alpha_beta_min_value, self.in_place,
+                                    depth - 1, alpha, beta)
+            if value > v:
+                v, best_move = value, m
             # beta is the maximum possible value of the minimizing parent layer directly above node v.
             if beta <= v:
-                return v
+                self.cutoffs += 1
+                if self.ordering is not None:
+                    self.ordering.record_cutoff(game, m, depth, i)
+                break
             # alpha is the minimum possible value of the current maximizing layer
             alpha = max(alpha, v)
 
+        if self.tt is not None:
+            self.tt_save(game, depth, v, window, best_move)
+        return v
+
+    def frontier_value(self, game, moves, depth, window, maximizing):
+        """Return the value of a node `depth` (1 or 2) plies above the search
+        horizon, scoring all the leaves below it with a single batch (see
+        the `batch_leaves` option).
+        """
+        leaves = self.score.score_frontier(game, self, moves, depth)
+        count = sum(len(scores) for scores in leaves)
+        self.leaves += count
+        self.nodes += count + (len(moves) if depth > 1 else 0)
+        self._countdown -= count
+        # The children of a maximizing node minimize over their leaves
+        if maximizing:
+            values = [min(scores) for scores in leaves]
+            v = max(values)
+        else:
+            values = [max(scores) for scores in leaves]
+            v = min(values)
+        if self.tt is not None:
+            self.tt_save(game, depth, v, window, moves[values.index(v)])
         return v
 
+    def endgame_value(self, game):
+        """Return the exact value of `game` if it has few enough open cells
+        and the players' regions are separated, and None otherwise.
+        """
+        if game.width * game.height - game.move_count > self.endgame_cells:
+            return None
+        solved = solve_partition(game, self, self._endgame_memo)
+        if solved is None:
+            return None
+        self.endgame_solves += 1
+        return solved[0]
+
+    def tablebase_value(self, game):
+        """Return the exact value of `game` if it is in the tablebase, and
+        None otherwise.
+        """
+        result = self.tablebase.probe(game)
+        if result is None:
+            return None
+        self.tablebase_hits += 1
+        # The tablebase scores the position for the player to move
+        if result[0] == (game.active_player is self):
+            return float("inf")
+        return float("-inf")
+
+    def null_window_value(self, game, move, value_fn, depth, alpha, beta, maximizing):
+        """Test whether `move` improves on the best move of the current node
+        with a null-window search, which only establishes whether its value
+        is above alpha (at maximizing nodes) or below beta (at minimizing
+        nodes). The move is searched again with the full (alpha, beta) window
+        only when the test shows that its value lies inside it.
+
+        The null window spans the gap between the bound and the adjacent
+        float, the floating point equivalent of (alpha, alpha + 1) in an
+        integer-valued search.
+        """
+        if maximizing:
+            window = (alpha, math.nextafter(alpha, float("inf")))
+        else:
+            window = (math.nextafter(beta, float("-inf")), beta)
+        value = child_value(game, move, value_fn, self.in_place, depth, *window)
+        if alpha < value < beta:
+            self.researches += 1
+            value = child_value(game, move, value_fn, self.in_place, depth, alpha, beta)
+        return value
+
+    def tt_lookup(self, game, depth, alpha, beta):
+        """Probe the transposition table for the current node.
+
+        Returns
+        -------
+        (float or None, float, float, (int, int) or None)
+            The stored value if it settles the node for the (alpha, beta)
+            window (None otherwise), followed by the window narrowed with any
+            bound stored for the node and the best move stored for the node.
+        """
+        key, t = self.tt_key(game)
+        entry = self.tt.probe(key)
+        if entry is None:
+            return None, alpha, beta, None
+        move = entry[4]
+        if t:
+            move = restore_move(move, t, game.width, game.height)
+        if entry[1] < depth:
+            return None, alpha, beta, move
+        value, bound = entry[2], entry[3]
+        if bound == EXACT:
+            return value, alpha, beta, move
+        if bound == LOWER:
+            alpha = max(alpha, value)
+        else:
+            beta = min(beta, value)
+        if alpha >= beta:
+            return value, alpha, beta, move
+        return None, alpha, beta, move
+
+    def tt_save(self, game, depth, value, window, best_move):
+        """Store the value found by searching the current node with the
+        (alpha, beta) `window` in the transposition table.
+        """
+        alpha, beta = window
+        if value <= alpha:
+            bound = UPPER
+        elif value >= beta:
+            bound = LOWER
+        else:
+            bound = EXACT
+        key, t = self.tt_key(game)
+        if t:
+            best_move = transform_move(best_move, t, game.width, game.height)
+        self.tt.store(key, depth, value, bound, best_move)
+
+    def tt_key(self, game):
+        """Return the transposition table key of `game` and the index of the
+        symmetry (see `isolation.symmetry`) that maps the moves of `game` to
+        the moves stored in the table.
+        """
+        if game.move_count < self.symmetry_plies:
+            key, t = canonical_key(game)
+            return key ^ self._tt_salt, t
+        return game.hash() ^ self._tt_salt, 0
+
     def alphabeta(self, game, depth, alpha=float("-inf"), beta=float("inf")):
         """Implement depth-limited minimax search with alpha-beta pruning as
         described in the lectures.
@@ -440,22 +1079,47 @@ class AlphaBetaPlayer(IsolationPlayer):
                 each helper function or else your agent will timeout during
                 testing.
         """
+        return self.search_root(game, depth, alpha, beta)[0]
+
+    def search_root(self, game, depth, alpha=float("-inf"), beta=float("inf")):
+        """Search the root node with alpha-beta pruning as in alphabeta(), but
+        return the value of the best move along with the move itself.
 
+        Returns
+        -------
+        ((int, int), float)
+            The best move and its value; the value is an upper bound when it
+            is not greater than alpha and a lower bound when it is not less
+            than beta. Returns (-1, -1) if there are no legal moves.
+        """
         legal_child_nodes = game.get_legal_moves()
         if len(legal_child_nodes) == 0:
-            best_move = (-1, -1)
-            # self.score(game, self)
-            return best_move
-
-        else:
-            # Just in case value the if statement below never evaluates to True and therefore the best_move is never
-            # assigned a value.
-            best_move = legal_child_nodes[0]
-            for move in legal_child_nodes:
-                value = self.alpha_beta_min_value(game.forecast_move(move), depth-1, alpha, beta)
-                # alpha is the minimum possible value into the current maximizing layer.
-                if value > alpha:
-                    alpha = value
-                    best_move = move
-
-            return best_move
+            return (-1, -1), float("-inf")
+
+        if self.symmetric_placements:
+            legal_child_nodes = distinct_placements(game, legal_child_nodes)
+        if self.ordering is not None:
+            legal_child_nodes = self.ordering.order(game, legal_child_nodes, self._pv_move)
+        # Just in case no move ever improves on the best value and therefore the best_move is never
+        # assigned a value.
+        best_move = legal_child_nodes[0]
+        best_value = float("-inf")
+        window = (alpha, beta)
+        for i, move in enumerate(legal_child_nodes):
+            if self.pvs and i > 0:
+                value = self.null_window_value(game, move, self.alpha_beta_min_value,
+                                               depth - 1, alpha, beta, True)
+            else:
+                value = child_value(game, move, self.alpha_beta_min_value, self.in_place,
+                                    depth - 1, alpha, beta)
+            if value > best_value:
+                best_value, best_move = value, move
+            # alpha is the minimum possible value into the current maximizing layer.
+            alpha = max(alpha, best_value)
+            # The root can only fail high when searched with an aspiration window
+            if alpha >= beta:
+                break
+
+        if self.tt is not None:
+            self.tt_save(game, depth, best_value, window, best_move)
+        return best_move, best_value
@@ -0,0 +1,197 @@
+"""Compact binary records of Isolation games.
+
+A record file stores any number of games, each as a fixed-size header
+followed by one byte per move:
+
+    file header: magic
+    game header: width, height, termination, number of moves, the cell
+                 indices (idx = row + column * height) of the two placement
+                 moves (NO_MOVE if the game ended before them)
+    moves:       one byte per move after the placement moves, the index of
+                 the knight direction from the previous location of the
+                 player to move
+
+The placement moves are the openings of a tournament; every later move is a
+knight move, which a single byte encodes on a board of any size. The player
+to move after the last move of a game is the loser, so the winner follows
+from the number of moves and only the reason for the loss is stored.
+
+`RecordWriter` appends games to a file (see `tournament.py --records`),
+`read_records()` streams them back without loading the file, `replay()`
+walks through the positions of a game on a single board, and `to_isoviz()`
+converts a game to the input of the `isoviz` display.
+
+Summarize or export the games of a file from the command line with
+
+    python game_records.py games.bin
+    python game_records.py games.bin --isoviz 3 > game.json
+"""
+import argparse
+import json
+import struct
+import sys
+from collections import Counter, namedtuple
+
+from isolation import BitBoard
+from isolation.isolation import _KNIGHT_DIRECTIONS
+
+MAGIC = b"ISOGAME1"
+GAME = struct.Struct("<BBBHHH")
+
+# Cell index of a placement move that was not played
+NO_MOVE = 0xFFFF
+
+# The reasons for losing returned by `Board.play()`, by code
+TERMINATIONS = ["illegal move", "timeout", "forfeit"]
+
+GameRecord = namedtuple("GameRecord", ["width", "height", "moves", "termination"])
+GameRecord.__doc__ = """A game read from a record file: the board size, the
+list of (row, column) moves and the termination reason."""
+
+
+class RecordWriter:
+    """Write game records to a binary file open for writing.
+
+    Parameters
+    ----------
+    file : file object
+        A binary file open for writing; the file header is written first.
+    """
+
+    def __init__(self, file):
+        self.file = file
+        self.file.write(MAGIC)
+        self.games = 0
+
+    def write(self, width, height, moves, termination):
+        """Append a game to the file.
+
+        Parameters
+        ----------
+        width, height : int
+            The size of the board.
+
+        moves : list<(int, int)>
+            Every move of the game from the empty board, including the
+            opening moves applied before `Board.play()` was called.
+
+        termination : str
+            The reason for losing returned by `Board.play()`.
+        """
+        placements = [move[0] + move[1] * height for move in moves[:2]]
+        placements += [NO_MOVE] * (2 - len(placements))
+        data = bytearray(GAME.pack(width, height, TERMINATIONS.index(termination),
+                                   len(moves), *placements))
+        for i in range(2, len(moves)):
+            previous, move = moves[i - 2], moves[i]
+            data.append(_KNIGHT_DIRECTIONS.index(
+                (move[0] - previous[0], move[1] - previous[1])))
+        self.file.write(data)
+        self.games += 1
+
+
+def read_records(file):
+    """Yield every game of a record file as a `GameRecord`.
+
+    Parameters
+    ----------
+    file : file object
+        A binary file open for reading, positioned at the file header.
+    """
+    if file.read(len(MAGIC)) != MAGIC:
+        raise ValueError("not a game record file")
+    read = file.read
+    header_size = GAME.size
+    unpack = GAME.unpack
+    while True:
+        header = read(header_size)
+        if not header:
+            return
+        if len(header) < header_size:
+            raise ValueError("truncated game record")
+        width, height, termination, count, first, second = unpack(header)
+        moves = [(idx % height, idx // height) for idx in (first, second)[:count]]
+        if count > 2:
+            directions = read(count - 2)
+            if len(directions) < count - 2:
+                raise ValueError("truncated game record")
+            # Each player moves from its own previous location
+            locations = moves[:]
+            for i, code in enumerate(directions):
+                dr, dc = _KNIGHT_DIRECTIONS[code]
+                row, col = locations[i & 1]
+                locations[i & 1] = move = (row + dr, col + dc)
+                moves.append(move)
+        yield GameRecord(width, height, moves, TERMINATIONS[termination])
+
+
+def replay(record, board_class=BitBoard):
+    """Yield the position before every move of a recorded game with the move
+    played from it, then the final position with None.
+
+    The same board is updated in place between positions, so copy it to
+    keep a position.
+    """
+    game = board_class("Player1", "Player2", record.width, record.height)
+    for move in record.moves:
+        yield game, move
+        game.apply_move(move)
+    yield game, None
+
+
+def winner(record):
+    """Return the seat (1 or 2) of the winner of a recorded game. """
+    return 2 if len(record.moves) % 2 == 0 else 1
+
+
+def to_isoviz(record):
+    """Return a recorded game in the format of the `isoviz` display: the list
+    of [row, column] moves, which goes as JSON into the "Move History" field
+    of `isoviz/display.html` (the player names have their own fields).
+    """
+    if (record.width, record.height) != (7, 7):
+        raise ValueError("isoviz only displays 7x7 boards")
+    if len(record.moves) < 2:
+        raise ValueError("isoviz needs both placement moves")
+    return [list(move) for move in record.moves]
+
+
+def summarize(file):
+    """Return statistics over the games of a record file. """
+    games = 0
+    moves = 0
+    first_wins = 0
+    terminations = Counter()
+    sizes = Counter()
+    for record in read_records(file):
+        games += 1
+        moves += len(record.moves)
+        first_wins += winner(record) == 1
+        terminations[record.termination] += 1
+        sizes["{}x{}".format(record.width, record.height)] += 1
+    return {"games": games, "moves": moves,
+            "average_length": moves / games if games else 0.,
+            "first_player_wins": first_wins,
+            "terminations": dict(terminations), "sizes": dict(sizes)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize or export a file of game records")
+    parser.add_argument("path", help="game record file")
+    parser.add_argument("--isoviz", type=int, default=None, metavar="GAME",
+                        help="print game GAME (counting from 1) in the isoviz format")
+    args = parser.parse_args()
+
+    with open(args.path, "rb") as file:
+        if args.isoviz is None:
+            print(json.dumps(summarize(file), indent=2))
+            return
+        for number, record in enumerate(read_records(file), 1):
+            if number == args.isoviz:
+                print(json.dumps(to_isoviz(record)))
+                return
+    sys.exit("{} has fewer than {} games".format(args.path, args.isoviz))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+"""
+This file contains the `BitBoard` class, an alternate engine for the game
+Isolation that keeps the public interface of `isolation.Board` while storing
+the blocked cells as a single integer bitmask.
+
+Cells are indexed exactly as in `Board` (idx = row + column * height), so bit
+`idx` of the mask is set once the cell has been occupied. Legal moves are
+found by ANDing a precomputed knight-move mask for the player's square with
+the free cells, and the resulting mask is decoded through a cached table, so
+move generation and `copy()` reduce to a few integer operations. The mask of
+blank spaces, which has hundreds of bits on large boards, is decoded a byte
+at a time through per-size tables instead.
+"""
+from .isolation import Board, knight_tables, zobrist_keys
+
+# Per-size lookup tables, built the first time a board of that size is made
+_TABLES = {}
+_BYTE_TABLES = {}
+
+
+def board_tables(width, height):
+    """Return the shared lookup tables for a board of the given size.
+
+    Returns
+    -------
+    (list<int>, list<(int, int)>, dict)
+        The knight-move mask of every cell, the (row, column) coordinate of
+        every cell, and the cache used to decode move masks into lists of
+        coordinates.
+    """
+    key = (width, height)
+    if key not in _TABLES:
+        cells, moves = knight_tables(width, height)
+        masks = [sum(1 << idx for _, idx in targets) for targets in moves]
+        _TABLES[key] = (masks, cells, {})
+    return _TABLES[key]
+
+
+def byte_tables(width, height):
+    """Return the tables used by decode_bytes() for a board of the given
+    size: for every byte of a cell bitmask, the coordinates of the cells set
+    in each of its 256 values.
+    """
+    key = (width, height)
+    if key not in _BYTE_TABLES:
+        cells = board_tables(width, height)[1]
+        tables = []
+        for base in range(0, len(cells), 8):
+            chunk = cells[base:base + 8]
+            tables.append([tuple(cell for bit, cell in enumerate(chunk) if value >> bit & 1)
+                           for value in range(256)])
+        _BYTE_TABLES[key] = tables
+    return _BYTE_TABLES[key]
+
+
+def decode(mask, cells, cache):
+    """Return a list with the coordinates of every cell set in `mask`. """
+    try:
+        return list(cache[mask])
+    except KeyError:
+        out = []
+        remaining = mask
+        while remaining:
+            low = remaining & -remaining
+            out.append(cells[low.bit_length() - 1])
+            remaining ^= low
+        # Only cache the small masks produced by knight moves; the free-cell
+        # masks used for placement moves are rarely repeated
+        if len(out) <= 8:
+            cache[mask] = tuple(out)
+        return out
+
+
+def decode_bytes(mask, tables):
+    """Return a list with the coordinates of every cell set in `mask`, like
+    decode(), looking up the cells of each byte of the mask in `tables` (see
+    byte_tables()); faster than decode() for masks with many cells set.
+    """
+    out = []
+    for table, value in zip(tables, mask.to_bytes(len(tables), "little")):
+        if value:
+            out.extend(table[value])
+    return out
+
+
+class BitBoard(Board):
+    """Drop-in replacement for `isolation.Board` backed by integer bitmasks.
+
+    Unlike `Board`, legal moves are returned in a fixed (cell index) order
+    instead of being shuffled on every call.
+
+    Parameters
+    ----------
+    player_1 : object
+        An object with a get_move() function. This is the only function
+        directly called by the Board class for each player.
+
+    player_2 : object
+        An object with a get_move() function. This is the only function
+        directly called by the Board class for each player.
+
+    width : int (optional)
+        The number of columns that the board should have.
+
+    height : int (optional)
+        The number of rows that the board should have.
+    """
+
+    def __init__(self, player_1, player_2, width=7, height=7):
+        self.width = width
+        self.height = height
+        self.move_count = 0
+        self._player_1 = player_1
+        self._player_2 = player_2
+        self._active_player = player_1
+        self._inactive_player = player_2
+
+        # Blocked cells and the cell index of each player (None until placed)
+        self._blocked = 0
+        self._p1_loc = Board.NOT_MOVED
+        self._p2_loc = Board.NOT_MOVED
+        self._full = (1 << (width * height)) - 1
+        self._masks, self._cells, self._decode = board_tables(width, height)
+        self._byte_tables = byte_tables(width, height)
+        self._undo_stack = []
+        self._zobrist_keys = zobrist_keys(width, height)
+        self._hash = 0
+
+    @property
+    def _board_state(self):
+        """List view of the state in the layout used by `Board`; it is only
+        built on demand for display helpers such as to_string().
+        """
+        blocked = self._blocked
+        state = [(blocked >> idx) & 1 for idx in range(self.width * self.height)]
+        state += [self.move_count & 1, self._p2_loc, self._p1_loc]
+        return state
+
+    def hash(self):
+        return self._hash
+
+    def copy(self):
+        """ Return a deep copy of the current board. """
+        new_board = object.__new__(self.__class__)
+        new_board.__dict__.update(self.__dict__)
+        new_board._undo_stack = []
+        return new_board
+
+    def move_is_legal(self, move):
+        """Test whether a move is legal in the current game state.
+
+        Parameters
+        ----------
+        move : (int, int)
+            A coordinate pair (row, column) indicating the next position for
+            the active player on the board.
+
+        Returns
+        -------
+        bool
+            Returns True if the move is legal, False otherwise
+        """
+        idx = move[0] + move[1] * self.height
+        return (0 <= move[0] < self.height and 0 <= move[1] < self.width and
+                not (self._blocked >> idx) & 1)
+
+    def get_blank_spaces(self):
+        """Return a list of the locations that are still available on the board.
+        """
+        return decode_bytes(self._full & ~self._blocked, self._byte_tables)
+
+    def _location_index(self, player):
+        if player == self._player_1:
+            return self._p1_loc
+        elif player == self._player_2:
+            return self._p2_loc
+        raise RuntimeError(
+            "Invalid player in get_player_location: {}".format(player))
+
+    def get_player_location(self, player):
+        """Find the current location of the specified player on the board.
+
+        Parameters
+        ----------
+        player : object
+            An object registered as a player in the current game.
+
+        Returns
+        -------
+        (int, int) or None
+            The coordinate pair (row, column) of the input player, or None
+            if the player has not moved.
+        """
+        idx = self._location_index(player)
+        if idx is Board.NOT_MOVED:
+            return Board.NOT_MOVED
+        return self._cells[idx]
+
+    def get_legal_moves(self, player=None):
+        """Return the list of all legal moves for the specified player.
+
+        Parameters
+        ----------
+        player : object (optional)
+            An object registered as a player in the current game. If None,
+            return the legal moves for the active player on the board.
+
+        Returns
+        -------
+        list<(int, int)>
+            The list of coordinate pairs (row, column) of all legal moves
+            for the player constrained by the current game state.
+        """
+        if player is None:
+            player = self._active_player
+        idx = self._location_index(player)
+        if idx is Board.NOT_MOVED:
+            return self.get_blank_spaces()
+        return decode(self._masks[idx] & ~self._blocked, self._cells, self._decode)
+
+    def apply_move(self, move):
+        """Move the active player to a specified location.
+
+        Parameters
+        ----------
+        move : (int, int)
+            A coordinate pair (row, column) indicating the next position for
+            the active player on the board.
+        """
+        idx = move[0] + move[1] * self.height
+        keys = self._zobrist_keys
+        if self._active_player == self._player_2:
+            if self._p2_loc is not Board.NOT_MOVED:
+                self._hash ^= keys[2][self._p2_loc]
+            self._hash ^= keys[2][idx]
+            self._p2_loc = idx
+        else:
+            if self._p1_loc is not Board.NOT_MOVED:
+                self._hash ^= keys[1][self._p1_loc]
+            self._hash ^= keys[1][idx]
+            self._p1_loc = idx
+        self._hash ^= keys[0][idx] ^ keys[3]
+        self._blocked |= 1 << idx
+        self._active_player, self._inactive_player = self._inactive_player, self._active_player
+        self.move_count += 1
+
+    def push_move(self, move):
+        """Apply a move in-place like apply_move(), but remember the state it
+        overwrites so that the move can be taken back with pop_move().
+
+        Parameters
+        ----------
+        move : (int, int)
+            A coordinate pair (row, column) indicating the next position for
+            the active player on the board.
+        """
+        self._undo_stack.append((self._blocked, self._p1_loc, self._p2_loc, self._hash))
+        self.apply_move(move)
+
+    def pop_move(self):
+        """Take back the most recent move applied with push_move(). """
+        self._blocked, self._p1_loc, self._p2_loc, self._hash = self._undo_stack.pop()
+        self._active_player, self._inactive_player = self._inactive_player, self._active_player
+        self.move_count -= 1
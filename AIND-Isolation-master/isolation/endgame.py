@@ -0,0 +1,146 @@
+"""
+Exact solver for Isolation endgames in which the players can no longer
+interfere with each other.
+
+Once the cells that each player can still reach (by any sequence of knight
+moves over open cells) no longer overlap, the game reduces to two separate
+puzzles: each player moves along the longest knight path available in its own
+region, and the player whose path runs out first loses. The active player
+wins exactly when its longest path is strictly longer than the opponent's.
+
+The regions are found with a flood fill over the knight-move masks used by
+`BitBoard`, and the longest paths with a memoized depth-first search over
+(cell, open cells) bitmask states, which is exact but only practical for
+small regions.
+"""
+from .bitboard import BitBoard, board_tables
+
+
+def board_masks(game):
+    """Return the open-cell mask of `game` and the cell indices of the active
+    and inactive players (None for a player that has not been placed).
+    """
+    if isinstance(game, BitBoard):
+        free = game._full & ~game._blocked
+        p1, p2 = game._p1_loc, game._p2_loc
+    else:
+        state = game._board_state
+        free = 0
+        for idx in range(game.width * game.height):
+            if not state[idx]:
+                free |= 1 << idx
+        p1, p2 = state[-1], state[-2]
+    if game.move_count & 1:
+        return free, p2, p1
+    return free, p1, p2
+
+
+def reachable(masks, free, loc):
+    """Return the mask of open cells reachable from cell index `loc` by any
+    sequence of knight moves over the cells in `free`.
+    """
+    region = 0
+    frontier = masks[loc] & free
+    while frontier:
+        region |= frontier
+        step = 0
+        while frontier:
+            low = frontier & -frontier
+            step |= masks[low.bit_length() - 1]
+            frontier ^= low
+        frontier = step & free & ~region
+    return region
+
+
+def partition(game):
+    """Return the regions reachable by the active and inactive players of
+    `game` if they are disjoint, or None while the players can still meet.
+    """
+    free, active, inactive = board_masks(game)
+    if active is None or inactive is None:
+        return None
+    masks = board_tables(game.width, game.height)[0]
+    own = reachable(masks, free, active)
+    other = reachable(masks, free, inactive)
+    if own & other:
+        return None
+    return own, other
+
+
+def longest_path(masks, free, loc, memo):
+    """Return the number of moves in the longest knight path starting from
+    cell index `loc` and visiting only cells in `free`, where `memo` caches
+    the results for (loc, free) pairs.
+    """
+    key = (loc, free)
+    if key in memo:
+        return memo[key]
+
+    children = []
+    moves = masks[loc] & free
+    while moves:
+        low = moves & -moves
+        children.append(low.bit_length() - 1)
+        moves ^= low
+    # Try the cells with the fewest onward moves first (Warnsdorff's rule),
+    # which tends to find a path covering every cell early
+    children.sort(key=lambda idx: (masks[idx] & free).bit_count())
+
+    bound = free.bit_count()
+    best = 0
+    for idx in children:
+        length = 1 + longest_path(masks, free & ~(1 << idx), idx, memo)
+        if length > best:
+            best = length
+            if best == bound:
+                break
+    memo[key] = best
+    return best
+
+
+def solve_partition(game, player, memo=None):
+    """Solve `game` exactly if the players' regions are disjoint.
+
+    Parameters
+    ----------
+    game : `isolation.Board`
+        The position to solve.
+
+    player : object
+        The player whose point of view sets the sign of the value.
+
+    memo : dict (optional)
+        A cache of longest path lengths that may be shared between calls for
+        boards of the same size.
+
+    Returns
+    -------
+    (float, (int, int)) or None
+        The value of the game to `player` (inf for a win, -inf for a loss)
+        and the first move of the active player's longest path, or (-1, -1)
+        if it has no legal moves; None if the players' regions still touch.
+    """
+    regions = partition(game)
+    if regions is None:
+        return None
+    if memo is None:
+        memo = {}
+    own, other = regions
+    free, active, inactive = board_masks(game)
+    masks, cells, _ = board_tables(game.width, game.height)
+
+    best_move, own_length = (-1, -1), 0
+    moves = masks[active] & free
+    while moves:
+        low = moves & -moves
+        idx = low.bit_length() - 1
+        length = 1 + longest_path(masks, own & ~low, idx, memo)
+        if length > own_length:
+            best_move, own_length = cells[idx], length
+        moves ^= low
+    other_length = longest_path(masks, other, inactive, memo)
+
+    active_wins = own_length > other_length
+    if active_wins == (game.active_player == player):
+        return float("inf"), best_move
+    return float("-inf"), best_move
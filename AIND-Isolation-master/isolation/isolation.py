@@ -8,11 +8,65 @@ remain compatible with the defaults provided, and none of your changes will
 be available to project reviewers.
 """
 import random
+import threading
 import timeit
 from copy import copy
 
 TIME_LIMIT_MILLIS = 150
 
+# Zobrist keys for each board size, built the first time a board is made
+_ZOBRIST_KEYS = {}
+
+# Cell coordinates and knight moves for each board size, see knight_tables()
+_KNIGHT_TABLES = {}
+
+_KNIGHT_DIRECTIONS = [(-2, -1), (-2, 1), (-1, -2), (-1, 2),
+                      (1, -2), (1, 2), (2, -1), (2, 1)]
+
+
+def zobrist_keys(width, height):
+    """Return the random 64-bit keys used to hash boards of the given size.
+
+    The keys are drawn from a generator seeded with the board size so that
+    every process computes the same hash for the same position.
+
+    Returns
+    -------
+    (list<int>, list<int>, list<int>, int)
+        The keys for a blocked cell, for player 1 and for player 2 standing
+        on each cell index, and the key toggled on every change of initiative.
+    """
+    if (width, height) not in _ZOBRIST_KEYS:
+        rng = random.Random("zobrist-{}x{}".format(width, height))
+        cells = width * height
+        _ZOBRIST_KEYS[width, height] = (
+            [rng.getrandbits(64) for _ in range(cells)],
+            [rng.getrandbits(64) for _ in range(cells)],
+            [rng.getrandbits(64) for _ in range(cells)],
+            rng.getrandbits(64))
+    return _ZOBRIST_KEYS[width, height]
+
+
+def knight_tables(width, height):
+    """Return the lookup tables used by `Board` to generate moves on boards
+    of the given size.
+
+    Returns
+    -------
+    (list<(int, int)>, list<list<((int, int), int)>>)
+        The (row, column) coordinate of every cell index, and for every cell
+        index the (coordinate, cell index) pairs of the cells a knight move
+        away that are on the board.
+    """
+    if (width, height) not in _KNIGHT_TABLES:
+        cells = [(i, j) for j in range(width) for i in range(height)]
+        moves = [[((r + dr, c + dc), r + dr + (c + dc) * height)
+                  for dr, dc in _KNIGHT_DIRECTIONS
+                  if 0 <= r + dr < height and 0 <= c + dc < width]
+                 for r, c in cells]
+        _KNIGHT_TABLES[width, height] = (cells, moves)
+    return _KNIGHT_TABLES[width, height]
+
 
 class Board(object):
     """Implement a model for the game Isolation assuming each player moves like
@@ -52,8 +106,19 @@ class Board(object):
         self._board_state[-1] = Board.NOT_MOVED
         self._board_state[-2] = Board.NOT_MOVED
 
+        # Moves applied with push_move() that can be taken back by pop_move()
+        self._undo_stack = []
+
+        # Zobrist hash of the state, updated incrementally by apply_move()
+        self._zobrist_keys = zobrist_keys(width, height)
+        self._hash = 0
+
+        # Shared per-size tables, so that generating moves does not depend
+        # on the size of the board
+        self._cells, self._knight_moves = knight_tables(width, height)
+
     def hash(self):
-        return str(self._board_state).__hash__()
+        return self._hash
 
     @property
     def active_player(self):
@@ -97,6 +162,7 @@ class Board(object):
         new_board._active_player = self._active_player
         new_board._inactive_player = self._inactive_player
         new_board._board_state = copy(self._board_state)
+        new_board._hash = self._hash
         return new_board
 
     def forecast_move(self, move):
@@ -139,8 +205,9 @@ class Board(object):
     def get_blank_spaces(self):
         """Return a list of the locations that are still available on the board.
         """
-        return [(i, j) for j in range(self.width) for i in range(self.height)
-                if self._board_state[i + j * self.height] == Board.BLANK]
+        # zip() stops at the last cell, before the player locations
+        return [cell for cell, state in zip(self._cells, self._board_state)
+                if state == Board.BLANK]
 
     def get_player_location(self, player):
         """Find the current location of the specified player on the board.
@@ -201,12 +268,47 @@ class Board(object):
         """
         idx = move[0] + move[1] * self.height
         last_move_idx = int(self.active_player == self._player_2) + 1
+        # Keys at index 1 and 2 belong to player 1 and player 2, matching the
+        # slot holding each player's last move at the end of the board state
+        blocked_keys, player_keys = self._zobrist_keys[0], self._zobrist_keys[last_move_idx]
+        last_idx = self._board_state[-last_move_idx]
+        if last_idx is not Board.NOT_MOVED:
+            self._hash ^= player_keys[last_idx]
+        self._hash ^= player_keys[idx] ^ blocked_keys[idx] ^ self._zobrist_keys[3]
         self._board_state[-last_move_idx] = idx
         self._board_state[idx] = 1
         self._board_state[-3] ^= 1
         self._active_player, self._inactive_player = self._inactive_player, self._active_player
         self.move_count += 1
 
+    def push_move(self, move):
+        """Apply a move in-place like apply_move(), but remember the state it
+        overwrites so that the move can be taken back with pop_move(). Search
+        agents can use the pair to walk the game tree on a single board
+        instead of allocating a copy for every node with forecast_move().
+
+        Parameters
+        ----------
+        move : (int, int)
+            A coordinate pair (row, column) indicating the next position for
+            the active player on the board.
+        """
+        idx = move[0] + move[1] * self.height
+        last_move_idx = int(self.active_player == self._player_2) + 1
+        self._undo_stack.append((idx, self._board_state[idx],
+                                 self._board_state[-last_move_idx], self._hash))
+        self.apply_move(move)
+
+    def pop_move(self):
+        """Take back the most recent move applied with push_move(). """
+        idx, cell_state, last_move, self._hash = self._undo_stack.pop()
+        self._active_player, self._inactive_player = self._inactive_player, self._active_player
+        last_move_idx = int(self.active_player == self._player_2) + 1
+        self._board_state[-last_move_idx] = last_move
+        self._board_state[idx] = cell_state
+        self._board_state[-3] ^= 1
+        self.move_count -= 1
+
     def is_winner(self, player):
         """ Test whether the specified player has won the game. """
         return player == self._inactive_player and not self.get_legal_moves(self._active_player)
@@ -254,11 +356,9 @@ class Board(object):
         if loc == Board.NOT_MOVED:
             return self.get_blank_spaces()
 
-        r, c = loc
-        directions = [(-2, -1), (-2, 1), (-1, -2), (-1, 2),
-                      (1, -2), (1, 2), (2, -1), (2, 1)]
-        valid_moves = [(r + dr, c + dc) for dr, dc in directions
-                       if self.move_is_legal((r + dr, c + dc))]
+        state = self._board_state
+        valid_moves = [move for move, idx in self._knight_moves[loc[0] + loc[1] * self.height]
+                       if state[idx] == Board.BLANK]
         random.shuffle(valid_moves)
         return valid_moves
 
@@ -271,29 +371,31 @@ class Board(object):
         the location of each player and indicating which cells have been
         blocked, and which remain open.
         """
-        p1_loc = self._board_state[-1]
-        p2_loc = self._board_state[-2]
+        # Read the state once: BitBoard builds it on every access
+        state = self._board_state
+        p1_loc = state[-1]
+        p2_loc = state[-2]
 
         col_margin = len(str(self.height - 1)) + 1
         prefix = "{:<" + "{}".format(col_margin) + "}"
         offset = " " * (col_margin + 3)
-        out = offset + '   '.join(map(str, range(self.width))) + '\n\r'
+        out = [offset + '   '.join(map(str, range(self.width))) + '\n\r']
         for i in range(self.height):
-            out += prefix.format(i) + ' | '
+            out.append(prefix.format(i) + ' | ')
             for j in range(self.width):
                 idx = i + j * self.height
-                if not self._board_state[idx]:
-                    out += ' '
+                if not state[idx]:
+                    out.append(' ')
                 elif p1_loc == idx:
-                    out += symbols[0]
+                    out.append(symbols[0])
                 elif p2_loc == idx:
-                    out += symbols[1]
+                    out.append(symbols[1])
                 else:
-                    out += '-'
-                out += ' | '
-            out += '\n\r'
+                    out.append('-')
+                out.append(' | ')
+            out.append('\n\r')
 
-        return out
+        return ''.join(out)
 
     def board_matrix(self, symbols=[3, 4]):
         """
@@ -301,14 +403,15 @@ class Board(object):
         :param symbols:
         :return:
         """
-        p1_loc = self._board_state[-1]
-        p2_loc = self._board_state[-2]
+        state = self._board_state
+        p1_loc = state[-1]
+        p2_loc = state[-2]
         import numpy as np
         out = np.zeros((self.height, self.width))
         for i in range(self.height):
             for j in range(self.width):
                 idx = i + j * self.height
-                if not self._board_state[idx]:
+                if not state[idx]:
                     out[i, j] = 0
                 elif p1_loc == idx:
                     out[i, j] = symbols[0]
@@ -323,7 +426,8 @@ class Board(object):
         #
         return out.astype(int)
 
-    def play(self, time_limit=TIME_LIMIT_MILLIS):
+    def play(self, time_limit=TIME_LIMIT_MILLIS, timer=None, ponder=False,
+             telemetry=None):
         """Execute a match between the players by alternately soliciting them
         to select a move and applying it in the game.
 
@@ -333,6 +437,35 @@ class Board(object):
             The maximum number of milliseconds to allow before timeout
             during each turn.
 
+        timer : callable (optional)
+            A function returning the current time in seconds used to measure
+            each turn. Pass a CPU-time clock such as `time.process_time` to
+            keep the time limit fair when many games share the processor.
+            Defaults to `timeit.default_timer`, which measures wall-clock
+            time. CPU-time clocks only charge the calling process (or thread):
+            they do not charge the time of the helper processes of agents
+            that search with several processes (see `lazy_smp`).
+
+        ponder : bool (optional)
+            Let the waiting player think on its opponent's time. Players that
+            define a `ponder(game, stop)` method have it called in a
+            background thread with a copy of the game while the active player
+            selects its move; `stop` is a `threading.Event` that is set (and
+            the thread joined) as soon as the active player returns. Turns are
+            still timed with wall-clock time by default, so the active player
+            is charged for the time the pondering thread holds the GIL.
+            Passing `timer=time.thread_time` charges only the searching
+            thread's own CPU time instead, but then a turn can last much
+            longer than the time limit on the wall clock, and agents that
+            search in other processes are not charged for them at all.
+
+        telemetry : callable (optional)
+            A function called with a dict describing every move ("event":
+            "move") and the end of the game ("event": "end"). Move records
+            give the seat of the player (1 or 2), the move, the number of
+            legal moves and the time taken, and include the `search_stats`
+            dict of the player if it keeps one (see `AlphaBetaPlayer`).
+
         Returns
         ----------
         (player, list<[(int, int),]>, str)
@@ -342,28 +475,57 @@ class Board(object):
         """
         move_history = []
 
-        time_millis = lambda: 1000 * timeit.default_timer()
+        if timer is None:
+            timer = timeit.default_timer
+        time_millis = lambda: 1000 * timer()
 
         while True:
 
             legal_player_moves = self.get_legal_moves()
             game_copy = self.copy()
 
+            ponder_thread = None
+            if ponder and hasattr(self._inactive_player, "ponder"):
+                stop_pondering = threading.Event()
+                ponder_thread = threading.Thread(target=self._inactive_player.ponder,
+                                                 args=(self.copy(), stop_pondering))
+                ponder_thread.start()
+
             move_start = time_millis()
             time_left = lambda : time_limit - (time_millis() - move_start)
             curr_move = self._active_player.get_move(game_copy, time_left)
             move_end = time_left()
 
+            if ponder_thread is not None:
+                stop_pondering.set()
+                ponder_thread.join()
+
             if curr_move is None:
                 curr_move = Board.NOT_MOVED
 
-            if move_end < 0:
-                return self._inactive_player, move_history, "timeout"
+            seat = 1 if self._active_player == self._player_1 else 2
+            if telemetry is not None:
+                record = {"event": "move", "move_count": self.move_count,
+                          "player": seat, "move": curr_move,
+                          "legal_moves": len(legal_player_moves),
+                          "time_ms": time_limit - move_end}
+                record.update(getattr(self._active_player, "search_stats", None) or {})
+                telemetry(record)
 
-            if curr_move not in legal_player_moves:
+            termination = None
+            if move_end < 0:
+                termination = "timeout"
+            elif curr_move not in legal_player_moves:
                 if len(legal_player_moves) > 0:
-                    return self._inactive_player, move_history, "forfeit"
-                return self._inactive_player, move_history, "illegal move"
+                    termination = "forfeit"
+                else:
+                    termination = "illegal move"
+
+            if termination is not None:
+                if telemetry is not None:
+                    telemetry({"event": "end", "move_count": self.move_count,
+                               "winner": 3 - seat, "termination": termination})
+                return self._inactive_player, move_history, termination
 
             move_history.append(list(curr_move))
 
@@ -0,0 +1,188 @@
+"""
+Symmetry-canonical keys for Isolation positions.
+
+Knight moves are preserved by the reflections and rotations of the board
+(four on a rectangular board, eight on a square board), so the positions in
+a symmetry class have the same value and their best moves map onto each
+other. A cache keyed by the canonical key of a position, the smallest
+Zobrist hash among its symmetric variants, stores every class once.
+
+The symmetries are permutations of the cell indices (idx = row + column *
+height). The 64-bit Zobrist keys that every symmetry assigns to a cell are
+packed side by side into a single integer, so that one XOR hashes all the
+symmetric variants at once, and the packed keys of the blocked cells are
+combined in advance for every value of every byte of the blocked-cell
+bitmask: hashing all the variants takes one table lookup per 8 cells.
+
+Symmetries also shrink the opening of the game, where the player to move
+can be placed on any open cell: on an empty square board only about one in
+eight placements leads to a position that is not symmetric to another one.
+"""
+from .bitboard import BitBoard, board_tables
+from .isolation import zobrist_keys
+
+# Per-size symmetry tables, built the first time they are needed
+_SYMMETRIES = {}
+_INVERSES = {}
+_TABLES = {}
+_PLACEMENTS = {}
+
+_KEY_MASK = (1 << 64) - 1
+
+
+def symmetries(width, height):
+    """Return the permutations of cell indices (idx = row + column * height)
+    that map a board of the given size onto itself while preserving knight
+    moves: the four reflections and rotations of a rectangle, plus the four
+    transpositions when the board is square. The identity comes first.
+    """
+    if (width, height) not in _SYMMETRIES:
+        h, w = height - 1, width - 1
+        maps = [lambda r, c: (r, c), lambda r, c: (h - r, c),
+                lambda r, c: (r, w - c), lambda r, c: (h - r, w - c)]
+        if width == height:
+            maps += [lambda r, c: (c, r), lambda r, c: (w - c, r),
+                     lambda r, c: (c, h - r), lambda r, c: (w - c, h - r)]
+        cells = [(r, c) for c in range(width) for r in range(height)]
+        _SYMMETRIES[width, height] = [
+            [r + c * height for r, c in (f(*cell) for cell in cells)] for f in maps]
+    return _SYMMETRIES[width, height]
+
+
+def inverse_permutations(width, height):
+    """Return the inverse of every permutation of symmetries(). """
+    if (width, height) not in _INVERSES:
+        inverses = []
+        for perm in symmetries(width, height):
+            inverse = [0] * len(perm)
+            for idx, target in enumerate(perm):
+                inverse[target] = idx
+            inverses.append(inverse)
+        _INVERSES[width, height] = inverses
+    return _INVERSES[width, height]
+
+
+def _pack(keys):
+    """Pack a list of 64-bit keys into a single integer. """
+    packed = 0
+    for t, key in enumerate(keys):
+        packed |= key << (64 * t)
+    return packed
+
+
+def _tables(width, height):
+    """Return the packed hashing tables of a board size: the combined keys
+    of the blocked cells for each value of each byte of the blocked bitmask,
+    the keys of player 1 and of player 2 on each cell and the side key, with
+    the keys of symmetry t in bits 64 * t to 64 * t + 63.
+    """
+    if (width, height) not in _TABLES:
+        blocked_keys, p1_keys, p2_keys, side_key = zobrist_keys(width, height)
+        perms = symmetries(width, height)
+        cells = width * height
+        blocked = [_pack([blocked_keys[perm[idx]] for perm in perms]) for idx in range(cells)]
+        chunks = []
+        for base in range(0, cells, 8):
+            chunk = [0] * 256
+            for value in range(1, 256):
+                low = value & -value
+                bit = base + low.bit_length() - 1
+                chunk[value] = chunk[value ^ low] ^ (blocked[bit] if bit < cells else 0)
+            chunks.append(chunk)
+        _TABLES[width, height] = (
+            chunks,
+            [_pack([p1_keys[perm[idx]] for perm in perms]) for idx in range(cells)],
+            [_pack([p2_keys[perm[idx]] for perm in perms]) for idx in range(cells)],
+            _pack([side_key] * len(perms)))
+    return _TABLES[width, height]
+
+
+def canonical_key(game):
+    """Return the canonical key of the position in `game` together with the
+    index in symmetries() of the permutation that maps the position to its
+    canonical variant.
+
+    The key of the position in `game` is `game.hash()`; the canonical key is
+    the smallest of the Zobrist hashes of its symmetric variants.
+    """
+    chunks, p1_keys, p2_keys, side_key = _tables(game.width, game.height)
+    if isinstance(game, BitBoard):
+        blocked = game._blocked
+        p1, p2 = game._p1_loc, game._p2_loc
+    else:
+        state = game._board_state
+        blocked = 0
+        for idx in range(game.width * game.height):
+            if state[idx]:
+                blocked |= 1 << idx
+        p1, p2 = state[-1], state[-2]
+
+    packed = side_key if game.move_count & 1 else 0
+    for table in chunks:
+        if not blocked:
+            break
+        packed ^= table[blocked & 255]
+        blocked >>= 8
+    if p1 is not None:
+        packed ^= p1_keys[p1]
+    if p2 is not None:
+        packed ^= p2_keys[p2]
+
+    best, best_index = packed & _KEY_MASK, 0
+    for t in range(1, len(symmetries(game.width, game.height))):
+        packed >>= 64
+        key = packed & _KEY_MASK
+        if key < best:
+            best, best_index = key, t
+    return best, best_index
+
+
+def transform_move(move, t, width, height):
+    """Return the image of `move` under permutation `t` of symmetries(). """
+    if move is None or move == (-1, -1):
+        return move
+    cells = board_tables(width, height)[1]
+    return cells[symmetries(width, height)[t][move[0] + move[1] * height]]
+
+
+def restore_move(move, t, width, height):
+    """Return the move that permutation `t` of symmetries() maps to `move`;
+    the inverse of transform_move().
+    """
+    if move is None or move == (-1, -1):
+        return move
+    cells = board_tables(width, height)[1]
+    return cells[inverse_permutations(width, height)[t][move[0] + move[1] * height]]
+
+
+def distinct_placements(game, moves):
+    """Return the moves of `moves` that lead to distinct positions up to
+    symmetry, keeping one move from every class of moves that the
+    symmetries of the position in `game` map onto each other.
+
+    Only placement moves (the first move of each player) are reduced, since
+    later positions are rarely symmetric: `moves` is returned unchanged
+    once both players have been placed.
+    """
+    if game.move_count > 1:
+        return moves
+    width, height = game.width, game.height
+    placed = game.get_player_location(game.inactive_player)
+    key = (width, height, placed)
+    if key not in _PLACEMENTS:
+        perms = symmetries(width, height)
+        if placed is not None:
+            # The symmetries of the position are the ones that fix the only
+            # blocked cell, where the inactive player stands
+            idx = placed[0] + placed[1] * height
+            perms = [perm for perm in perms if perm[idx] == idx]
+        cells = board_tables(width, height)[1]
+        seen = set()
+        representatives = set()
+        for idx in range(width * height):
+            if idx not in seen:
+                representatives.add(cells[idx])
+                seen.update(perm[idx] for perm in perms)
+        _PLACEMENTS[key] = representatives
+    representatives = _PLACEMENTS[key]
+    return [move for move in moves if move in representatives]
@@ -0,0 +1,157 @@
+"""Parallel alpha-beta search with "Lazy SMP".
+
+`LazySMPPlayer` runs the iterative deepening search of `AlphaBetaPlayer` in
+the main process and, at the same time, in a number of helper processes that
+search the same root. The processes do not exchange moves or split the tree:
+they only share a transposition table in shared memory, so that every
+process finds the entries left by the others and skips the subtrees they have
+already searched. The helpers are made to diverge from the main search by
+starting odd helpers one ply deeper and by breaking move ordering ties
+differently, which spreads them over different parts of the tree.
+
+The helpers report every iteration they complete, and the player returns the
+best move of the deepest iteration completed by any process.
+"""
+import copy
+import multiprocessing
+import queue
+
+from game_agent import AlphaBetaPlayer, SearchTimeout
+from transposition import SharedTranspositionTable
+
+# Stand-ins for the players in the copies of the board sent to the helpers
+_SELF = "LazySMPPlayer"
+_OPPONENT = "Opponent"
+
+
+def replace_player(game, old, new):
+    """Make `new` take the seat of `old` in `game`. """
+    for attr in ("_player_1", "_player_2", "_active_player", "_inactive_player"):
+        if getattr(game, attr) == old:
+            setattr(game, attr, new)
+
+
+def _helper(index, player, table, search_id, jobs, results):
+    """Run the searches of a helper process until it receives None. """
+    player.tt = SharedTranspositionTable(*table)
+    if player.ordering is not None and index % 2:
+        player.ordering.use_mobility = not player.ordering.use_mobility
+
+    for job in iter(jobs.get, None):
+        job_id, game, generation = job
+        replace_player(game, _SELF, player)
+        # The search stops as soon as the main process starts a new search
+        player.time_left = lambda: float("inf") if search_id.value == job_id else float("-inf")
+        player.start_search(game)
+        player.tt.generation = generation
+        value = None
+        try:
+            for depth in range(1 + index % 2, len(game.get_blank_spaces()) + 1):
+                move, value = player.aspiration_search(game, depth, value)
+                player._pv_move = move
+                results.put((job_id, depth, move))
+        except SearchTimeout:
+            pass
+    player.tt.close()
+
+
+class LazySMPPlayer(AlphaBetaPlayer):
+    """`AlphaBetaPlayer` that searches with `workers` processes sharing a
+    transposition table of `tt_size` buckets. The remaining keyword arguments
+    configure the search as for `AlphaBetaPlayer`.
+
+    The helper processes are started by the first call to get_move() and run
+    until close() is called or the main process exits.
+
+    Parameters
+    ----------
+    workers : int (optional)
+        The total number of searching processes, including the main process.
+
+    tt_size : int (optional)
+        The number of buckets in the shared transposition table.
+    """
+
+    def __init__(self, workers=2, tt_size=2 ** 16, **kwargs):
+        super().__init__(**kwargs)
+        self.workers = workers
+        self.tt_size = tt_size
+        self._helpers = []
+        # None until start_helpers() has created the shared table
+        self._jobs = None
+
+    def __getstate__(self):
+        # Copies of the player start their own helpers
+        state = self.__dict__.copy()
+        state.update(tt=None, _helpers=[], _jobs=None, _results=None, _search_id=None)
+        return state
+
+    def start_helpers(self):
+        """Create the shared transposition table and start the helpers. """
+        ctx = multiprocessing.get_context()
+        self.tt = SharedTranspositionTable(self.tt_size)
+        self._search_id = ctx.RawValue("i", 0)
+        self._results = ctx.Queue()
+        self._jobs = []
+        helper = copy.copy(self)
+        helper.__dict__.update(self.__getstate__())
+        for index in range(1, self.workers):
+            jobs = ctx.SimpleQueue()
+            process = ctx.Process(target=_helper, daemon=True, args=(
+                index, copy.deepcopy(helper), (self.tt.size, self.tt.name),
+                self._search_id, jobs, self._results))
+            process.start()
+            self._jobs.append(jobs)
+            self._helpers.append(process)
+
+    def close(self):
+        """Stop the helpers and release the shared transposition table. """
+        if self._jobs is None:
+            return
+        self._search_id.value += 1
+        for jobs in self._jobs:
+            jobs.put(None)
+        for process in self._helpers:
+            process.join()
+        self._helpers = []
+        self._jobs = None
+        self.tt.close()
+        self.tt = None
+
+    def get_move(self, game, time_left):
+        """Search for the best move with every process and return the best
+        move of the deepest iteration completed by any of them; see
+        `AlphaBetaPlayer.get_move()`.
+        """
+        legal_moves = game.get_legal_moves()
+        if not legal_moves:
+            return (-1, -1)
+        if self._jobs is None:
+            self.start_helpers()
+
+        job_id = self._search_id.value
+        board = game.copy()
+        replace_player(board, game.get_opponent(self), _OPPONENT)
+        replace_player(board, self, _SELF)
+        # The main search starts the next table generation in start_search()
+        for jobs in self._jobs:
+            jobs.put((job_id, board, self.tt.generation + 1))
+
+        searches = len(self.completed_depths)
+        move = super().get_move(game, time_left)
+        self._search_id.value += 1
+        if len(self.completed_depths) == searches:
+            # The move came from the opening book or the endgame solver
+            return move
+
+        depth = self.completed_depths[-1]
+        while True:
+            try:
+                job, helper_depth, helper_move = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if job == job_id and helper_depth > depth and helper_move in legal_moves:
+                depth, move = helper_depth, helper_move
+        self.completed_depths[-1] = depth
+        self.search_stats["depth"] = depth
+        return move
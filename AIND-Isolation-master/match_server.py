@@ -0,0 +1,382 @@
+"""Play many Isolation games concurrently on a pool of worker processes.
+
+`Board.play()` drives one game at a time, so a tournament pays the overhead
+of the interpreter, and of sending work to another process, once per game
+and move. `MatchServer` instead runs every game as an asyncio coroutine on a
+single event loop, and the agents choose their moves with a coroutine:
+
+    move, time_left = await agent.get_move(game, time_limit)
+
+where `time_left` is the number of milliseconds left in the turn when the
+move was returned (a negative value loses the game on time, as in
+`Board.play()`). `PooledAgent` gives the synchronous players of this project
+that interface: its searches are queued in a `MoveBatcher`, which gathers
+the requests of every game waiting for a move and sends them to the worker
+processes in batches, one task per batch instead of one per move.
+
+Every search runs in a worker with its own `time_left()` clock, measured in
+CPU time from the moment the search starts, so the time a request spends
+queued or waiting for the rest of its batch is not charged to the agent.
+
+Play a tournament-like series of matches from the command line with
+
+    python match_server.py --matches 50 --workers 4 --concurrency 256
+"""
+import argparse
+import asyncio
+import contextlib
+import random
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from isolation import Board
+from game_agent import AlphaBetaPlayer, MinimaxPlayer, custom_score
+from game_records import RecordWriter
+from lazy_smp import replace_player
+from sample_players import RandomPlayer, improved_score, open_move_score
+from tournament import TIME_LIMIT, Agent, random_opening
+
+# Stand-ins for the players in the boards of the server
+SEATS = ("Player1", "Player2")
+
+GameResult = namedtuple("GameResult", ["first", "second", "winner", "moves", "termination"])
+GameResult.__doc__ = """A game played by the server: the indices of the agents
+in the first and second seats, the seat of the winner (1 or 2), every move of
+the game including the opening, and the reason for the loss."""
+
+# Agents of a worker process, set by _init_worker()
+_worker_agents = []
+
+
+def _init_worker(agents):
+    """Initialize a worker process with its own copy of the agents. """
+    _worker_agents[:] = agents
+
+
+def search_batch(requests, agents=None):
+    """Select a move for every request of a batch.
+
+    Parameters
+    ----------
+    requests : list<(int, int, Board, float, int)>
+        For every search, the index of the agent, its seat (1 or 2), a board
+        with the stand-ins of `SEATS` as players, the time limit of the turn
+        in milliseconds and a seed for the global random generator.
+
+    agents : list<Agent> (optional)
+        The agents to search with; defaults to the agents of the worker.
+
+    Returns
+    -------
+    list<((int, int), float, dict)>
+        The move, the milliseconds left when it was returned and the
+        `search_stats` of the player (None if it keeps none) for every request.
+    """
+    agents = _worker_agents if agents is None else agents
+    results = []
+    for agent_idx, seat, game, time_limit, seed in requests:
+        player = agents[agent_idx].player
+        replace_player(game, SEATS[seat - 1], player)
+        random.seed(seed)
+        start = time.process_time()
+        time_left = lambda: time_limit - 1000 * (time.process_time() - start)
+        move = player.get_move(game, time_left)
+        results.append((move, time_left(), getattr(player, "search_stats", None)))
+    return results
+
+
+class MoveBatcher:
+    """Queue the searches of the games waiting for a move and run them in
+    batches, on a pool of `workers` processes or, with no workers, in the
+    process of the event loop (which is only useful for tests and to measure
+    the overhead of the server).
+
+    Each worker runs one batch at a time: the requests queued while every
+    worker is busy are sent together, in batches of at most `batch_size`
+    searches spread over the workers that become free.
+
+    Parameters
+    ----------
+    agents : list<Agent>
+        The agents that can be asked for a move, by index.
+
+    workers : int (optional)
+        The number of worker processes; 0 searches in the current process.
+
+    batch_size : int (optional)
+        The maximum number of searches sent to a worker in one task.
+    """
+
+    def __init__(self, agents, workers=0, batch_size=16, seed=None):
+        self.agents = agents
+        self.workers = workers
+        self.batch_size = batch_size
+        self.executor = None
+        if workers > 0:
+            self.executor = ProcessPoolExecutor(workers, initializer=_init_worker,
+                                                initargs=(agents,))
+        self._rng = random.Random(seed)
+        self._pending = []
+        self._flush_scheduled = False
+        self._in_flight = 0
+        self.searches = 0
+        self.batches = 0
+
+    def close(self):
+        """Shut down the worker processes. """
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    async def search(self, agent_idx, game, time_limit):
+        """Return the move of agent `agent_idx` in `game`, the active seat of
+        which it takes, and the milliseconds left when the move was returned.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        seat = 1 if game.active_player == SEATS[0] else 2
+        self._pending.append(((agent_idx, seat, game, time_limit, self._rng.getrandbits(32)),
+                              future))
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            loop.call_soon(self._flush)
+        move, time_left, _ = await future
+        return move, time_left
+
+    def _flush(self):
+        """Send the pending requests to the free workers. """
+        self._flush_scheduled = False
+        if self.executor is None:
+            pending, self._pending = self._pending, []
+            for start in range(0, len(pending), self.batch_size):
+                self._run(pending[start:start + self.batch_size])
+            return
+        # While every worker is busy the requests pile up into larger batches
+        while self._pending and self._in_flight < self.workers:
+            free = self.workers - self._in_flight
+            size = min(self.batch_size, -(-len(self._pending) // free))
+            batch, self._pending = self._pending[:size], self._pending[size:]
+            self._run(batch)
+
+    def _run(self, batch):
+        """Run a batch of (request, future) pairs. """
+        requests = [request for request, _ in batch]
+        futures = [future for _, future in batch]
+        self.searches += len(batch)
+        self.batches += 1
+        if self.executor is None:
+            self._deliver(futures, search_batch, requests, self.agents)
+            return
+        self._in_flight += 1
+        task = asyncio.wrap_future(self.executor.submit(search_batch, requests))
+        task.add_done_callback(lambda task: self._resolve(futures, task))
+
+    def _deliver(self, futures, fn, *args):
+        """Call fn(*args) and resolve `futures` with the results. """
+        try:
+            results = fn(*args)
+        except Exception as e:
+            for future in futures:
+                future.set_exception(e)
+            return
+        for future, result in zip(futures, results):
+            future.set_result(result)
+
+    def _resolve(self, futures, task):
+        """Resolve `futures` with the results of a finished worker task and
+        hand the requests queued meanwhile to the worker.
+        """
+        self._in_flight -= 1
+        self._deliver(futures, task.result)
+        self._flush()
+
+
+class PooledAgent:
+    """Coroutine interface to agent `index` of a `MoveBatcher`. """
+
+    def __init__(self, batcher, index):
+        self.batcher = batcher
+        self.index = index
+
+    async def get_move(self, game, time_limit):
+        """Return the move of the agent in `game` and the milliseconds left
+        in the turn when it was returned.
+        """
+        return await self.batcher.search(self.index, game, time_limit)
+
+
+async def play_game(agent_1, agent_2, opening=(), time_limit=TIME_LIMIT, width=7, height=7):
+    """Play a game between two agents with a coroutine get_move() by the
+    rules of `Board.play()`, starting from the moves of `opening`.
+
+    Returns
+    -------
+    (int, list<(int, int)>, str)
+        The seat of the winner (1 or 2), every move of the game including
+        the opening, and the reason for the loss.
+    """
+    game = Board(*SEATS, width=width, height=height)
+    moves = list(opening)
+    for move in moves:
+        game.apply_move(move)
+    agents = (agent_1, agent_2)
+    while True:
+        seat = 1 + game.move_count % 2
+        move, time_left = await agents[seat - 1].get_move(game.copy(), time_limit)
+        if move is None:
+            move = Board.NOT_MOVED
+        move = tuple(move)
+        if time_left < 0:
+            return 3 - seat, moves, "timeout"
+        legal_moves = game.get_legal_moves()
+        if move not in legal_moves:
+            return 3 - seat, moves, "forfeit" if legal_moves else "illegal move"
+        moves.append(move)
+        game.apply_move(move)
+
+
+class MatchServer:
+    """Play games between the agents of this project concurrently.
+
+    Parameters
+    ----------
+    agents : list<Agent>
+        The agents, referred to by index in the pairings of run().
+
+    workers : int (optional)
+        The number of worker processes searching the moves; 0 searches in
+        the process of the server.
+
+    concurrency : int (optional)
+        The maximum number of games in progress at a time.
+
+    batch_size : int (optional)
+        The maximum number of searches sent to a worker in one task.
+
+    time_limit : float (optional)
+        The time limit of every turn in milliseconds.
+
+    seed : int or None (optional)
+        Seed of the random generators of the searches.
+    """
+
+    def __init__(self, agents, workers=0, concurrency=256, batch_size=16,
+                 time_limit=TIME_LIMIT, seed=None):
+        self.agents = agents
+        self.concurrency = concurrency
+        self.time_limit = time_limit
+        self.batcher = MoveBatcher(agents, workers, batch_size, seed)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.batcher.close()
+
+    def run(self, pairings, on_result=None):
+        """Play a game for every (first agent, second agent, opening) of
+        `pairings` and return the results in the same order, with statistics
+        over the run: the number of games and moves, the elapsed time, the
+        games per second and the number of searches per batch.
+
+        `on_result` is called with every `GameResult` as soon as the game
+        ends.
+        """
+        start = time.perf_counter()
+        searches, batches = self.batcher.searches, self.batcher.batches
+        results = asyncio.run(self._play_all(pairings, on_result))
+        elapsed = time.perf_counter() - start
+        searches = self.batcher.searches - searches
+        batches = self.batcher.batches - batches
+        stats = {"games": len(results), "moves": sum(len(r.moves) for r in results),
+                 "seconds": elapsed,
+                 "games_per_second": len(results) / elapsed if elapsed else 0.,
+                 "searches": searches, "batches": batches,
+                 "average_batch": searches / batches if batches else 0.}
+        return results, stats
+
+    async def _play_all(self, pairings, on_result):
+        semaphore = asyncio.Semaphore(self.concurrency)
+        agents = [PooledAgent(self.batcher, idx) for idx in range(len(self.agents))]
+
+        async def play(first, second, opening):
+            async with semaphore:
+                winner, moves, termination = await play_game(
+                    agents[first], agents[second], opening, self.time_limit)
+            result = GameResult(first, second, winner, moves, termination)
+            if on_result is not None:
+                on_result(result)
+            return result
+
+        return await asyncio.gather(*(play(*pairing) for pairing in pairings))
+
+
+def fair_pairings(test_idx, cpu_indices, num_matches, rng):
+    """Return the pairings of "fair" matches between agent `test_idx` and
+    every agent of `cpu_indices`: both player orders from the same random
+    opening, `num_matches` times against each.
+    """
+    pairings = []
+    for cpu_idx in cpu_indices:
+        for _ in range(num_matches):
+            opening = random_opening(rng)
+            pairings.append((cpu_idx, test_idx, opening))
+            pairings.append((test_idx, cpu_idx, opening))
+    return pairings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play concurrent matches on a pool of workers.")
+    parser.add_argument("--matches", type=int, default=10,
+                        help="number of fair matches (two games) against " +
+                             "each opponent")
+    parser.add_argument("--workers", type=int, default=4,
+                        help="number of worker processes")
+    parser.add_argument("--concurrency", type=int, default=256,
+                        help="maximum number of games in progress at a time")
+    parser.add_argument("--batch-size", type=int, default=16,
+                        help="maximum number of searches per worker task")
+    parser.add_argument("--time-limit", type=float, default=TIME_LIMIT,
+                        help="time limit of every turn in milliseconds")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--records", default=None,
+                        help="write the moves of every game to this file " +
+                             "in the binary format of game_records.py")
+    args = parser.parse_args()
+
+    agents = [Agent(AlphaBetaPlayer(score_fn=custom_score), "AB_Custom"),
+              Agent(RandomPlayer(), "Random"),
+              Agent(MinimaxPlayer(score_fn=open_move_score), "MM_Open"),
+              Agent(MinimaxPlayer(score_fn=improved_score), "MM_Improved"),
+              Agent(AlphaBetaPlayer(score_fn=improved_score), "AB_Improved")]
+    rng = random.Random(args.seed)
+    pairings = fair_pairings(0, range(1, len(agents)), args.matches, rng)
+
+    with contextlib.ExitStack() as stack:
+        on_result = None
+        if args.records is not None:
+            records = RecordWriter(stack.enter_context(open(args.records, "wb")))
+            on_result = lambda r: records.write(7, 7, r.moves, r.termination)
+        server = stack.enter_context(MatchServer(agents, args.workers, args.concurrency,
+                                                 args.batch_size, args.time_limit, args.seed))
+        results, stats = server.run(pairings, on_result)
+
+    print("{:<13}{:>6}{:>6}".format("Opponent", "Won", "Lost"))
+    for cpu_idx in range(1, len(agents)):
+        games = [r for r in results if cpu_idx in (r.first, r.second)]
+        won = sum((r.first, r.second)[r.winner - 1] == 0 for r in games)
+        print("{:<13}{:>6}{:>6}".format(agents[cpu_idx].name, won, len(games) - won))
+    terminations = [r.termination for r in results]
+    print("\n{} games, {} moves in {:.1f}s: {:.2f} games/s".format(
+        stats["games"], stats["moves"], stats["seconds"], stats["games_per_second"]))
+    print("{} searches in {} batches ({:.1f} per batch), {} timeouts, {} forfeits".format(
+        stats["searches"], stats["batches"], stats["average_batch"],
+        terminations.count("timeout"), terminations.count("forfeit")))
+
+
+if __name__ == "__main__":
+    main()
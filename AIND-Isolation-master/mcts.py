@@ -0,0 +1,205 @@
+"""Monte Carlo tree search agent for Isolation.
+
+`MCTSPlayer` grows a search tree with the UCT rule (UCB1 applied to trees)
+and evaluates each new leaf with a random playout to the end of the game.
+Nodes and playouts never touch `isolation.Board`: a position is the tuple
+(open-cell bitmask, active player cell, inactive player cell) and the
+playouts walk precomputed knight-move neighbour lists, which is far cheaper
+than calling forecast_move() for every simulated move.
+"""
+import math
+import random
+import time
+
+from isolation.bitboard import board_tables
+from isolation.endgame import board_masks
+from game_agent import IsolationPlayer
+
+# Per-size lists of the cell indices a knight can reach from each cell
+_NEIGHBORS = {}
+
+
+def neighbor_lists(width, height):
+    """Return the knight-move neighbours of every cell index of a board. """
+    if (width, height) not in _NEIGHBORS:
+        masks = board_tables(width, height)[0]
+        _NEIGHBORS[width, height] = [
+            [idx for idx in range(width * height) if mask >> idx & 1]
+            for mask in masks]
+    return _NEIGHBORS[width, height]
+
+
+def open_cells(free):
+    """Return the cell indices set in the open-cell mask `free`. """
+    cells = []
+    while free:
+        low = free & -free
+        cells.append(low.bit_length() - 1)
+        free ^= low
+    return cells
+
+
+class Node:
+    """A node of the search tree, reached by playing `move` (a cell index).
+    `wins` counts the playouts won by the player who made that move.
+    """
+    __slots__ = ("move", "children", "untried", "visits", "wins")
+
+    def __init__(self, move, untried):
+        self.move = move
+        self.children = []
+        self.untried = untried
+        self.visits = 0
+        self.wins = 0.
+
+
+class MCTSPlayer(IsolationPlayer):
+    """Game-playing agent that chooses a move using Monte Carlo tree search
+    with random playouts, running until `time_left()` drops below
+    `TIMER_THRESHOLD` and then playing the most visited root move.
+
+    Parameters
+    ----------
+    exploration : float (optional)
+        The exploration constant of the UCT rule; larger values spread the
+        playouts over more moves instead of deepening the best ones.
+
+    reuse_tree : bool (optional)
+        Keep the subtree of the position reached after this player's move and
+        the opponent's reply, so that its playouts count towards the next
+        search.
+
+    timeout : float (optional)
+        Time remaining (in milliseconds) when search is aborted.
+    """
+
+    def __init__(self, exploration=math.sqrt(2), reuse_tree=True, timeout=10.):
+        super().__init__(timeout=timeout)
+        self.exploration = exploration
+        self.reuse_tree = reuse_tree
+        # Tree and position left after the last move played by this player
+        self._root = None
+        self._root_state = None
+        self.playouts = 0
+        self.playouts_per_second = 0.
+        self.tree_reuses = 0
+
+    def get_move(self, game, time_left):
+        """Search for the best move from the available legal moves and return a
+        result before the time limit expires.
+
+        Parameters
+        ----------
+        game : `isolation.Board`
+            An instance of `isolation.Board` encoding the current state of the
+            game (e.g., player locations and blocked cells).
+
+        time_left : callable
+            A function that returns the number of milliseconds left in the
+            current turn. Returning with any less than 0 ms remaining forfeits
+            the game.
+
+        Returns
+        -------
+        (int, int)
+            Board coordinates corresponding to a legal move; may return
+            (-1, -1) if there are no available legal moves.
+        """
+        self.time_left = time_left
+        legal_moves = game.get_legal_moves()
+        if not legal_moves:
+            return (-1, -1)
+
+        self._neighbors = neighbor_lists(game.width, game.height)
+        state = board_masks(game)
+        root = self.find_root(state)
+
+        start = time.perf_counter()
+        playouts = 0
+        while self.time_left() > self.TIMER_THRESHOLD:
+            self.run_playout(root, state)
+            playouts += 1
+        elapsed = time.perf_counter() - start
+        self.playouts += playouts
+        if elapsed > 0:
+            self.playouts_per_second = playouts / elapsed
+
+        if not root.children:
+            return legal_moves[0]
+        best = max(root.children, key=lambda child: child.visits)
+        free, active, inactive = state
+        self._root = best
+        self._root_state = (free & ~(1 << best.move), inactive, best.move)
+        return board_tables(game.width, game.height)[1][best.move]
+
+    def find_root(self, state):
+        """Return the node of the previous tree that matches `state` if the
+        opponent's reply was already expanded, or else a new root.
+        """
+        if self.reuse_tree and self._root is not None:
+            free, active, inactive = self._root_state
+            for child in self._root.children:
+                if (free & ~(1 << child.move), inactive, child.move) == state:
+                    self.tree_reuses += 1
+                    return child
+        free, active, _ = state
+        return Node(None, self.legal_moves(free, active))
+
+    def legal_moves(self, free, loc):
+        """Return the cell indices a player standing on `loc` can move to. """
+        if loc is None:
+            return open_cells(free)
+        return [idx for idx in self._neighbors[loc] if free >> idx & 1]
+
+    def select_child(self, node):
+        """Return the child of `node` with the highest UCT score. """
+        log_visits = math.log(node.visits)
+        c = self.exploration
+        return max(node.children, key=lambda child: child.wins / child.visits +
+                   c * math.sqrt(log_visits / child.visits))
+
+    def run_playout(self, root, state):
+        """Grow the tree below `root` (the node for `state`) by one node and
+        score it with a random playout.
+        """
+        free, active, inactive = state
+        node = root
+        path = [root]
+
+        # Selection
+        while not node.untried and node.children:
+            node = self.select_child(node)
+            free &= ~(1 << node.move)
+            active, inactive = inactive, node.move
+            path.append(node)
+
+        # Expansion
+        if node.untried:
+            move = node.untried.pop(random.randrange(len(node.untried)))
+            free &= ~(1 << move)
+            active, inactive = inactive, move
+            child = Node(move, self.legal_moves(free, active))
+            node.children.append(child)
+            node = child
+            path.append(node)
+
+        # Simulation; the reward goes to the player who moved into each node
+        reward = 0. if self.playout(free, active, inactive) else 1.
+        for node in reversed(path):
+            node.visits += 1
+            node.wins += reward
+            reward = 1. - reward
+
+    def playout(self, free, active, inactive):
+        """Play random moves until a player is stuck and return True if the
+        player to move at the start of the playout wins.
+        """
+        first_to_move = True
+        while True:
+            moves = self.legal_moves(free, active)
+            if not moves:
+                return not first_to_move
+            move = random.choice(moves)
+            free &= ~(1 << move)
+            active, inactive = inactive, move
+            first_to_move = not first_to_move
@@ -0,0 +1,119 @@
+"""Move ordering for the alpha-beta search agents.
+
+Alpha-beta prunes the most when the best move at each node is searched
+first. `MoveOrderer` sorts the legal moves of a node by trying, in order,
+the hash move (the best move stored for the position in the transposition
+table, or the best root move of the previous iteration), the killer moves
+that caused cutoffs at the same ply in sibling nodes, and then the remaining
+moves by their history score and, optionally, their mobility.
+"""
+
+_KNIGHT_DIRECTIONS = [(-2, -1), (-2, 1), (-1, -2), (-1, 2),
+                      (1, -2), (1, 2), (2, -1), (2, 1)]
+
+
+def mobility(game, move):
+    """Return the number of open cells a knight could reach from `move`. """
+    r, c = move
+    return sum(game.move_is_legal((r + dr, c + dc)) for dr, dc in _KNIGHT_DIRECTIONS)
+
+
+class MoveOrderer:
+    """Order the moves of each node searched by an `AlphaBetaPlayer`.
+
+    Parameters
+    ----------
+    killer_slots : int (optional)
+        The number of killer moves remembered for each ply; 0 disables the
+        killer heuristic.
+
+    use_history : bool (optional)
+        Order the moves that are neither hash nor killer moves by the history
+        heuristic, which credits a move every time it causes a cutoff.
+
+    use_mobility : bool (optional)
+        Break ties between moves by the mobility of the destination cell, so
+        that moves leaving the mover more room are tried first.
+    """
+
+    def __init__(self, killer_slots=2, use_history=True, use_mobility=False):
+        self.killer_slots = killer_slots
+        self.use_history = use_history
+        self.use_mobility = use_mobility
+        # History scores are kept separately for each side to move
+        self.history = [{}, {}]
+        self.killers = {}
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+
+    def new_search(self):
+        """Prepare for a new root search: killer moves are specific to the
+        previous position, while history scores are only decayed.
+        """
+        self.killers = {}
+        for table in self.history:
+            for move in table:
+                table[move] //= 2
+
+    def order(self, game, moves, hash_move=None):
+        """Return the legal moves of `game` in the order they should be
+        searched.
+
+        Parameters
+        ----------
+        game : `isolation.Board`
+            The board at the node being searched.
+
+        moves : list<(int, int)>
+            The legal moves of the active player.
+
+        hash_move : (int, int) or None (optional)
+            The best move previously found for this position.
+
+        Returns
+        -------
+        list<(int, int)>
+            The same moves, best candidates first.
+        """
+        if len(moves) < 2:
+            return moves
+
+        first = []
+        if hash_move is not None and hash_move in moves:
+            first.append(hash_move)
+        for killer in self.killers.get(game.move_count, ()):
+            if killer in moves and killer not in first:
+                first.append(killer)
+
+        rest = [m for m in moves if m not in first]
+        if self.use_history or self.use_mobility:
+            history = self.history[game.move_count & 1] if self.use_history else {}
+            if self.use_mobility:
+                rest.sort(key=lambda m: (history.get(m, 0), mobility(game, m)), reverse=True)
+            else:
+                rest.sort(key=lambda m: history.get(m, 0), reverse=True)
+        return first + rest
+
+    def record_cutoff(self, game, move, depth, index):
+        """Credit `move` for causing a cutoff at a node of `game` searched with
+        `depth` plies remaining, where it was the `index`-th move searched.
+        """
+        self.cutoffs += 1
+        if index == 0:
+            self.first_move_cutoffs += 1
+
+        if self.killer_slots:
+            killers = self.killers.setdefault(game.move_count, [])
+            if move not in killers:
+                killers.insert(0, move)
+                del killers[self.killer_slots:]
+
+        if self.use_history:
+            history = self.history[game.move_count & 1]
+            history[move] = history.get(move, 0) + depth * depth
+
+    def first_move_cutoff_rate(self):
+        """Return the fraction of cutoffs caused by the first move searched;
+        values close to 1 indicate near-perfect move ordering.
+        """
+        return self.first_move_cutoffs / self.cutoffs if self.cutoffs else 0.
@@ -0,0 +1,202 @@
+"""Opening book for the search agents.
+
+The book maps every position reachable in the first few plies of a game to
+the move chosen by a deep alpha-beta search, so that the agents can skip the
+expensive early searches. Positions that are mirror images or rotations of
+each other are stored once under a canonical key: the smallest Zobrist hash
+among the symmetric variants of the position.
+
+The book is written to disk as an open-addressing hash table that is memory
+mapped when loaded, so a lookup reads a single slot (or a few on collisions)
+without parsing the file:
+
+    header: magic, width, height, plies, number of entries, number of slots
+    slot:   canonical key, move cell index (EMPTY if unused), depth, value
+
+Build a book from the command line with
+
+    python opening_book.py --plies 3 --depth 6 --output opening_book.bin
+"""
+import argparse
+import mmap
+import struct
+import sys
+import time
+
+from isolation import BitBoard
+from isolation.symmetry import canonical_key, inverse_permutations, symmetries
+from game_agent import AlphaBetaPlayer, custom_score
+from move_ordering import MoveOrderer
+
+MAGIC = b"ISOBOOK1"
+HEADER = struct.Struct("<8sBBBxII")
+ENTRY = struct.Struct("<QBBxxf")
+
+# Move cell index marking an unused slot
+EMPTY = 0xFF
+
+
+class OpeningBook:
+    """Read-only opening book backed by a memory-mapped file written by
+    `write_book()`.
+
+    Parameters
+    ----------
+    path : str
+        The location of the book file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, self.width, self.height, self.max_plies, self.entries,
+         self.size) = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC:
+            raise ValueError("{} is not an opening book".format(path))
+        self._index_mask = self.size - 1
+        self._inverse_perms = inverse_permutations(self.width, self.height)
+        self._cells = [(i, j) for j in range(self.width) for i in range(self.height)]
+
+    def __len__(self):
+        return self.entries
+
+    def __getstate__(self):
+        # Memory maps cannot be pickled; the copy sent to another process
+        # opens the file again
+        return self.path
+
+    def __setstate__(self, path):
+        self.__init__(path)
+
+    def __deepcopy__(self, memo):
+        # The table is read-only, so copies of a player share it
+        return self
+
+    def close(self):
+        self._mmap.close()
+
+    def probe(self, game):
+        """Return the book entry for the position in `game`.
+
+        Returns
+        -------
+        ((int, int), float, int) or None
+            The book move for the active player, its value from the point of
+            view of the active player and the depth it was searched to; None
+            if the position is not in the book.
+        """
+        if (game.move_count >= self.max_plies or game.width != self.width or
+                game.height != self.height):
+            return None
+        key, t = canonical_key(game)
+        idx = key & self._index_mask
+        while True:
+            stored, cell, depth, value = ENTRY.unpack_from(
+                self._mmap, HEADER.size + idx * ENTRY.size)
+            if cell == EMPTY:
+                return None
+            if stored == key:
+                return self._cells[self._inverse_perms[t][cell]], value, depth
+            idx = (idx + 1) & self._index_mask
+
+
+def write_book(path, entries, width, height, max_plies):
+    """Write an opening book file.
+
+    Parameters
+    ----------
+    path : str
+        The location of the book file.
+
+    entries : dict
+        Maps each canonical key to a (move cell index, depth, value) tuple,
+        with the move expressed in the canonical variant of the position.
+
+    width, height : int
+        The size of the board.
+
+    max_plies : int
+        The book covers the positions with fewer than `max_plies` moves.
+    """
+    # Keep the table at most half full so that probes stay short
+    size = 1 << max(1, (2 * len(entries) - 1).bit_length())
+    mask = size - 1
+    table = bytearray(HEADER.size + size * ENTRY.size)
+    HEADER.pack_into(table, 0, MAGIC, width, height, max_plies, len(entries), size)
+    for idx in range(size):
+        ENTRY.pack_into(table, HEADER.size + idx * ENTRY.size, 0, EMPTY, 0, 0.)
+    for key, (cell, depth, value) in entries.items():
+        idx = key & mask
+        while ENTRY.unpack_from(table, HEADER.size + idx * ENTRY.size)[1] != EMPTY:
+            idx = (idx + 1) & mask
+        ENTRY.pack_into(table, HEADER.size + idx * ENTRY.size, key, cell, depth, value)
+    with open(path, "wb") as f:
+        f.write(table)
+
+
+def opening_positions(players, max_plies, width=7, height=7):
+    """Yield one board for every position reachable in fewer than
+    `max_plies` moves, up to symmetry, in order of increasing move count.
+    """
+    frontier = [BitBoard(players[0], players[1], width, height)]
+    for ply in range(max_plies):
+        yield from frontier
+        if ply + 1 == max_plies:
+            break
+        children = {}
+        for game in frontier:
+            for move in game.get_legal_moves():
+                child = game.forecast_move(move)
+                children.setdefault(canonical_key(child)[0], child)
+        frontier = list(children.values())
+
+
+def build_book(path, max_plies=3, depth=6, score_fn=custom_score, width=7,
+               height=7, verbose=False):
+    """Search every opening position to `depth` plies and write the book to
+    `path`. Returns the number of positions in the book.
+    """
+    players = [AlphaBetaPlayer(score_fn=score_fn, tt_size=2 ** 16,
+                               ordering=MoveOrderer()) for _ in range(2)]
+    perms = symmetries(width, height)
+    entries = {}
+    start = time.time()
+    for game in opening_positions(players, max_plies, width, height):
+        player = game.active_player
+        player.time_left = lambda: float("inf")
+        player.start_search(game)
+        move, value = (-1, -1), None
+        for d in range(1, depth + 1):
+            move, value = player.aspiration_search(game, d, value)
+            player._pv_move = move
+        key, t = canonical_key(game)
+        entries[key] = (perms[t][move[0] + move[1] * height], depth, value)
+        if verbose:
+            print("{:>6} positions  ply {}  {:.0f}s".format(
+                len(entries), game.move_count, time.time() - start), end="\r")
+            sys.stdout.flush()
+    if verbose:
+        print()
+    write_book(path, entries, width, height, max_plies)
+    return len(entries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build an opening book.")
+    parser.add_argument("--plies", type=int, default=3,
+                        help="cover the positions with fewer moves than this")
+    parser.add_argument("--depth", type=int, default=6,
+                        help="alpha-beta search depth for each position")
+    parser.add_argument("--width", type=int, default=7)
+    parser.add_argument("--height", type=int, default=7)
+    parser.add_argument("--output", default="opening_book.bin",
+                        help="location of the book file")
+    args = parser.parse_args()
+    count = build_book(args.output, args.plies, args.depth, width=args.width,
+                       height=args.height, verbose=True)
+    print("Wrote {} positions to {}".format(count, args.output))
+
+
+if __name__ == "__main__":
+    main()
@@ -8,8 +8,10 @@ own agent and example heuristic functions.
 
 from random import randint
 
+from evaluation import EvalContext
 
-def null_score(game, player):
+
+def null_score(game, player, context=None):
     """This heuristic presumes no knowledge for non-terminal states, and
     returns the same uninformative value for all other states.
 
@@ -24,22 +26,25 @@ def null_score(game, player):
         (i.e., `player` should be either game.__player_1__ or
         game.__player_2__).
 
+    context : `evaluation.EvalContext` (optional)
+        The mobility of both players, passed by the search so that it is
+        computed once per position; computed from `game` if omitted.
+
     Returns
     ----------
     float
         The heuristic value of the current game state.
     """
 
-    if game.is_loser(player):
-        return float("-inf")
-
-    if game.is_winner(player):
-        return float("inf")
+    if context is None:
+        context = EvalContext(game, player)
+    if context.utility:
+        return context.utility
 
     return 0.
 
 
-def open_move_score(game, player):
+def open_move_score(game, player, context=None):
     """The basic evaluation function described in lecture that outputs a score
     equal to the number of moves open for your computer player on the board.
 
@@ -54,21 +59,24 @@ def open_move_score(game, player):
         (i.e., `player` should be either game.__player_1__ or
         game.__player_2__).
 
+    context : `evaluation.EvalContext` (optional)
+        The mobility of both players, passed by the search so that it is
+        computed once per position; computed from `game` if omitted.
+
     Returns
     ----------
     float
         The heuristic value of the current game state
     """
-    if game.is_loser(player):
-        return float("-inf")
-
-    if game.is_winner(player):
-        return float("inf")
+    if context is None:
+        context = EvalContext(game, player)
+    if context.utility:
+        return context.utility
 
-    return float(len(game.get_legal_moves(player)))
+    return float(context.own_moves)
 
 
-def improved_score(game, player):
+def improved_score(game, player, context=None):
     """The "Improved" evaluation function discussed in lecture that outputs a
     score equal to the difference in the number of moves available to the
     two players.
@@ -84,23 +92,26 @@ def improved_score(game, player):
         (i.e., `player` should be either game.__player_1__ or
         game.__player_2__).
 
+    context : `evaluation.EvalContext` (optional)
+        The mobility of both players, passed by the search so that it is
+        computed once per position; computed from `game` if omitted.
+
     Returns
     ----------
     float
         The heuristic value of the current game state
     """
-    if game.is_loser(player):
-        return float("-inf")
-
-    if game.is_winner(player):
-        return float("inf")
+    if context is None:
+        context = EvalContext(game, player)
+    if context.utility:
+        return context.utility
 
-    own_moves = len(game.get_legal_moves(player))
-    opp_moves = len(game.get_legal_moves(game.get_opponent(player)))
+    own_moves = context.own_moves
+    opp_moves = context.opp_moves
     return float(own_moves - opp_moves)
 
 
-def center_score(game, player):
+def center_score(game, player, context=None):
     """Outputs a score equal to square of the distance from the center of the
     board to the position of the player.
 
@@ -117,16 +128,19 @@ def center_score(game, player):
         (i.e., `player` should be either game.__player_1__ or
         game.__player_2__).
 
+    context : `evaluation.EvalContext` (optional)
+        The mobility of both players, passed by the search so that it is
+        computed once per position; computed from `game` if omitted.
+
     Returns
     ----------
     float
         The heuristic value of the current game state
     """
-    if game.is_loser(player):
-        return float("-inf")
-
-    if game.is_winner(player):
-        return float("inf")
+    if context is None:
+        context = EvalContext(game, player)
+    if context.utility:
+        return context.utility
 
     w, h = game.width / 2., game.height / 2.
     y, x = game.get_player_location(player)
@@ -0,0 +1,123 @@
+"""Sequential probability ratio test (SPRT) for comparing two agents.
+
+Instead of playing a fixed number of matches, the agents play pairs of games
+from the same random opening (once with each agent moving first) until the
+log-likelihood ratio of two hypotheses about their Elo difference crosses
+one of the bounds set by the chosen error rates:
+
+    H0: agent A is `elo0` Elo stronger than agent B
+    H1: agent A is `elo1` Elo stronger than agent B
+
+Pairs are scored 0, 0.5 or 1 from the point of view of agent A, and the
+test uses the normal approximation of the generalized SPRT on the pair
+scores, which accounts for the correlation between the two games of a pair.
+The variance of the pair scores is estimated with one lost and one won pair
+added, so that a run of identical results still reaches a decision.
+"""
+import math
+
+
+def expected_score(elo):
+    """Return the expected score of a player `elo` points stronger than its
+    opponent.
+    """
+    return 1 / (1 + 10 ** (-elo / 400))
+
+
+def elo_difference(score):
+    """Return the Elo difference that corresponds to an expected `score`. """
+    return -400 * math.log10(1 / score - 1)
+
+
+class SPRT:
+    """Track the outcome of game pairs and decide between H0 and H1.
+
+    Parameters
+    ----------
+    elo0 : float (optional)
+        The Elo difference under the null hypothesis.
+
+    elo1 : float (optional)
+        The Elo difference under the alternative hypothesis.
+
+    alpha : float (optional)
+        The probability of accepting H1 when H0 is true.
+
+    beta : float (optional)
+        The probability of accepting H0 when H1 is true.
+    """
+
+    def __init__(self, elo0=0., elo1=50., alpha=0.05, beta=0.05):
+        self.elo0 = elo0
+        self.elo1 = elo1
+        self.lower_bound = math.log(beta / (1 - alpha))
+        self.upper_bound = math.log((1 - beta) / alpha)
+        # Number of pairs that scored 0, 0.5 and 1
+        self.pairs = [0, 0, 0]
+
+    def add_pair(self, score):
+        """Record the result of a game pair scoring 0, 0.5 or 1 for agent A. """
+        self.pairs[int(2 * score)] += 1
+
+    @property
+    def num_pairs(self):
+        return sum(self.pairs)
+
+    def _score_stats(self, pairs=None):
+        """Return the mean and variance of the pair scores, counted in
+        `pairs` (by default the pairs played so far).
+        """
+        pairs = self.pairs if pairs is None else pairs
+        n = sum(pairs)
+        mean = (0.5 * pairs[1] + pairs[2]) / n
+        variance = (0.25 * pairs[1] + pairs[2]) / n - mean ** 2
+        return mean, variance
+
+    def llr(self):
+        """Return the log-likelihood ratio of H1 against H0. """
+        if not self.num_pairs:
+            return 0.
+        mean, _ = self._score_stats()
+        # The variance is estimated with one lost and one won pair added as a
+        # prior, so that it is never zero, even when every pair so far had
+        # the same score (all wins, or all splits)
+        _, variance = self._score_stats([self.pairs[0] + 1, self.pairs[1], self.pairs[2] + 1])
+        s0, s1 = expected_score(self.elo0), expected_score(self.elo1)
+        return self.num_pairs * (s1 - s0) * (2 * mean - s0 - s1) / (2 * variance)
+
+    def status(self):
+        """Return "H1" or "H0" once the test accepts either hypothesis, and
+        None while more games are needed.
+        """
+        llr = self.llr()
+        if llr >= self.upper_bound:
+            return "H1"
+        if llr <= self.lower_bound:
+            return "H0"
+        return None
+
+    def elo(self, confidence=1.96):
+        """Estimate the Elo difference of agent A over agent B.
+
+        Parameters
+        ----------
+        confidence : float (optional)
+            The number of standard errors spanned by the error bars; the
+            default gives a 95% confidence interval.
+
+        Returns
+        -------
+        (float, float)
+            The Elo estimate and the half-width of its error bars. Scores of
+            0 or 1 have no finite Elo difference and produce infinities.
+        """
+        n = self.num_pairs
+        if not n:
+            return 0., float("inf")
+        mean, variance = self._score_stats()
+        if mean <= 0 or mean >= 1:
+            return math.copysign(float("inf"), mean - 0.5), float("inf")
+        # Propagate the standard error of the mean score through the
+        # derivative of the Elo curve
+        slope = 400 / (math.log(10) * mean * (1 - mean))
+        return elo_difference(mean), confidence * slope * math.sqrt(variance / n)
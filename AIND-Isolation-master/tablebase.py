@@ -0,0 +1,299 @@
+"""Retrograde endgame tablebase for the search agents.
+
+Once few open cells remain within reach of the players, the outcome of the
+game depends only on three sets of cells:
+
+- F, the open cells reachable by either player (any other open cell can
+  never be visited);
+- A, the open cells the player to move can move to;
+- B, the open cells the waiting player can move to.
+
+The squares the players stand on only matter through A and B, so the
+tablebase stores the value of every (F, A, B) state with at most `cells`
+open cells in F, on a given board size. A state with k open cells is
+indexed by the rank of F among the k-cell subsets of the board (in the
+combinatorial number system) and by A and B written as k-bit masks over the
+cells of F:
+
+    index = offset(k) + ((rank(F) << k) + B) << k) + A
+
+Every move consumes a cell of F, so the states with k open cells only lead
+to states with k - 1 open cells, and the table is built one layer at a time
+from the empty board upwards (retrograde analysis). Each entry is a byte
+holding the number of plies until the end of the game with best play (the
+winner wins as fast as possible, the loser holds on as long as possible)
+and whether the player to move wins:
+
+    entry = plies << 1 | win
+
+The table is written to disk after a small header and memory mapped when
+loaded, so that a probe costs a bounded flood fill and a single byte read.
+The number of states grows as C(width * height, k) * 4 ** k: on a 7x7 board
+the table covers 1.2M states (1.2 MB) with 3 cells and 55M states with 4.
+
+Build a tablebase from the command line with
+
+    python tablebase.py --cells 4 --output tablebase.bin
+"""
+import argparse
+import math
+import mmap
+import struct
+import sys
+import time
+
+from isolation.bitboard import board_tables
+from isolation.endgame import board_masks
+
+MAGIC = b"ISOTBL01"
+HEADER = struct.Struct("<8sBBBxQ")
+
+# Preference of the player to move for every entry of a child state, from
+# the point of view of the opponent who moves there: children lost by the
+# opponent (sooner first) before children won by the opponent (later first)
+_PREFERENCE = [256 - (entry >> 1) if not entry & 1 else entry >> 1 for entry in range(256)]
+
+# The entry of a state given the best preference among its children, offset
+# by one so that index 0 stands for a state without moves (lost at once)
+_ENTRY = [0] * 258
+for _key in range(128):
+    _ENTRY[_key + 1] = (_key + 1) << 1
+for _key in range(129, 257):
+    _ENTRY[_key + 1] = ((256 - _key + 1) << 1) | 1
+
+
+def layer_offsets(width, height, cells):
+    """Return the index of the first state with k open cells, for k from 0
+    to `cells` + 1 (the last item is the size of the table).
+    """
+    n = width * height
+    offsets = [0]
+    for k in range(cells + 1):
+        offsets.append(offsets[-1] + math.comb(n, k) * 4 ** k)
+    return offsets
+
+
+def subset_rank(cells):
+    """Return the rank of a set of cell indices, given in increasing order,
+    among the sets of the same size (combinatorial number system).
+    """
+    return sum(math.comb(cell, i + 1) for i, cell in enumerate(cells))
+
+
+def relative_mask(mask, cells):
+    """Return `mask` as a mask over the positions of `cells` (bit i is set
+    when cells[i] is in `mask`).
+    """
+    return sum(1 << i for i, cell in enumerate(cells) if mask >> cell & 1)
+
+
+def build_layer(width, height, k, previous):
+    """Return the entries of every state with `k` open cells, given the
+    entries of the states with k - 1 open cells.
+    """
+    masks = board_tables(width, height)[0]
+    size = 1 << k
+    half = size >> 1
+    layer = bytearray(math.comb(width * height, k) * size * size)
+    preference = _PREFERENCE
+    entry_of = _ENTRY
+    for free_cells in _subsets(width * height, k):
+        rank = subset_rank(free_cells)
+        free = sum(1 << cell for cell in free_cells)
+        # For the move to each cell of F: the rank of the remaining cells
+        # and the moves of the player once it stands on the cell
+        moves = []
+        for j, cell in enumerate(free_cells):
+            rest = free_cells[:j] + free_cells[j + 1:]
+            moves.append((j, subset_rank(rest),
+                          relative_mask(masks[cell] & free & ~(1 << cell), rest)))
+        start = rank * size * size
+        for waiting in range(size):
+            # The preference of the mover for each move: after the move to
+            # cell j the waiting player moves, and loses cell j
+            keys = []
+            for j, child_rank, reply_moves in moves:
+                low = waiting & ((1 << j) - 1)
+                child_moves = low | ((waiting >> (j + 1)) << j)
+                keys.append(preference[previous[
+                    (((child_rank * half) + reply_moves) * half) + child_moves]])
+            # best[A] is the best preference over the moves in A
+            best = [-1] * size
+            for mover in range(1, size):
+                low = mover & -mover
+                key = keys[low.bit_length() - 1]
+                other = best[mover ^ low]
+                best[mover] = key if key > other else other
+            offset = start + waiting * size
+            layer[offset:offset + size] = bytes(entry_of[key + 1] for key in best)
+    return layer
+
+
+def _subsets(n, k):
+    """Yield the k-subsets of range(n) as increasing tuples. """
+    if k == 0:
+        yield ()
+        return
+    stack = list(range(k))
+    while True:
+        yield tuple(stack)
+        # Advance to the next combination in lexicographic order
+        i = k - 1
+        while i >= 0 and stack[i] == n - k + i:
+            i -= 1
+        if i < 0:
+            return
+        stack[i] += 1
+        for j in range(i + 1, k):
+            stack[j] = stack[j - 1] + 1
+
+
+def build_tablebase(path, cells=4, width=7, height=7, verbose=False):
+    """Build the tablebase of every state with at most `cells` open cells
+    on a board of the given size and write it to `path`. Returns the number
+    of states in the table.
+    """
+    offsets = layer_offsets(width, height, cells)
+    start = time.time()
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, width, height, cells, offsets[-1]))
+        # The only state without open cells is lost at once
+        previous = bytearray(1)
+        f.write(previous)
+        for k in range(1, cells + 1):
+            previous = build_layer(width, height, k, previous)
+            f.write(previous)
+            if verbose:
+                print("{:>12,} states with {} open cells  {:.0f}s".format(
+                    len(previous), k, time.time() - start))
+                sys.stdout.flush()
+    return offsets[-1]
+
+
+class Tablebase:
+    """Read-only endgame tablebase backed by a memory-mapped file written by
+    `build_tablebase()`.
+
+    Parameters
+    ----------
+    path : str
+        The location of the tablebase file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.width, self.height, self.cells, self.states = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC:
+            raise ValueError("{} is not a tablebase".format(path))
+        self._offsets = [HEADER.size + offset
+                         for offset in layer_offsets(self.width, self.height, self.cells)]
+        self._masks, self._coordinates, _ = board_tables(self.width, self.height)
+        # Binomial coefficients C(cell, i + 1) of the ranks
+        self._binomials = [[math.comb(cell, i + 1) for i in range(self.cells)]
+                           for cell in range(self.width * self.height)]
+        self.probes = 0
+        self.hits = 0
+
+    def __len__(self):
+        return self.states
+
+    def __getstate__(self):
+        # Memory maps cannot be pickled; the copy sent to another process
+        # opens the file again
+        return self.path
+
+    def __setstate__(self, path):
+        self.__init__(path)
+
+    def __deepcopy__(self, memo):
+        # The table is read-only, so copies of a player share it
+        return self
+
+    def close(self):
+        self._mmap.close()
+
+    def probe(self, game):
+        """Return the outcome of the position in `game` for the active player.
+
+        Returns
+        -------
+        (bool, int) or None
+            Whether the active player wins, and the number of plies until the
+            end of the game with best play; None if the position is not in
+            the table (more open cells within reach, a player that has not
+            been placed or another board size).
+        """
+        if game.width != self.width or game.height != self.height:
+            return None
+        self.probes += 1
+        free, active, inactive = board_masks(game)
+        if active is None or inactive is None:
+            return None
+        masks = self._masks
+        limit = self.cells
+        mover = masks[active] & free
+        waiting = masks[inactive] & free
+        # Flood fill the reachable cells, giving up as soon as there are too many
+        region = frontier = mover | waiting
+        while frontier:
+            if region.bit_count() > limit:
+                return None
+            step = 0
+            while frontier:
+                low = frontier & -frontier
+                step |= masks[low.bit_length() - 1]
+                frontier ^= low
+            frontier = step & free & ~region
+            region |= frontier
+
+        k = 0
+        rank = mover_rel = waiting_rel = 0
+        binomials = self._binomials
+        while region:
+            low = region & -region
+            cell = low.bit_length() - 1
+            rank += binomials[cell][k]
+            if mover & low:
+                mover_rel |= 1 << k
+            if waiting & low:
+                waiting_rel |= 1 << k
+            region ^= low
+            k += 1
+        entry = self._mmap[self._offsets[k] + (((rank << k) + waiting_rel) << k) + mover_rel]
+        self.hits += 1
+        return bool(entry & 1), entry >> 1
+
+    def best_move(self, game):
+        """Return the move of the active player that wins the fastest, or
+        loses the slowest, in a position covered by the table; None if the
+        position is not in the table or the active player has no moves.
+        """
+        if self.probe(game) is None:
+            return None
+        best, best_key = None, -1
+        for move in game.get_legal_moves():
+            opponent_wins, plies = self.probe(game.forecast_move(move))
+            key = plies if opponent_wins else 256 - plies
+            if key > best_key:
+                best, best_key = move, key
+        return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build an endgame tablebase.")
+    parser.add_argument("--cells", type=int, default=4,
+                        help="cover the positions with at most this many " +
+                             "open cells within reach of the players")
+    parser.add_argument("--width", type=int, default=7)
+    parser.add_argument("--height", type=int, default=7)
+    parser.add_argument("--output", default="tablebase.bin",
+                        help="location of the tablebase file")
+    args = parser.parse_args()
+    count = build_tablebase(args.output, args.cells, args.width, args.height, verbose=True)
+    print("Wrote {:,} states to {}".format(count, args.output))
+
+
+if __name__ == "__main__":
+    main()
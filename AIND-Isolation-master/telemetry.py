@@ -0,0 +1,34 @@
+"""Structured telemetry for Isolation games.
+
+`Board.play()` calls its `telemetry` argument with a dict for every move and
+for the end of the game; `JsonlWriter` writes these records to a file as
+JSON lines, adding fields that identify the game, so that the search
+statistics of many games can be compared across versions of the agents,
+e.g. with `pandas.read_json(path, lines=True)`.
+"""
+import json
+
+
+class JsonlWriter:
+    """Callable that writes every record it is called with as a line of JSON
+    to `file`, merged with the `context` fields.
+
+    Parameters
+    ----------
+    file : file object
+        A text file open for writing.
+
+    context : keyword arguments
+        Fields added to every record; the fields of the record win.
+    """
+
+    def __init__(self, file, **context):
+        self.file = file
+        self.context = context
+
+    def __call__(self, record):
+        self.file.write(json.dumps(dict(self.context, **record)) + "\n")
+
+    def bind(self, **context):
+        """Return a writer to the same file with additional context fields. """
+        return JsonlWriter(self.file, **dict(self.context, **context))
@@ -0,0 +1,105 @@
+"""Unit tests for the vectorized batch evaluation"""
+
+import random
+import unittest
+
+import isolation
+import game_agent
+
+from batch_evaluation import MobilityEvaluator
+from isolation.endgame import board_masks
+from sample_players import improved_score
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def random_positions(count, seed, width=7, height=7):
+    """Yield boards from random games, including their final positions. """
+    rng = random.Random(seed)
+    for _ in range(count):
+        game = isolation.BitBoard("Player1", "Player2", width, height)
+        while True:
+            yield game
+            moves = game.get_legal_moves()
+            if not moves:
+                break
+            game = game.forecast_move(rng.choice(moves))
+
+
+class MobilityEvaluatorTest(unittest.TestCase):
+
+    def test_default_weights_match_improved_score(self):
+        evaluator = MobilityEvaluator()
+        for game in random_positions(5, 0):
+            for player in ("Player1", "Player2"):
+                self.assertEqual(evaluator(game, player), improved_score(game, player))
+
+    def test_batch_leaves_requires_batch_evaluator(self):
+        with self.assertRaises(ValueError):
+            game_agent.AlphaBetaPlayer(score_fn=improved_score, batch_leaves=True)
+
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class BatchEvaluationTest(unittest.TestCase):
+
+    def test_batch_matches_single_positions(self):
+        evaluator = MobilityEvaluator(mobility=1., second_order=.5, center=.25)
+        for width, height in ((7, 7), (5, 8)):
+            games = list(random_positions(4, 1, width, height))
+            cells = width * height
+            rows, active, inactive = [], [], []
+            for game in games:
+                free, active_loc, inactive_loc = board_masks(game)
+                rows.append([bool(free >> idx & 1) for idx in range(cells)] + [False])
+                active.append(cells if active_loc is None else active_loc)
+                inactive.append(cells if inactive_loc is None else inactive_loc)
+            for player in ("Player1", "Player2"):
+                player_active = np.array([game.active_player == player for game in games])
+                scores = evaluator.evaluate(width, height, np.array(rows), np.array(active),
+                                            np.array(inactive), player_active)
+                self.assertEqual(scores.tolist(), [evaluator(game, player) for game in games])
+
+    def test_score_frontier(self):
+        evaluator = MobilityEvaluator(second_order=.5)
+        for game in random_positions(2, 2):
+            moves = game.get_legal_moves()
+            if not moves:
+                continue
+            children = evaluator.score_frontier(game, "Player1", moves, 1)
+            self.assertEqual(children, [[evaluator(game.forecast_move(m), "Player1")]
+                                        for m in moves])
+            grandchildren = evaluator.score_frontier(game, "Player1", moves, 2)
+            for move, scores in zip(moves, grandchildren):
+                child = game.forecast_move(move)
+                replies = child.get_legal_moves()
+                expected = ([evaluator(child.forecast_move(r), "Player1") for r in replies]
+                            or [evaluator(child, "Player1")])
+                self.assertEqual(sorted(scores), sorted(expected))
+
+    def test_batch_search_matches_search(self):
+        evaluator = MobilityEvaluator(second_order=.5, center=.1)
+        rng = random.Random(3)
+        history = []
+        while True:
+            results = []
+            for batch_leaves in (False, True):
+                player = game_agent.AlphaBetaPlayer(score_fn=evaluator,
+                                                    batch_leaves=batch_leaves)
+                players = [player, "Opponent"] if len(history) % 2 == 0 else ["Opponent", player]
+                game = isolation.BitBoard(*players)
+                for move in history:
+                    game.apply_move(move)
+                player.time_left = lambda: float("inf")
+                player.start_search(game)
+                results.append([player.search_root(game, depth) for depth in (1, 2, 4)])
+            self.assertEqual(results[0], results[1])
+            if not game.get_legal_moves():
+                break
+            history.append(rng.choice(game.get_legal_moves()))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+"""Parity tests between the list-backed `isolation.Board` and the bitmask
+backed `isolation.BitBoard` engines.
+"""
+
+import random
+import unittest
+
+import isolation
+
+
+class BitBoardParityTest(unittest.TestCase):
+    """Play the same random games on both engines and compare every query"""
+
+    def setUp(self):
+        self.player1 = "Player1"
+        self.player2 = "Player2"
+
+    def assertSameState(self, board, bitboard):
+        for player in (self.player1, self.player2):
+            self.assertEqual(board.get_player_location(player),
+                             bitboard.get_player_location(player))
+            self.assertEqual(sorted(board.get_legal_moves(player)),
+                             sorted(bitboard.get_legal_moves(player)))
+            self.assertEqual(board.utility(player), bitboard.utility(player))
+            self.assertEqual(board.is_winner(player), bitboard.is_winner(player))
+            self.assertEqual(board.is_loser(player), bitboard.is_loser(player))
+        self.assertEqual(board.active_player, bitboard.active_player)
+        self.assertEqual(board.move_count, bitboard.move_count)
+        self.assertEqual(board.get_blank_spaces(), bitboard.get_blank_spaces())
+        self.assertEqual(board.to_string(), bitboard.to_string())
+        self.assertEqual(board.hash(), bitboard.hash())
+
+    def test_random_games(self):
+        rng = random.Random(0)
+        for width, height in [(7, 7), (5, 8), (9, 6)]:
+            for _ in range(10):
+                board = isolation.Board(self.player1, self.player2, width, height)
+                bitboard = isolation.BitBoard(self.player1, self.player2, width, height)
+                self.assertSameState(board, bitboard)
+                while True:
+                    moves = sorted(board.get_legal_moves())
+                    if not moves:
+                        break
+                    move = rng.choice(moves)
+                    self.assertTrue(bitboard.move_is_legal(move))
+                    board.apply_move(move)
+                    bitboard.apply_move(move)
+                    self.assertSameState(board, bitboard)
+
+    def test_large_boards(self):
+        rng = random.Random(1)
+        for width, height in [(15, 15), (11, 13)]:
+            board = isolation.Board(self.player1, self.player2, width, height)
+            bitboard = isolation.BitBoard(self.player1, self.player2, width, height)
+            while True:
+                self.assertSameState(board, bitboard)
+                moves = sorted(board.get_legal_moves())
+                if not moves:
+                    break
+                move = rng.choice(moves)
+                board.apply_move(move)
+                bitboard.apply_move(move)
+
+    def test_forecast_move_does_not_modify_original(self):
+        bitboard = isolation.BitBoard(self.player1, self.player2)
+        bitboard.apply_move((2, 3))
+        bitboard.apply_move((0, 5))
+        before = bitboard.to_string()
+        child = bitboard.forecast_move((0, 2))
+        self.assertEqual(before, bitboard.to_string())
+        self.assertNotEqual(before, child.to_string())
+        self.assertNotEqual(bitboard.hash(), child.hash())
+        self.assertEqual(child.get_player_location(self.player1), (0, 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+"""Unit tests for the endgame partition detector and solver"""
+
+import random
+import unittest
+
+import isolation
+import game_agent
+
+from isolation.endgame import partition, solve_partition
+
+
+def exact_value(game, player):
+    """Solve `game` by exhaustive minimax. """
+    moves = game.get_legal_moves()
+    if not moves:
+        return game.utility(player)
+    values = [exact_value(game.forecast_move(m), player) for m in moves]
+    return max(values) if game.active_player == player else min(values)
+
+
+def separated_openings(open_cells, count, seed):
+    """Return the moves leading to random positions with at most `open_cells`
+    open cells in which the players' regions are disjoint.
+    """
+    rng = random.Random(seed)
+    openings = []
+    while len(openings) < count:
+        game = isolation.BitBoard("Player1", "Player2")
+        moves = []
+        while game.get_legal_moves():
+            moves.append(rng.choice(game.get_legal_moves()))
+            game.apply_move(moves[-1])
+            if (game.width * game.height - game.move_count <= open_cells and
+                    partition(game) is not None):
+                openings.append(moves)
+                break
+    return openings
+
+
+def replay(board_class, players, moves):
+    """Return a board of `board_class` after playing `moves`. """
+    game = board_class(*players)
+    for move in moves:
+        game.apply_move(move)
+    return game
+
+
+class PartitionTest(unittest.TestCase):
+
+    def test_no_partition_in_the_opening(self):
+        game = isolation.Board("Player1", "Player2")
+        self.assertIsNone(partition(game))
+        game.apply_move((3, 3))
+        self.assertIsNone(partition(game))
+        game.apply_move((3, 4))
+        self.assertIsNone(partition(game))
+
+    def test_engines_agree(self):
+        rng = random.Random(2)
+        for _ in range(20):
+            board = isolation.Board("Player1", "Player2")
+            bitboard = isolation.BitBoard("Player1", "Player2")
+            while board.get_legal_moves():
+                self.assertEqual(partition(board), partition(bitboard))
+                move = rng.choice(sorted(board.get_legal_moves()))
+                board.apply_move(move)
+                bitboard.apply_move(move)
+
+    def test_regions_are_disjoint_and_open(self):
+        for moves in separated_openings(20, 20, 3):
+            game = replay(isolation.BitBoard, ("Player1", "Player2"), moves)
+            own, other = partition(game)
+            self.assertEqual(own & other, 0)
+            self.assertEqual(own & game._blocked, 0)
+            self.assertEqual(other & game._blocked, 0)
+
+
+class SolvePartitionTest(unittest.TestCase):
+
+    def test_matches_exhaustive_search(self):
+        players = ("Player1", "Player2")
+        for moves in separated_openings(12, 30, 4):
+            game = replay(isolation.Board, players, moves)
+            for player in players:
+                value, move = solve_partition(game, player)
+                self.assertEqual(value, exact_value(game, player))
+            if game.get_legal_moves():
+                self.assertIn(move, game.get_legal_moves())
+                # The active player's move keeps the result of the game
+                active = game.active_player
+                self.assertEqual(exact_value(game.forecast_move(move), active),
+                                 solve_partition(game, active)[0])
+            else:
+                self.assertEqual(move, (-1, -1))
+
+    def test_alphabeta_player_plays_solved_move(self):
+        for moves in separated_openings(16, 10, 5):
+            player = game_agent.AlphaBetaPlayer(endgame_cells=16)
+            players = [player, "Opponent"] if len(moves) % 2 == 0 else ["Opponent", player]
+            game = replay(isolation.BitBoard, players, moves)
+            # The search would time out immediately; only the solver can
+            # provide the move
+            move = player.get_move(game, lambda: -1.)
+            self.assertEqual(move, solve_partition(game, player)[1])
+            self.assertEqual(player.endgame_solves, 1 if game.get_legal_moves() else 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+"""Unit tests for the shared mobility evaluation context"""
+
+import random
+import unittest
+
+import isolation
+import evaluation
+import game_agent
+import sample_players
+
+from evaluation import EvalContext, takes_context
+from tuning import WeightedScore
+
+SCORE_FUNCTIONS = [game_agent.custom_score, game_agent.custom_score_2,
+                   game_agent.custom_score_3, sample_players.null_score,
+                   sample_players.open_move_score, sample_players.improved_score,
+                   sample_players.center_score]
+
+
+def random_positions(count, seed):
+    """Yield boards from random games, including their final positions. """
+    rng = random.Random(seed)
+    for _ in range(count):
+        game = isolation.Board("Player1", "Player2")
+        while True:
+            yield game
+            moves = game.get_legal_moves()
+            if not moves:
+                break
+            game = game.forecast_move(rng.choice(sorted(moves)))
+
+
+class EvalContextTest(unittest.TestCase):
+
+    def test_matches_board(self):
+        for game in random_positions(10, 0):
+            for player in ("Player1", "Player2"):
+                context = EvalContext(game, player)
+                self.assertEqual(context.own_moves, len(game.get_legal_moves(player)))
+                self.assertEqual(context.opp_moves,
+                                 len(game.get_legal_moves(game.get_opponent(player))))
+                self.assertEqual(context.utility, game.utility(player))
+
+    def test_scores_match_without_context(self):
+        for game in random_positions(5, 1):
+            if game.move_count < 2:
+                continue  # center_score needs both players on the board
+            moves = game.get_legal_moves()
+            for player in ("Player1", "Player2"):
+                context = EvalContext(game, player, moves)
+                for score_fn in SCORE_FUNCTIONS:
+                    self.assertTrue(takes_context(score_fn))
+                    self.assertEqual(score_fn(game, player, context),
+                                     score_fn(game, player))
+
+    def test_search_accepts_plain_score_functions(self):
+        def plain_score(game, player):
+            return sample_players.improved_score(game, player)
+
+        self.assertFalse(takes_context(plain_score))
+        players = [game_agent.AlphaBetaPlayer(score_fn=score_fn)
+                   for score_fn in (plain_score, sample_players.improved_score)]
+        moves = []
+        for player in players:
+            game = isolation.BitBoard(player, "Player2")
+            game.apply_move((3, 3))
+            game.apply_move((2, 2))
+            moves.append(player.search_to_depth(game, 4))
+        self.assertEqual(moves[0], moves[1])
+        self.assertEqual(players[0].nodes, players[1].nodes)
+
+    def test_context_cache_is_bounded(self):
+        # Tuning builds a new score object for every game
+        takes_context(WeightedScore())
+        size = len(evaluation._TAKES_CONTEXT)
+        for weight in range(10):
+            self.assertTrue(takes_context(WeightedScore({"own_moves": weight})))
+        self.assertEqual(len(evaluation._TAKES_CONTEXT), size)
+
+
+if __name__ == '__main__':
+    unittest.main()
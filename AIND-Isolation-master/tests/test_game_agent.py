@@ -3,10 +3,14 @@ tests to run and debug your minimax and alphabeta agents locally.  The test
 cases used by the project assistant are not public.
 """
 
+import random
+import threading
+import time
 import unittest
 
 import isolation
 import game_agent
+import lazy_smp
 
 from importlib import reload
 
@@ -25,5 +29,206 @@ class IsolationTest(unittest.TestCase):
         self.fail("Hello, World!")
 
 
+class InPlaceSearchTest(unittest.TestCase):
+    """Searching with push_move()/pop_move() matches searching on copies"""
+
+    def setUp(self):
+        reload(game_agent)
+
+    def opening(self, player):
+        game = isolation.BitBoard(player, "Player2")
+        game.apply_move((2, 3))
+        game.apply_move((0, 5))
+        player.time_left = lambda: float("inf")
+        return game
+
+    def test_minimax_in_place(self):
+        results = []
+        for in_place in (False, True):
+            player = game_agent.MinimaxPlayer(in_place=in_place)
+            game = self.opening(player)
+            before = game.to_string()
+            results.append(player.minimax(game, 3))
+            self.assertEqual(before, game.to_string())
+        self.assertEqual(results[0], results[1])
+
+    def test_alphabeta_in_place(self):
+        results = []
+        for in_place in (False, True):
+            player = game_agent.AlphaBetaPlayer(in_place=in_place)
+            game = self.opening(player)
+            before = game.to_string()
+            results.append(player.alphabeta(game, 4))
+            self.assertEqual(before, game.to_string())
+        self.assertEqual(results[0], results[1])
+
+
+class TranspositionTableSearchTest(unittest.TestCase):
+    """A transposition table does not change the result of a fixed-depth
+    search started from an empty table"""
+
+    def setUp(self):
+        reload(game_agent)
+
+    def test_alphabeta_with_tt(self):
+        for opening in ([(2, 3), (0, 5)], [(3, 3), (4, 5), (1, 2), (6, 6)]):
+            results = []
+            for tt_size in (0, 1024):
+                player = game_agent.AlphaBetaPlayer(tt_size=tt_size)
+                player.time_left = lambda: float("inf")
+                game = isolation.BitBoard(player, "Player2")
+                for move in opening:
+                    game.apply_move(move)
+                results.append(player.alphabeta(game, 5))
+            self.assertEqual(results[0], results[1])
+
+    def test_bounds_are_classified_against_the_node_window(self):
+        player = game_agent.AlphaBetaPlayer(tt_size=1024)
+        player.time_left = lambda: float("inf")
+        game = isolation.BitBoard(player, "Player2")
+        for move in [(2, 3), (0, 5), (4, 4), (2, 4)]:
+            game.apply_move(move)
+        # A lower bound stored for the node narrows the window of its search
+        key, _ = player.tt_key(game)
+        player.tt.store(key, 3, -1., game_agent.LOWER, None)
+        saved = []
+        tt_save = player.tt_save
+        player.tt_save = lambda game, depth, value, window, move: (
+            saved.append((game.hash(), window)), tt_save(game, depth, value, window, move))
+        player.alpha_beta_max_value(game, 3, -10., 10.)
+        self.assertEqual(saved[-1], (game.hash(), (-10., 10.)))
+
+
+class CompletedDepthsTest(unittest.TestCase):
+    """The depths recorded by get_move() cover the current game only"""
+
+    def test_depths_reset_on_new_game(self):
+        player = game_agent.AlphaBetaPlayer()
+        for moves in (2, 1):
+            game = isolation.BitBoard(player, "Opponent")
+            game.apply_move((2, 3))
+            game.apply_move((0, 5))
+            for _ in range(moves):
+                deadline = time.time() + 0.02
+                move = player.get_move(game, lambda: 1000 * (deadline - time.time()))
+                game.apply_move(move)
+                game.apply_move(game.get_legal_moves()[0])
+            self.assertEqual(len(player.completed_depths), moves)
+
+
+class PrincipalVariationSearchTest(unittest.TestCase):
+    """PVS and aspiration windows find the same root value as a plain
+    alpha-beta search"""
+
+    def setUp(self):
+        reload(game_agent)
+
+    def test_pvs_and_aspiration_values(self):
+        rng = random.Random(3)
+        for _ in range(10):
+            opening = []
+            game = isolation.BitBoard("Player1", "Player2")
+            for _ in range(rng.randint(2, 20)):
+                if not game.get_legal_moves():
+                    break
+                opening.append(rng.choice(game.get_legal_moves()))
+                game.apply_move(opening[-1])
+            values = []
+            for config in ({}, {"pvs": True}, {"pvs": True, "aspiration": 0.1}):
+                player = game_agent.AlphaBetaPlayer(**config)
+                player.time_left = lambda: float("inf")
+                players = [player, "Opponent"] if len(opening) % 2 == 0 else ["Opponent", player]
+                game = isolation.BitBoard(*players)
+                for move in opening:
+                    game.apply_move(move)
+                value = None
+                for depth in range(1, 5):
+                    _, value = player.aspiration_search(game, depth, value)
+                values.append(value)
+            self.assertEqual(values[0], values[1])
+            self.assertEqual(values[0], values[2])
+
+
+class PonderTest(unittest.TestCase):
+    """Test searching on the opponent's time"""
+
+    def setUp(self):
+        reload(game_agent)
+
+    def test_ponder_hit_resumes_search(self):
+        player = game_agent.AlphaBetaPlayer(tt_size=2 ** 12)
+        game = isolation.BitBoard("Opponent", player)
+        rng = random.Random(2)
+        while game.move_count < 30 or game.active_player != "Opponent":
+            game.apply_move(rng.choice(game.get_legal_moves()))
+        stop = threading.Event()
+        stop.set()
+        player.ponder(game.copy(), stop)
+        self.assertIsNone(player._ponder_result)
+
+        # Late in the game the search completes every iteration without a
+        # stop signal
+        player.ponder(game.copy(), threading.Event())
+        key, move, _, depth = player._ponder_result
+        predicted = next(m for m in game.get_legal_moves()
+                         if game.forecast_move(m).hash() == key)
+        game.apply_move(predicted)
+        self.assertEqual(depth, len(game.get_blank_spaces()))
+
+        self.assertEqual(player.get_move(game, lambda: 1000.), move)
+        self.assertEqual((player.ponder_hits, player.ponder_misses), (1, 0))
+        self.assertEqual(player.completed_depths, [depth])
+
+    def test_game_with_pondering(self):
+        player1 = game_agent.AlphaBetaPlayer(tt_size=2 ** 12)
+        player2 = game_agent.AlphaBetaPlayer()
+        game = isolation.Board(player1, player2)
+        winner, history, _ = game.play(time_limit=50, ponder=True)
+        self.assertIn(winner, (player1, player2))
+        self.assertEqual(player1.ponder_hits + player1.ponder_misses,
+                         len(history) // 2 - 1 + len(history) % 2)
+
+
+class LazySMPTest(unittest.TestCase):
+    """Test the multi-process search"""
+
+    def test_lazy_smp_returns_legal_moves(self):
+        player = lazy_smp.LazySMPPlayer(workers=2, tt_size=2 ** 12)
+        try:
+            game = isolation.BitBoard(player, "Opponent")
+            game.apply_move((2, 3))
+            game.apply_move((0, 5))
+            for _ in range(2):
+                deadline = time.time() + 0.1
+                move = player.get_move(game, lambda: 1000 * (deadline - time.time()))
+                self.assertIn(move, game.get_legal_moves())
+                game.apply_move(move)
+                game.apply_move(game.get_legal_moves()[0])
+            self.assertEqual(len(player.completed_depths), 2)
+            self.assertEqual(len(player._helpers), 1)
+        finally:
+            player.close()
+        self.assertEqual(player._helpers, [])
+
+    def test_single_worker_reuses_and_releases_table(self):
+        player = lazy_smp.LazySMPPlayer(workers=1, tt_size=2 ** 12)
+        game = isolation.BitBoard(player, "Opponent")
+        game.apply_move((2, 3))
+        game.apply_move((0, 5))
+        tables = set()
+        for _ in range(2):
+            deadline = time.time() + 0.05
+            move = player.get_move(game, lambda: 1000 * (deadline - time.time()))
+            tables.add(player.tt.name)
+            game.apply_move(move)
+            game.apply_move(game.get_legal_moves()[0])
+        self.assertEqual(len(tables), 1)
+        self.assertEqual(player._helpers, [])
+        player.close()
+        self.assertIsNone(player.tt)
+        with self.assertRaises(FileNotFoundError):
+            lazy_smp.SharedTranspositionTable(2 ** 12, name=tables.pop())
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,114 @@
+"""Unit tests for the binary game records"""
+
+import io
+import random
+import unittest
+
+import isolation
+import game_agent
+
+from game_records import (GAME, MAGIC, RecordWriter, read_records, replay, summarize,
+                          to_isoviz, winner)
+from sample_players import RandomPlayer, improved_score
+
+
+def random_game(rng, width, height):
+    """Return the moves of a random game. """
+    game = isolation.BitBoard("Player1", "Player2", width, height)
+    moves = []
+    while True:
+        legal = game.get_legal_moves()
+        if not legal:
+            return moves
+        moves.append(rng.choice(legal))
+        game.apply_move(moves[-1])
+
+
+class GameRecordsTest(unittest.TestCase):
+
+    def test_round_trip(self):
+        rng = random.Random(0)
+        games = [(width, height, random_game(rng, width, height), "illegal move")
+                 for width, height in [(7, 7), (5, 8), (15, 15), (11, 13)]]
+        games += [(7, 7, [], "timeout"), (7, 7, [(3, 3)], "forfeit"),
+                  (7, 7, [(3, 3), (0, 0)], "timeout")]
+        file = io.BytesIO()
+        writer = RecordWriter(file)
+        for game in games:
+            writer.write(*game)
+        self.assertEqual(writer.games, len(games))
+        # One byte per move after the two placement moves
+        self.assertEqual(len(file.getvalue()),
+                         len(MAGIC) + sum(GAME.size + max(0, len(g[2]) - 2) for g in games))
+
+        file.seek(0)
+        records = list(read_records(file))
+        self.assertEqual([tuple(record) for record in records], games)
+
+    def test_played_games(self):
+        file = io.BytesIO()
+        writer = RecordWriter(file)
+        results = []
+        for seed in range(4):
+            random.seed(seed)
+            player1 = game_agent.AlphaBetaPlayer(score_fn=improved_score)
+            player2 = RandomPlayer()
+            game = isolation.Board(player1, player2)
+            opening = [(3, 3), (seed, 6 - seed)]
+            for move in opening:
+                game.apply_move(move)
+            winner_player, history, termination = game.play(time_limit=50)
+            writer.write(7, 7, opening + history, termination)
+            results.append((1 if winner_player is player1 else 2, game.hash()))
+
+        file.seek(0)
+        for record, (seat, key) in zip(read_records(file), results):
+            self.assertEqual(winner(record), seat)
+            positions = list(replay(record))
+            final, last_move = positions[-1]
+            self.assertIsNone(last_move)
+            self.assertEqual(final.hash(), key)
+            self.assertEqual(len(positions), len(record.moves) + 1)
+        file.seek(0)
+        stats = summarize(file)
+        self.assertEqual(stats["games"], 4)
+        self.assertEqual(stats["first_player_wins"], sum(seat == 1 for seat, _ in results))
+
+    def test_replay_moves_are_legal(self):
+        rng = random.Random(1)
+        file = io.BytesIO()
+        writer = RecordWriter(file)
+        writer.write(9, 9, random_game(rng, 9, 9), "illegal move")
+        file.seek(0)
+        for game, move in replay(next(read_records(file)), isolation.Board):
+            if move is None:
+                self.assertEqual(game.get_legal_moves(), [])
+            else:
+                self.assertIn(move, game.get_legal_moves())
+
+    def test_invalid_files(self):
+        with self.assertRaises(ValueError):
+            list(read_records(io.BytesIO(b"NOTGAMES")))
+        file = io.BytesIO()
+        RecordWriter(file).write(7, 7, random_game(random.Random(2), 7, 7), "illegal move")
+        with self.assertRaises(ValueError):
+            list(read_records(io.BytesIO(file.getvalue()[:-1])))
+        with self.assertRaises(ValueError):
+            RecordWriter(io.BytesIO()).write(7, 7, [(0, 0), (6, 6), (0, 1)], "illegal move")
+
+    def test_isoviz_export(self):
+        file = io.BytesIO()
+        moves = random_game(random.Random(3), 7, 7)
+        RecordWriter(file).write(7, 7, moves, "illegal move")
+        file.seek(0)
+        exported = to_isoviz(next(read_records(file)))
+        self.assertEqual(exported, [list(move) for move in moves])
+        file = io.BytesIO()
+        RecordWriter(file).write(9, 9, random_game(random.Random(3), 9, 9), "illegal move")
+        file.seek(0)
+        with self.assertRaises(ValueError):
+            to_isoviz(next(read_records(file)))
+
+
+if __name__ == '__main__':
+    unittest.main()
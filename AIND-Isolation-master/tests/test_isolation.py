@@ -0,0 +1,64 @@
+"""Unit tests for the isolation game engines"""
+
+import random
+import unittest
+
+import isolation
+
+
+class PushPopMoveTest(unittest.TestCase):
+    """Moves applied with push_move() are undone exactly by pop_move()"""
+
+    def setUp(self):
+        self.player1 = "Player1"
+        self.player2 = "Player2"
+
+    def check_push_pop(self, board_class):
+        rng = random.Random(1)
+        game = board_class(self.player1, self.player2)
+        snapshots = []
+        while game.get_legal_moves():
+            snapshots.append((game.to_string(), game.hash(), game.move_count,
+                              game.active_player, sorted(game.get_legal_moves())))
+            move = rng.choice(sorted(game.get_legal_moves()))
+            expected = game.forecast_move(move)
+            game.push_move(move)
+            self.assertEqual(expected.to_string(), game.to_string())
+            self.assertEqual(expected.hash(), game.hash())
+
+        while snapshots:
+            game.pop_move()
+            self.assertEqual(snapshots.pop(), (game.to_string(), game.hash(), game.move_count,
+                                               game.active_player, sorted(game.get_legal_moves())))
+
+    def test_board_push_pop(self):
+        self.check_push_pop(isolation.Board)
+
+    def test_bitboard_push_pop(self):
+        self.check_push_pop(isolation.BitBoard)
+
+
+class ZobristHashTest(unittest.TestCase):
+    """Board hashes identify positions regardless of the move order"""
+
+    def check_transposition(self, board_class):
+        first = board_class("Player1", "Player2")
+        second = board_class("Player1", "Player2")
+        for move in [(0, 0), (3, 3), (2, 1), (1, 2)]:
+            first.apply_move(move)
+        for move in [(3, 3), (0, 0), (2, 1), (1, 2)]:
+            second.apply_move(move)
+        self.assertEqual(first.to_string(), second.to_string())
+        self.assertEqual(first.hash(), second.hash())
+        self.assertEqual(first.hash(), first.copy().hash())
+        self.assertNotEqual(first.hash(), first.forecast_move((0, 2)).hash())
+
+    def test_board_transposition(self):
+        self.check_transposition(isolation.Board)
+
+    def test_bitboard_transposition(self):
+        self.check_transposition(isolation.BitBoard)
+
+
+if __name__ == '__main__':
+    unittest.main()
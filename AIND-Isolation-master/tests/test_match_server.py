@@ -0,0 +1,99 @@
+"""Unit tests for the concurrent match server"""
+
+import asyncio
+import random
+import unittest
+
+import isolation
+import game_agent
+
+from match_server import MatchServer, PooledAgent, fair_pairings, play_game
+from sample_players import GreedyPlayer, RandomPlayer, improved_score
+from tournament import Agent
+
+
+class FirstMovePlayer:
+    """Player that plays its first legal move. """
+
+    async def get_move(self, game, time_limit):
+        moves = sorted(game.get_legal_moves())
+        return (moves[0] if moves else (-1, -1)), time_limit
+
+
+class SlowPlayer:
+    """Synchronous player that overruns its time limit. """
+
+    def get_move(self, game, time_left):
+        while time_left() > -1:
+            pass
+        return game.get_legal_moves()[0]
+
+
+def check_game(test, result, width=7, height=7):
+    """Replay a game result and check that it follows the rules. """
+    game = isolation.Board("Player1", "Player2", width, height)
+    for i, move in enumerate(result.moves):
+        if i >= 2:
+            test.assertIn(move, game.get_legal_moves())
+        game.apply_move(move)
+    loser = 1 + game.move_count % 2
+    test.assertEqual(result.winner, 3 - loser)
+    if result.termination == "illegal move":
+        test.assertEqual(game.get_legal_moves(), [])
+
+
+class MatchServerTest(unittest.TestCase):
+
+    def test_games_follow_the_rules(self):
+        agents = [Agent(game_agent.AlphaBetaPlayer(score_fn=improved_score), "AB_Improved"),
+                  Agent(RandomPlayer(), "Random"), Agent(GreedyPlayer(), "Greedy")]
+        pairings = fair_pairings(0, [1, 2], 3, random.Random(0))
+        self.assertEqual(len(pairings), 12)
+        with MatchServer(agents, concurrency=8, time_limit=50, seed=0) as server:
+            results, stats = server.run(pairings)
+        self.assertEqual(stats["games"], 12)
+        self.assertEqual(stats["moves"], sum(len(r.moves) for r in results))
+        for (first, second, opening), result in zip(pairings, results):
+            self.assertEqual((result.first, result.second), (first, second))
+            self.assertEqual(result.moves[:2], opening)
+            check_game(self, result)
+        # One search per move after the opening, plus the losing turn
+        self.assertEqual(stats["searches"], stats["moves"] - len(results))
+        # The searches of the concurrent games are batched together
+        self.assertGreater(stats["average_batch"], 1)
+
+    def test_coroutine_agents(self):
+        agents = [Agent(RandomPlayer(), "Random")]
+        with MatchServer(agents) as server:
+            async def play():
+                return await play_game(FirstMovePlayer(), PooledAgent(server.batcher, 0),
+                                       [(3, 3), (0, 0)])
+
+            winner, moves, termination = asyncio.run(play())
+        self.assertEqual(termination, "illegal move")
+        game = isolation.Board("Player1", "Player2")
+        for move in moves:
+            game.apply_move(move)
+        self.assertEqual(game.get_legal_moves(), [])
+        self.assertEqual(winner, 1 if len(moves) % 2 else 2)
+
+    def test_timeouts(self):
+        agents = [Agent(SlowPlayer(), "Slow"), Agent(RandomPlayer(), "Random")]
+        with MatchServer(agents, time_limit=5) as server:
+            results, _ = server.run([(0, 1, [(3, 3), (0, 0)]), (1, 0, [(3, 3), (0, 0)])])
+        self.assertEqual([r.termination for r in results], ["timeout", "timeout"])
+        self.assertEqual([r.winner for r in results], [2, 1])
+
+    def test_worker_processes(self):
+        agents = [Agent(GreedyPlayer(), "Greedy"), Agent(RandomPlayer(), "Random")]
+        pairings = fair_pairings(0, [1], 4, random.Random(1))
+        with MatchServer(agents, workers=2, batch_size=4, seed=1) as server:
+            results, stats = server.run(pairings)
+        self.assertEqual(len(results), 8)
+        for result in results:
+            check_game(self, result)
+        self.assertLessEqual(stats["average_batch"], 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
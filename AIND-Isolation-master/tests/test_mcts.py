@@ -0,0 +1,67 @@
+"""Unit tests for the Monte Carlo tree search agent"""
+
+import random
+import time
+import unittest
+
+import isolation
+
+from mcts import MCTSPlayer
+
+
+def deadline_timer(seconds):
+    deadline = time.time() + seconds
+    return lambda: 1000 * (deadline - time.time())
+
+
+class MCTSPlayerTest(unittest.TestCase):
+
+    def setUp(self):
+        random.seed(0)
+
+    def test_returns_legal_move_in_time(self):
+        player = MCTSPlayer()
+        game = isolation.Board(player, "Opponent")
+        game.apply_move((2, 3))
+        game.apply_move((0, 5))
+        time_left = deadline_timer(0.1)
+        move = player.get_move(game, time_left)
+        self.assertIn(move, game.get_legal_moves())
+        self.assertGreater(time_left(), 0)
+        self.assertGreater(player.playouts, 0)
+        self.assertGreater(player.playouts_per_second, 0)
+
+    def test_placement_and_no_moves(self):
+        player = MCTSPlayer()
+        game = isolation.Board(player, "Opponent", 5, 5)
+        self.assertIn(player.get_move(game, deadline_timer(0.05)), game.get_legal_moves())
+        game = isolation.Board(player, "Opponent", 3, 3)
+        game.apply_move((1, 1))
+        game.apply_move((0, 0))
+        self.assertEqual(player.get_move(game, deadline_timer(0.05)), (-1, -1))
+
+    def test_finds_winning_move(self):
+        # Moving to (1, 2) leaves the opponent on (0, 0) without moves
+        player = MCTSPlayer()
+        game = isolation.Board(player, "Opponent", 5, 5)
+        for move in [(3, 3), (0, 2), (4, 1), (2, 1), (2, 0), (0, 0)]:
+            game.apply_move(move)
+        self.assertEqual(player.get_move(game, deadline_timer(0.1)), (1, 2))
+
+    def test_tree_reuse(self):
+        player = MCTSPlayer()
+        game = isolation.Board(player, "Opponent")
+        game.apply_move((3, 3))
+        game.apply_move((0, 0))
+        game.apply_move(player.get_move(game, deadline_timer(0.2)))
+        # Reply with the opponent move that was searched the most
+        reply = max(player._root.children, key=lambda child: child.visits)
+        visits = reply.visits
+        game.apply_move(divmod(reply.move, game.height)[::-1])
+        player.get_move(game, deadline_timer(0.05))
+        self.assertEqual(player.tree_reuses, 1)
+        self.assertGreater(reply.visits, visits)
+
+
+if __name__ == '__main__':
+    unittest.main()
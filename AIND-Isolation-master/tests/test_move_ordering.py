@@ -0,0 +1,46 @@
+"""Unit tests for alpha-beta move ordering"""
+
+import unittest
+
+import isolation
+from move_ordering import MoveOrderer, mobility
+
+
+class MoveOrdererTest(unittest.TestCase):
+
+    def setUp(self):
+        self.game = isolation.BitBoard("Player1", "Player2")
+        self.game.apply_move((3, 3))
+        self.game.apply_move((0, 0))
+        self.moves = self.game.get_legal_moves()
+
+    def test_hash_move_then_killers_then_history(self):
+        orderer = MoveOrderer()
+        orderer.record_cutoff(self.game, self.moves[3], 2, 1)
+        orderer.record_cutoff(self.game, self.moves[4], 1, 0)
+        # moves[5] only has a history score for the other side to move
+        orderer.history[1][self.moves[5]] = 100
+        orderer.killers = {}
+        orderer.record_cutoff(self.game, self.moves[6], 1, 0)
+        ordered = orderer.order(self.game, self.moves, hash_move=self.moves[7])
+        self.assertEqual(ordered[:4], [self.moves[7], self.moves[6], self.moves[3], self.moves[4]])
+        self.assertEqual(sorted(ordered), sorted(self.moves))
+        self.assertEqual(orderer.cutoffs, 3)
+        self.assertAlmostEqual(orderer.first_move_cutoff_rate(), 2 / 3)
+
+    def test_mobility_breaks_ties(self):
+        orderer = MoveOrderer(killer_slots=0, use_history=False, use_mobility=True)
+        ordered = orderer.order(self.game, self.moves)
+        counts = [mobility(self.game, m) for m in ordered]
+        self.assertEqual(counts, sorted(counts, reverse=True))
+
+    def test_new_search_clears_killers(self):
+        orderer = MoveOrderer()
+        orderer.record_cutoff(self.game, self.moves[2], 4, 0)
+        orderer.new_search()
+        self.assertEqual(orderer.killers, {})
+        self.assertEqual(orderer.history[0][self.moves[2]], 8)
+
+
+if __name__ == '__main__':
+    unittest.main()
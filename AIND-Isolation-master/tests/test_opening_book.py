@@ -0,0 +1,116 @@
+"""Unit tests for the opening book"""
+
+import os
+import pickle
+import tempfile
+import time
+import unittest
+
+from copy import deepcopy
+
+import isolation
+import game_agent
+import competition_agent
+
+from opening_book import OpeningBook, build_book, canonical_key, symmetries
+
+
+class OpeningBookTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpdir = tempfile.TemporaryDirectory()
+        cls.path = os.path.join(cls.tmpdir.name, "book.bin")
+        cls.count = build_book(cls.path, max_plies=3, depth=2, width=5, height=5)
+        cls.book = OpeningBook(cls.path)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.book.close()
+        cls.tmpdir.cleanup()
+
+    def test_symmetries_preserve_knight_moves(self):
+        for width, height in [(5, 5), (7, 7), (4, 6)]:
+            perms = symmetries(width, height)
+            self.assertEqual(len(perms), 8 if width == height else 4)
+            board = isolation.BitBoard("Player1", "Player2", width, height)
+            for perm in perms:
+                self.assertEqual(sorted(perm), list(range(width * height)))
+                for idx, mask in enumerate(board._masks):
+                    image = sum(1 << perm[i] for i in range(width * height) if mask >> i & 1)
+                    self.assertEqual(image, board._masks[perm[idx]])
+
+    def test_canonical_key_is_shared_by_symmetric_positions(self):
+        game = isolation.Board("Player1", "Player2")
+        for move in [(0, 1), (3, 3), (2, 2)]:
+            game.apply_move(move)
+        mirror = isolation.Board("Player1", "Player2")
+        for move in [(6, 1), (3, 3), (4, 2)]:
+            mirror.apply_move(move)
+        rotated = isolation.Board("Player1", "Player2")
+        for move in [(1, 6), (3, 3), (2, 4)]:
+            rotated.apply_move(move)
+        key = canonical_key(game)[0]
+        self.assertEqual(key, canonical_key(mirror)[0])
+        self.assertEqual(key, canonical_key(rotated)[0])
+        self.assertNotEqual(game.hash(), mirror.hash())
+
+    def test_book_covers_every_opening_position(self):
+        # 1 empty board, 6 distinct first placements and 85 distinct replies
+        # on 5x5
+        self.assertEqual(self.count, 92)
+        self.assertEqual(len(self.book), 92)
+        game = isolation.Board("Player1", "Player2", 5, 5)
+        for first in game.get_legal_moves():
+            child = game.forecast_move(first)
+            for second in child.get_legal_moves():
+                grandchild = child.forecast_move(second)
+                for board in (game, child, grandchild):
+                    move, _, depth = self.book.probe(board)
+                    self.assertIn(move, board.get_legal_moves())
+                    self.assertEqual(depth, 2)
+                self.assertIsNone(self.book.probe(grandchild.forecast_move(
+                    grandchild.get_legal_moves()[0])))
+        self.assertIsNone(self.book.probe(isolation.Board("Player1", "Player2")))
+
+    def test_book_moves_follow_symmetry(self):
+        first = isolation.Board("Player1", "Player2", 5, 5)
+        first.apply_move((0, 1))
+        mirror = isolation.Board("Player1", "Player2", 5, 5)
+        mirror.apply_move((1, 0))
+        r, c = self.book.probe(first)[0]
+        self.assertEqual(self.book.probe(mirror)[0], (c, r))
+
+    def test_book_survives_pickling(self):
+        copy = pickle.loads(pickle.dumps(self.book))
+        game = isolation.Board("Player1", "Player2", 5, 5)
+        self.assertEqual(copy.probe(game), self.book.probe(game))
+        copy.close()
+        # Copies of a player share the book
+        player = game_agent.AlphaBetaPlayer(book=self.book)
+        self.assertIs(deepcopy(player).book, self.book)
+
+    def test_players_use_book_moves(self):
+        timeout = lambda: -1.
+        for player in (game_agent.AlphaBetaPlayer(book=self.book),
+                       competition_agent.CustomPlayer(book=self.book)):
+            game = isolation.Board(player, "Opponent", 5, 5)
+            # The search would time out immediately; only the book can
+            # provide the move
+            self.assertEqual(player.get_move(game, timeout), self.book.probe(game)[0])
+
+
+class CustomPlayerTest(unittest.TestCase):
+
+    def test_custom_player_finds_legal_moves(self):
+        player = competition_agent.CustomPlayer()
+        game = isolation.Board(player, "Opponent")
+        game.apply_move((2, 3))
+        game.apply_move((0, 5))
+        deadline = time.time() + 0.1
+        move = player.get_move(game, lambda: 1000 * (deadline - time.time()))
+        self.assertIn(move, game.get_legal_moves())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+"""Unit tests for the search benchmark suite"""
+
+import unittest
+
+import isolation
+
+from benchmarks import search_suite
+
+
+class SearchSuiteTest(unittest.TestCase):
+
+    def setUp(self):
+        self.corpus = search_suite.load_corpus()
+
+    def test_corpus_positions_are_playable(self):
+        sizes = {(p["width"], p["height"]) for p in self.corpus}
+        self.assertEqual(sizes, set(search_suite.SIZES))
+        for position in self.corpus:
+            game = search_suite.setup(position, "Player", isolation.Board)
+            self.assertEqual(game.active_player, "Player")
+            self.assertGreater(len(game.get_legal_moves()), 1)
+
+    def test_alphabeta_agrees_with_minimax(self):
+        # Without move ordering alpha-beta breaks ties exactly like minimax
+        configs = {name: search_suite.CONFIGS[name] for name in ("minimax", "alphabeta")}
+        results = search_suite.run_suite(self.corpus[::5], 3, isolation.BitBoard, configs)
+        summary = search_suite.summarize(results)
+        self.assertEqual(summary["alphabeta"]["agreement"], 1.)
+        for result in results:
+            self.assertEqual(len(result["time_to_depth"]),
+                             1 if result["config"] == "minimax" else 3)
+
+        report = {"summary": summary, "results": results}
+        comparison = search_suite.compare(report, report)
+        self.assertEqual(comparison["minimax"]["nps_ratio"], 1.)
+        self.assertEqual(comparison["minimax"]["changed_moves"], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
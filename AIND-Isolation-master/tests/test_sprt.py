@@ -0,0 +1,66 @@
+"""Unit tests for the sequential probability ratio test"""
+
+import unittest
+
+from sprt import SPRT, elo_difference, expected_score
+
+
+class SPRTTest(unittest.TestCase):
+
+    def test_elo_conversions(self):
+        self.assertAlmostEqual(expected_score(0), 0.5)
+        self.assertAlmostEqual(elo_difference(0.5), 0)
+        self.assertAlmostEqual(elo_difference(expected_score(120)), 120)
+
+    def test_accepts_h1_for_stronger_agent(self):
+        sprt = SPRT(elo0=0, elo1=50)
+        while sprt.status() is None:
+            for score in (1, 1, 0.5, 0):
+                sprt.add_pair(score)
+        self.assertEqual(sprt.status(), "H1")
+        elo, margin = sprt.elo()
+        self.assertAlmostEqual(elo, elo_difference(0.625))
+        self.assertGreater(elo - margin, 0)
+
+    def test_accepts_h0_for_equal_agents(self):
+        sprt = SPRT(elo0=0, elo1=50)
+        while sprt.status() is None:
+            for score in (1, 0.5, 0.5, 0):
+                sprt.add_pair(score)
+        self.assertEqual(sprt.status(), "H0")
+        elo, margin = sprt.elo()
+        self.assertAlmostEqual(elo, 0)
+        self.assertGreater(margin, 0)
+
+    def test_accepts_h1_when_every_pair_is_won(self):
+        sprt = SPRT(elo0=0, elo1=50)
+        while sprt.status() is None:
+            sprt.add_pair(1)
+        self.assertEqual(sprt.status(), "H1")
+        self.assertLess(sprt.num_pairs, 10)
+
+    def test_accepts_h0_when_every_pair_is_lost(self):
+        sprt = SPRT(elo0=0, elo1=50)
+        while sprt.status() is None:
+            sprt.add_pair(0)
+        self.assertEqual(sprt.status(), "H0")
+
+    def test_split_pairs_continue(self):
+        sprt = SPRT(elo0=0, elo1=50)
+        sprt.add_pair(0.5)
+        self.assertIsNone(sprt.status())
+        while sprt.status() is None:
+            sprt.add_pair(0.5)
+        # Equal agents splitting every pair eventually accept H0
+        self.assertEqual(sprt.status(), "H0")
+
+    def test_needs_several_pairs_before_deciding(self):
+        sprt = SPRT()
+        sprt.add_pair(1)
+        sprt.add_pair(1)
+        self.assertIsNone(sprt.status())
+        self.assertEqual(sprt.elo(), (float("inf"), float("inf")))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,158 @@
+"""Unit tests for the symmetry-canonical position keys"""
+
+import random
+import unittest
+
+import isolation
+import game_agent
+
+from isolation.isolation import zobrist_keys
+from isolation.symmetry import (canonical_key, distinct_placements, restore_move,
+                                symmetries, transform_move)
+from sample_players import improved_score
+
+
+def random_positions(count, seed, width=7, height=7, board_class=isolation.BitBoard):
+    """Yield boards from random games, including their final positions. """
+    rng = random.Random(seed)
+    for _ in range(count):
+        game = board_class("Player1", "Player2", width, height)
+        while True:
+            yield game
+            moves = game.get_legal_moves()
+            if not moves:
+                break
+            game = game.forecast_move(rng.choice(sorted(moves)))
+
+
+def reference_hash(game):
+    """Return the Zobrist hash of a BitBoard computed from scratch. """
+    blocked_keys, p1_keys, p2_keys, side_key = zobrist_keys(game.width, game.height)
+    key = side_key if game.move_count % 2 else 0
+    for idx in range(game.width * game.height):
+        if game._blocked >> idx & 1:
+            key ^= blocked_keys[idx]
+    if game._p1_loc is not None:
+        key ^= p1_keys[game._p1_loc]
+    if game._p2_loc is not None:
+        key ^= p2_keys[game._p2_loc]
+    return key
+
+
+def transformed(game, t):
+    """Return a copy of `game` with every cell moved by symmetry `t`. """
+    perm = symmetries(game.width, game.height)[t]
+    board = game.copy()
+    board._blocked = sum(1 << perm[idx] for idx in range(game.width * game.height)
+                         if game._blocked >> idx & 1)
+    if game._p1_loc is not None:
+        board._p1_loc = perm[game._p1_loc]
+    if game._p2_loc is not None:
+        board._p2_loc = perm[game._p2_loc]
+    board._hash = reference_hash(board)
+    return board
+
+
+class SymmetryTest(unittest.TestCase):
+
+    def test_key_is_smallest_symmetric_hash(self):
+        for width, height in ((7, 7), (5, 8)):
+            for game in random_positions(3, 0, width, height):
+                key, t = canonical_key(game)
+                self.assertEqual(game.hash(), reference_hash(game))
+                hashes = [transformed(game, s).hash()
+                          for s in range(len(symmetries(width, height)))]
+                self.assertEqual(key, min(hashes))
+                self.assertEqual(key, hashes[t])
+
+    def test_board_and_bitboard_keys_match(self):
+        rng = random.Random(1)
+        for _ in range(3):
+            game = isolation.Board("Player1", "Player2")
+            bitboard = isolation.BitBoard("Player1", "Player2")
+            while True:
+                self.assertEqual(canonical_key(game), canonical_key(bitboard))
+                moves = sorted(game.get_legal_moves())
+                if not moves:
+                    break
+                move = rng.choice(moves)
+                game.apply_move(move)
+                bitboard.apply_move(move)
+
+    def test_symmetric_positions_share_key(self):
+        for game in random_positions(3, 2):
+            key = canonical_key(game)[0]
+            for t in range(8):
+                self.assertEqual(canonical_key(transformed(game, t))[0], key)
+
+    def test_moves_follow_the_canonical_frame(self):
+        for width, height in ((7, 7), (4, 6)):
+            for game in random_positions(2, 3, width, height):
+                t = canonical_key(game)[1]
+                canonical = transformed(game, t)
+                moves = game.get_legal_moves()
+                images = [transform_move(move, t, width, height) for move in moves]
+                self.assertEqual(sorted(images), sorted(canonical.get_legal_moves()))
+                self.assertEqual([restore_move(move, t, width, height) for move in images],
+                                 moves)
+        self.assertEqual(transform_move((-1, -1), 3, 7, 7), (-1, -1))
+        self.assertIsNone(restore_move(None, 3, 7, 7))
+
+    def test_search_with_symmetric_table(self):
+        results = []
+        for plies in (0, 4):
+            player = game_agent.AlphaBetaPlayer(score_fn=improved_score, tt_size=2 ** 16,
+                                                symmetry_plies=plies)
+            game = isolation.BitBoard(player, "Player2", 5, 5)
+            game.apply_move((2, 2))
+            game.apply_move((1, 1))
+            player.time_left = lambda: float("inf")
+            player.start_search(game)
+            move, value = player.search_root(game, 5)
+            self.assertIn(move, game.get_legal_moves())
+            _, _, _, probes, hits = player.counters()
+            results.append((value, hits / probes))
+        # Both searches find the same value, and the symmetric table finds
+        # more of the positions it has already searched
+        self.assertEqual(results[0][0], results[1][0])
+        self.assertGreater(results[1][1], results[0][1])
+
+    def test_distinct_placements(self):
+        for width, height in ((7, 7), (5, 8), (15, 15)):
+            for first in (None, (0, 0), (2, 3), (height // 2, width // 2)):
+                game = isolation.BitBoard("Player1", "Player2", width, height)
+                if first is not None:
+                    game.apply_move(first)
+                moves = game.get_legal_moves()
+                kept = distinct_placements(game, moves)
+                keys = [canonical_key(game.forecast_move(move))[0] for move in kept]
+                # One move for every class of symmetric positions
+                self.assertEqual(len(set(keys)), len(keys))
+                self.assertEqual(set(keys), {canonical_key(game.forecast_move(move))[0]
+                                             for move in moves})
+        game = isolation.BitBoard("Player1", "Player2", 8, 8)
+        self.assertEqual(len(distinct_placements(game, game.get_legal_moves())), 10)
+        game.apply_move((0, 0))
+        game.apply_move((7, 7))
+        moves = game.get_legal_moves()
+        self.assertEqual(distinct_placements(game, moves), moves)
+
+    def test_search_with_symmetric_placements(self):
+        for first in ([], [(3, 3)], [(1, 2)]):
+            results = []
+            for symmetric in (False, True):
+                player = game_agent.AlphaBetaPlayer(score_fn=improved_score,
+                                                    symmetric_placements=symmetric)
+                players = [player, "Player2"] if not first else ["Player1", player]
+                game = isolation.BitBoard(*players)
+                for move in first:
+                    game.apply_move(move)
+                player.time_left = lambda: float("inf")
+                player.start_search(game)
+                move, value = player.search_root(game, 3)
+                results.append((value, player.nodes))
+            self.assertEqual(results[0][0], results[1][0])
+            self.assertLessEqual(results[1][1], results[0][1])
+
+if __name__ == '__main__':
+    unittest.main()
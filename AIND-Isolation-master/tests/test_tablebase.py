@@ -0,0 +1,144 @@
+"""Unit tests for the endgame tablebase"""
+
+import os
+import pickle
+import random
+import tempfile
+import unittest
+
+from copy import deepcopy
+
+import isolation
+import game_agent
+
+from isolation.endgame import board_masks, reachable
+from sample_players import improved_score
+from tablebase import HEADER, Tablebase, build_tablebase, layer_offsets, subset_rank
+
+
+def solve(game):
+    """Return (whether the active player wins, plies to the end) by minimax. """
+    moves = game.get_legal_moves()
+    if not moves:
+        return False, 0
+    results = [solve(game.forecast_move(move)) for move in moves]
+    losses = [plies for wins, plies in results if not wins]
+    if losses:
+        return True, 1 + min(losses)
+    return False, 1 + max(plies for _, plies in results)
+
+
+def endgame_positions(board_class, width, height, tablebase, count, seed=0,
+                      players=("Player1", "Player2")):
+    """Return positions of random games covered by the tablebase. """
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        game = board_class(*players, width=width, height=height)
+        while True:
+            moves = game.get_legal_moves()
+            if not moves:
+                break
+            if tablebase.probe(game) is not None:
+                positions.append(game.copy())
+                break
+            game.apply_move(rng.choice(moves))
+    return positions
+
+
+class TablebaseTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpdir = tempfile.TemporaryDirectory()
+        cls.path = os.path.join(cls.tmpdir.name, "tablebase.bin")
+        cls.count = build_tablebase(cls.path, cells=3, width=5, height=5)
+        cls.tablebase = Tablebase(cls.path)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tablebase.close()
+        cls.tmpdir.cleanup()
+
+    def test_layout(self):
+        self.assertEqual(self.count, 1 + 25 * 4 + 300 * 16 + 2300 * 64)
+        self.assertEqual(layer_offsets(5, 5, 3)[-1], self.count)
+        self.assertEqual(len(self.tablebase), self.count)
+        self.assertEqual(os.path.getsize(self.path), HEADER.size + self.count)
+        # Ranks enumerate the subsets of each size without gaps
+        ranks = sorted(subset_rank((a, b)) for b in range(25) for a in range(b))
+        self.assertEqual(ranks, list(range(300)))
+
+    def test_probe_matches_minimax(self):
+        for board_class in (isolation.Board, isolation.BitBoard):
+            for game in endgame_positions(board_class, 5, 5, self.tablebase, 150):
+                self.assertEqual(self.tablebase.probe(game), solve(game))
+
+    def test_positions_out_of_the_table(self):
+        game = isolation.BitBoard("Player1", "Player2", 5, 5)
+        self.assertIsNone(self.tablebase.probe(game))
+        game.apply_move((2, 2))
+        self.assertIsNone(self.tablebase.probe(game))
+        game.apply_move((0, 0))
+        self.assertIsNone(self.tablebase.probe(game))
+        self.assertIsNone(self.tablebase.probe(isolation.BitBoard("Player1", "Player2")))
+
+    def test_best_move(self):
+        for game in endgame_positions(isolation.BitBoard, 5, 5, self.tablebase, 100, seed=1):
+            wins, plies = self.tablebase.probe(game)
+            move = self.tablebase.best_move(game)
+            self.assertIn(move, game.get_legal_moves())
+            self.assertEqual(solve(game.forecast_move(move)), (not wins, plies - 1))
+
+    def test_search_uses_tablebase(self):
+        player = game_agent.AlphaBetaPlayer(score_fn=improved_score, tablebase=self.tablebase)
+        for game in endgame_positions(isolation.BitBoard, 5, 5, self.tablebase, 20, seed=2,
+                                      players=(player, "Opponent")):
+            wins, _ = self.tablebase.probe(game)
+            move = player.get_move(game, lambda: 1000.)
+            self.assertEqual(player.search_stats["source"], "tablebase")
+            if wins:
+                self.assertFalse(solve(game.forecast_move(move))[0])
+
+    def test_leaf_probes(self):
+        # Positions with 4 open cells within reach are not in the table but
+        # all their children are, so a one-ply search returns the exact value
+        player = game_agent.AlphaBetaPlayer(score_fn=improved_score, tablebase=self.tablebase)
+        player.time_left = lambda: 1000.
+        rng = random.Random(3)
+        tested = 0
+        while tested < 10:
+            game = isolation.BitBoard(player, "Opponent", 5, 5)
+            while game.get_legal_moves():
+                free, active, inactive = board_masks(game)
+                if active is not None and inactive is not None:
+                    region = reachable(game._masks, free, active) | reachable(
+                        game._masks, free, inactive)
+                    if region.bit_count() == 4 and game.active_player is player:
+                        break
+                game.apply_move(rng.choice(game.get_legal_moves()))
+            else:
+                continue
+            self.assertIsNone(self.tablebase.probe(game))
+            value = player.alpha_beta_max_value(game, 1, float("-inf"), float("inf"))
+            self.assertEqual(value, float("inf") if solve(game)[0] else float("-inf"))
+            tested += 1
+        self.assertGreater(player.tablebase_hits, 0)
+
+    def test_pickle_and_invalid_file(self):
+        copy = pickle.loads(pickle.dumps(self.tablebase))
+        game = endgame_positions(isolation.BitBoard, 5, 5, self.tablebase, 1, seed=4)[0]
+        self.assertEqual(copy.probe(game), self.tablebase.probe(game))
+        copy.close()
+        # Copies of a player share the tablebase
+        player = game_agent.AlphaBetaPlayer(tablebase=self.tablebase)
+        self.assertIs(deepcopy(player).tablebase, self.tablebase)
+        path = os.path.join(self.tmpdir.name, "invalid.bin")
+        with open(path, "wb") as f:
+            f.write(b"\0" * 64)
+        with self.assertRaises(ValueError):
+            Tablebase(path)
+
+
+if __name__ == '__main__':
+    unittest.main()
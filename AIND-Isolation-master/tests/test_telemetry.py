@@ -0,0 +1,88 @@
+"""Unit tests for the search statistics and game telemetry"""
+
+import io
+import json
+import unittest
+
+import isolation
+import game_agent
+
+from sample_players import improved_score
+from telemetry import JsonlWriter
+
+
+class SearchStatsTest(unittest.TestCase):
+
+    def test_alphabeta_search_stats(self):
+        player = game_agent.AlphaBetaPlayer(score_fn=improved_score, tt_size=2 ** 12)
+        game = isolation.Board(player, "Player2")
+        game.apply_move((3, 3))
+        game.apply_move((2, 2))
+        player.search_to_depth(game, 1)  # Warm up the table
+        budget = iter(range(2000, 0, -1))
+        player.get_move(game, lambda: next(budget, -1))
+
+        stats = player.search_stats
+        self.assertEqual(stats["source"], "search")
+        self.assertEqual(stats["depth"], player.completed_depths[-1])
+        self.assertEqual(len(stats["iteration_nodes"]), stats["depth"])
+        self.assertEqual(len(stats["iteration_ms"]), stats["depth"])
+        self.assertLessEqual(sum(stats["iteration_nodes"]), stats["nodes"])
+        self.assertGreater(stats["leaves"], 0)
+        self.assertLess(stats["leaves"], stats["nodes"])
+        self.assertGreater(stats["cutoffs"], 0)
+        self.assertGreater(stats["tt_probes"], 0)
+        self.assertLessEqual(stats["tt_hits"], stats["tt_probes"])
+        nodes = stats["iteration_nodes"]
+        self.assertEqual(stats["branching_factor"], nodes[-1] / nodes[-2])
+
+    def test_minimax_search_stats(self):
+        player = game_agent.MinimaxPlayer(search_depth=2, score_fn=improved_score)
+        game = isolation.Board(player, "Player2")
+        game.apply_move((3, 3))
+        game.apply_move((2, 2))
+        player.get_move(game, lambda: 1000.)
+
+        stats = player.search_stats
+        self.assertEqual(stats["depth"], 2)
+        # Every second-ply node is a leaf
+        replies = sum(len(game.forecast_move(m).get_legal_moves())
+                      for m in game.get_legal_moves())
+        self.assertEqual(stats["leaves"], replies)
+        self.assertEqual(stats["nodes"], replies + len(game.get_legal_moves()))
+
+
+class GameTelemetryTest(unittest.TestCase):
+
+    def test_play_records_moves_and_result(self):
+        player1 = game_agent.AlphaBetaPlayer(score_fn=improved_score)
+        player2 = game_agent.MinimaxPlayer(score_fn=improved_score)
+        game = isolation.Board(player1, player2, 5, 5)
+        records = []
+        winner, history, termination = game.play(time_limit=50, telemetry=records.append)
+
+        moves, end = records[:-1], records[-1]
+        self.assertEqual(len(moves), len(history) + 1)
+        self.assertEqual([r["move"] for r in moves[:-1]], [tuple(m) for m in history])
+        self.assertEqual([r["player"] for r in moves],
+                         [1 + i % 2 for i in range(len(moves))])
+        self.assertTrue(all(r["event"] == "move" for r in moves))
+        # Players report no search when they have no legal moves
+        self.assertTrue(all(("nodes" in r) == (r["legal_moves"] > 0) for r in moves))
+        self.assertEqual(end["event"], "end")
+        self.assertEqual(end["termination"], termination)
+        self.assertEqual(end["winner"], 1 if winner is player1 else 2)
+
+    def test_jsonl_writer(self):
+        file = io.StringIO()
+        writer = JsonlWriter(file, run="baseline").bind(game=3)
+        writer({"event": "move", "move": (1, 2), "game": 4})
+        writer({"event": "end"})
+        lines = [json.loads(line) for line in file.getvalue().splitlines()]
+        self.assertEqual(lines, [
+            {"run": "baseline", "game": 4, "event": "move", "move": [1, 2]},
+            {"run": "baseline", "game": 3, "event": "end"}])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+"""Unit tests for the search time manager"""
+
+import time
+import unittest
+
+import isolation
+import game_agent
+
+from time_manager import TimeManager
+
+
+class TimeManagerTest(unittest.TestCase):
+
+    def test_predicts_from_branching_factor(self):
+        manager = TimeManager()
+        self.assertIsNone(manager.predicted_time())
+        manager.iteration_done(100, 2.)
+        self.assertTrue(manager.next_iteration_fits(0.))
+        manager.iteration_done(400, 8.)
+        self.assertEqual(manager.predicted_time(), 32.)
+        self.assertTrue(manager.next_iteration_fits(40.))
+        self.assertFalse(manager.next_iteration_fits(20.))
+        self.assertEqual(manager.skipped_iterations, 1)
+        manager.start()
+        self.assertIsNone(manager.predicted_time())
+
+    def test_prediction_can_be_disabled(self):
+        manager = TimeManager(predict=False)
+        manager.iteration_done(100, 2.)
+        manager.iteration_done(400, 8.)
+        self.assertTrue(manager.next_iteration_fits(0.))
+
+    def test_calibrates_check_interval(self):
+        manager = TimeManager(max_delay=2.)
+        self.assertEqual(manager.check_interval, 1)
+        manager.search_done(50000, 100.)
+        self.assertEqual(manager.nodes_per_second, 500000.)
+        self.assertEqual(manager.check_interval, 1000)
+        fixed = TimeManager(check_interval=10)
+        fixed.search_done(50000, 100.)
+        self.assertEqual(fixed.check_interval, 10)
+
+
+class TimeManagedSearchTest(unittest.TestCase):
+
+    def test_player_returns_in_time(self):
+        manager = TimeManager()
+        player = game_agent.AlphaBetaPlayer(time_manager=manager)
+        game = isolation.BitBoard(player, "Opponent")
+        game.apply_move((2, 3))
+        game.apply_move((0, 5))
+        for _ in range(3):
+            deadline = time.time() + 0.1
+            time_left = lambda: 1000 * (deadline - time.time())
+            move = player.get_move(game, time_left)
+            self.assertIn(move, game.get_legal_moves())
+            self.assertGreater(time_left(), 0)
+        # The interval calibrated after each move is used for the next one
+        self.assertGreater(manager.check_interval, 1)
+        self.assertGreater(player.check_interval, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+"""Unit tests for the parallel tournament games"""
+
+import random
+import unittest
+
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import Value
+from unittest import mock
+
+import tournament
+
+from sample_players import RandomPlayer
+from tournament import Agent, _init_worker, play_game, random_opening
+
+
+class CyclingPlayer:
+    """Player whose moves depend on the number of moves it has played, like
+    the history of a search carried from one game to the next.
+    """
+
+    def __init__(self):
+        self.moves_played = 0
+
+    def get_move(self, game, time_left):
+        legal_moves = sorted(game.get_legal_moves())
+        if not legal_moves:
+            return (-1, -1)
+        self.moves_played += 1
+        return legal_moves[self.moves_played % len(legal_moves)]
+
+
+class PlayGameTest(unittest.TestCase):
+
+    def test_parallel_games_match_serial_games(self):
+        cpu_agents = [Agent(RandomPlayer(), "Random")]
+        test_agents = [Agent(CyclingPlayer(), "Cycling")]
+        rng = random.Random(0)
+        games = []
+        for _ in range(6):
+            opening = random_opening(rng)
+            for cpu_first in (True, False):
+                games.append((0, 0, cpu_first, opening, rng.getrandbits(32)))
+
+        with mock.patch.dict(tournament._worker_agents,
+                             {"cpu": cpu_agents, "test": test_agents}):
+            serial = [play_game(*game) for game in games]
+        with ProcessPoolExecutor(3, initializer=_init_worker,
+                                 initargs=(cpu_agents, test_agents, Value("i", 0))) as executor:
+            parallel = list(executor.map(play_game, *zip(*games)))
+
+        # Every game gets fresh agents, whichever worker plays it
+        self.assertEqual(test_agents[0].player.moves_played, 0)
+        self.assertEqual([(won, termination, moves) for won, termination, _, _, moves in serial],
+                         [(won, termination, moves) for won, termination, _, _, moves in parallel])
+
+
+if __name__ == '__main__':
+    unittest.main()
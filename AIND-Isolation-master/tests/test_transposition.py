@@ -0,0 +1,106 @@
+"""Unit tests for the transposition table"""
+
+import unittest
+
+from transposition import (TranspositionTable, SharedTranspositionTable,
+                           EXACT, LOWER, UPPER)
+
+
+class TranspositionTableTest(unittest.TestCase):
+
+    def test_probe_returns_stored_entry(self):
+        table = TranspositionTable(8)
+        table.store(5, 3, 1.5, EXACT, (1, 2))
+        self.assertEqual(table.probe(5)[:5], (5, 3, 1.5, EXACT, (1, 2)))
+        self.assertIsNone(table.probe(13))
+        self.assertEqual(table.hit_rate(), 0.5)
+
+    def test_depth_preferred_and_always_replace_slots(self):
+        table = TranspositionTable(8)
+        # keys 1, 9 and 17 share a bucket
+        table.store(1, 5, 1., EXACT, None)
+        table.store(9, 2, 2., LOWER, None)
+        self.assertEqual(table.probe(1)[1], 5)
+        self.assertEqual(table.probe(9)[1], 2)
+        # a shallower entry only evicts the always-replace slot
+        table.store(17, 1, 3., EXACT, None)
+        self.assertIsNotNone(table.probe(1))
+        self.assertIsNone(table.probe(9))
+        # a deeper entry takes the depth-preferred slot and demotes the old one
+        table.store(9, 7, 4., EXACT, None)
+        self.assertEqual(table.probe(9)[1], 7)
+        self.assertEqual(table.probe(1)[1], 5)
+        self.assertIsNone(table.probe(17))
+
+    def test_new_search_releases_depth_preferred_slot(self):
+        table = TranspositionTable(8)
+        table.store(1, 5, 1., EXACT, None)
+        table.new_search()
+        table.store(9, 1, 2., EXACT, None)
+        self.assertEqual(table.probe(9)[1], 1)
+        self.assertEqual(table.probe(1)[1], 5)
+
+
+class SharedTranspositionTableTest(unittest.TestCase):
+
+    def setUp(self):
+        self.table = SharedTranspositionTable(8)
+
+    def tearDown(self):
+        self.table.close()
+
+    def test_same_policy_as_local_table(self):
+        local = TranspositionTable(8)
+        entries = [(1, 5, 1., EXACT, (1, 2)), (9, 2, 2., LOWER, None),
+                   (17, 1, float("-inf"), UPPER, (0, 6)), (9, 7, 4., EXACT, (3, 3)),
+                   (0, 3, float("inf"), LOWER, (6, 0))]
+        for entry in entries:
+            local.store(*entry)
+            self.table.store(*entry)
+        for key in (0, 1, 9, 17, 25):
+            local_entry = local.probe(key)
+            shared_entry = self.table.probe(key)
+            self.assertEqual(local_entry and local_entry[:5], shared_entry and shared_entry[:5])
+
+    def test_attached_tables_share_entries(self):
+        other = SharedTranspositionTable(8, name=self.table.name)
+        other.store(5, 3, 1.5, EXACT, (1, 2))
+        self.assertEqual(self.table.probe(5)[:5], (5, 3, 1.5, EXACT, (1, 2)))
+        other.close()
+
+    def test_torn_slot_reads_as_empty(self):
+        self.table.store(5, 3, 1.5, EXACT, (1, 2))
+        slot = 2 * (5 & self.table._index_mask) * self.table._SLOT.size
+        # Overwrite the value of the entry without updating its check word
+        self.table._buf[slot + 8:slot + 16] = bytes(8)
+        self.assertIsNone(self.table.probe(5))
+
+    def test_write_during_read_is_not_torn(self):
+        self.table.store(5, 3, 1.5, EXACT, (1, 2))
+        other = SharedTranspositionTable(8, name=self.table.name)
+        table = self.table
+
+        class RacingBuffer:
+            """Shared buffer that another process overwrites right after each read. """
+
+            def __init__(self, buf):
+                self.buf = buf
+
+            def __getitem__(self, index):
+                data = bytes(self.buf[index])
+                other.store(5, 9, -2.5, LOWER, (4, 4))
+                return data
+
+        table._buf = RacingBuffer(table._buf)
+        try:
+            entry = table.probe(5)
+        finally:
+            table._buf = table._buf.buf
+        # The entry read is the one stored before the concurrent write
+        self.assertEqual(entry[:5], (5, 3, 1.5, EXACT, (1, 2)))
+        self.assertEqual(table.probe(5)[:5], (5, 9, -2.5, LOWER, (4, 4)))
+        other.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
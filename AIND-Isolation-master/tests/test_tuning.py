@@ -0,0 +1,152 @@
+"""Unit tests for the self-play tuning of weighted score functions"""
+
+import json
+import math
+import os
+import random
+import tempfile
+import unittest
+
+import isolation
+
+from isolation.isolation import _KNIGHT_DIRECTIONS
+from isolation.endgame import partition
+from sample_players import center_score, improved_score
+from tuning import (CHEAP_FEATURES, DEFAULT_WEIGHTS, FEATURES, SPSA, WeightedScore, play_pair,
+                    random_opening, tune)
+
+
+def random_positions(count, seed):
+    """Yield boards from random games, including their final positions. """
+    rng = random.Random(seed)
+    for _ in range(count):
+        game = isolation.BitBoard("Player1", "Player2")
+        while True:
+            yield game
+            moves = game.get_legal_moves()
+            if not moves:
+                break
+            game = game.forecast_move(rng.choice(moves))
+
+
+class WeightedScoreTest(unittest.TestCase):
+
+    def test_default_weights_match_improved_score(self):
+        score = WeightedScore()
+        for game in random_positions(5, 0):
+            for player in ("Player1", "Player2"):
+                self.assertEqual(score(game, player), improved_score(game, player))
+
+    def test_features(self):
+        score = WeightedScore()
+        separated = 0
+        for game in random_positions(5, 1):
+            if game.move_count < 2 or not game.get_legal_moves():
+                continue
+            for player in ("Player1", "Player2"):
+                opponent = game.get_opponent(player)
+                features = score.features(game, player)
+                self.assertEqual(features["own_moves"], len(game.get_legal_moves(player)))
+                self.assertEqual(features["opp_moves"], len(game.get_legal_moves(opponent)))
+                self.assertEqual(features["own_center"], center_score(game, player))
+                self.assertEqual(features["opp_center"], center_score(game, opponent))
+                # The open cells a knight move away from each legal move
+                own_second = sum(game.move_is_legal((r + dr, c + dc))
+                                 for r, c in game.get_legal_moves(player)
+                                 for dr, dc in _KNIGHT_DIRECTIONS)
+                self.assertEqual(features["own_second_order"], own_second)
+                if partition(game) is None:
+                    self.assertEqual(features["partition"], 0)
+                else:
+                    separated += 1
+                # The features combine linearly
+                weights = {name: (i + 1) / 10 for i, name in enumerate(FEATURES)}
+                self.assertAlmostEqual(
+                    WeightedScore(weights)(game, player),
+                    sum(weights[name] * features[name] for name in FEATURES))
+        self.assertGreater(separated, 0)
+
+    def test_unknown_feature(self):
+        with self.assertRaises(ValueError):
+            WeightedScore({"own_moves": 1., "mobility": 2.})
+
+
+class SPSATest(unittest.TestCase):
+
+    def test_converges_on_noisy_comparisons(self):
+        # Matches are won with a probability that grows with the difference
+        # in distance to the best weights
+        best = {"own_moves": 2., "opp_moves": -.5}
+        rng = random.Random(0)
+
+        def loss(weights):
+            return sum((weights[name] - best[name]) ** 2 for name in best)
+
+        spsa = SPSA({"own_moves": 1., "opp_moves": -1.}, list(best), 400, a=2.)
+        start = loss(spsa.weights)
+        while spsa.k < spsa.iterations:
+            direction, plus, minus = spsa.perturbation()
+            p = 1 / (1 + math.exp(10 * (loss(plus) - loss(minus))))
+            score = sum(rng.random() < p for _ in range(16)) / 16
+            spsa.update(direction, score)
+        self.assertLess(loss(spsa.weights), start / 10)
+
+    def test_perturbations_only_change_tuned_weights(self):
+        spsa = SPSA({"own_moves": 1., "opp_moves": -1.}, ["own_moves", "own_center"], 10)
+        direction, plus, minus = spsa.perturbation()
+        self.assertEqual(set(direction), {"own_moves", "own_center"})
+        for name in FEATURES:
+            if name in direction:
+                self.assertAlmostEqual((plus[name] + minus[name]) / 2, spsa.weights[name])
+                self.assertNotEqual(plus[name], minus[name])
+            else:
+                self.assertEqual(plus[name], minus[name])
+        spsa.update(direction, .5)
+        self.assertEqual(spsa.weights["own_moves"], 1.)
+        self.assertEqual(spsa.k, 1)
+
+    def test_default_tuning_keeps_the_score_cheap(self):
+        # The perturbed scores compute no feature beyond improved_score's
+        spsa = SPSA(DEFAULT_WEIGHTS, CHEAP_FEATURES, 10)
+        for _ in range(5):
+            direction, plus, minus = spsa.perturbation()
+            for weights in (plus, minus):
+                score = WeightedScore(weights)
+                self.assertFalse(score._center or score._second or score._partition)
+            spsa.update(direction, .5)
+
+
+class SelfPlayTest(unittest.TestCase):
+
+    def test_play_pair(self):
+        opening = random_opening(random.Random(0))
+        self.assertEqual(play_pair({"own_moves": 1.}, {"own_moves": 1.}, opening, 1), .5)
+        score = play_pair({"own_moves": 1., "opp_moves": -1.}, {}, opening, 2)
+        self.assertIn(score, (0., .5, 1.))
+
+    def test_tune_and_resume(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "tuned.json")
+            spsa = SPSA({"own_moves": 1., "opp_moves": -1.}, ["own_moves", "opp_moves"], 2,
+                        stability=1.)
+            history = tune(spsa, pairs=2, depth=1, checkpoint=path, log=None)
+            self.assertEqual(len(history), 2)
+
+            with open(path) as f:
+                state = json.load(f)
+            self.assertEqual(state["iteration"], 2)
+            self.assertEqual(state["weights"], spsa.weights)
+            self.assertEqual(WeightedScore.load(path).weights, spsa.weights)
+
+            # A resumed tuning replays the same iterations as an uninterrupted one
+            resumed = SPSA.from_state(state)
+            resumed.iterations = 3
+            tune(resumed, pairs=2, depth=1, history=state["history"], log=None)
+            straight = SPSA({"own_moves": 1., "opp_moves": -1.}, ["own_moves", "opp_moves"], 3,
+                            stability=1.)
+            tune(straight, pairs=2, depth=1, log=None)
+            self.assertEqual(resumed.weights, straight.weights)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+"""Time management for the iterative deepening search agents.
+
+Reading the clock through the `time_left` callable of `Board.play()` costs
+about as much as the rest of a search node, so the agents only read it every
+`check_interval` nodes. `TimeManager` calibrates that interval from the
+nodes per second measured on previous moves, so that the clock is still read
+every `max_delay` milliseconds, well inside the `TIMER_THRESHOLD` margin.
+
+It also predicts the duration of the next iterative deepening iteration
+from the previous ones: the nodes of an iteration grow by the effective
+branching factor (the ratio between the nodes of the last two iterations),
+and an iteration that cannot finish in the remaining time is not started,
+since its partial result would be thrown away anyway.
+"""
+
+
+class TimeManager:
+    """Clock checking and iteration planning for `AlphaBetaPlayer`.
+
+    Parameters
+    ----------
+    check_interval : int or None (optional)
+        The number of nodes searched between clock reads; None calibrates
+        the interval after every move.
+
+    max_delay : float (optional)
+        The time in milliseconds allowed between clock reads when the
+        interval is calibrated.
+
+    predict : bool (optional)
+        Do not start an iteration that is predicted to run out of time.
+    """
+
+    def __init__(self, check_interval=None, max_delay=1., predict=True):
+        self.calibrate = check_interval is None
+        self.check_interval = 1 if check_interval is None else check_interval
+        self.max_delay = max_delay
+        self.predict = predict
+        self.nodes_per_second = None
+        self.skipped_iterations = 0
+        self._iterations = []
+
+    def start(self):
+        """Forget the iterations of the previous move. """
+        self._iterations = []
+
+    def iteration_done(self, nodes, elapsed):
+        """Record an iteration that searched `nodes` nodes in `elapsed`
+        milliseconds.
+        """
+        self._iterations.append((nodes, elapsed))
+
+    def predicted_time(self):
+        """Return the predicted duration in milliseconds of the next
+        iteration, or None until two iterations have been recorded.
+        """
+        if len(self._iterations) < 2:
+            return None
+        (previous_nodes, _), (nodes, elapsed) = self._iterations[-2:]
+        branching = max(1., nodes / max(previous_nodes, 1))
+        return elapsed * branching
+
+    def next_iteration_fits(self, remaining):
+        """Return False if the next iteration is predicted to take longer
+        than `remaining` milliseconds.
+        """
+        if not self.predict:
+            return True
+        predicted = self.predicted_time()
+        if predicted is None or predicted < remaining:
+            return True
+        self.skipped_iterations += 1
+        return False
+
+    def search_done(self, nodes, elapsed):
+        """Recalibrate the check interval after a move that searched `nodes`
+        nodes in `elapsed` milliseconds.
+        """
+        if elapsed <= 0 or not nodes:
+            return
+        self.nodes_per_second = 1000 * nodes / elapsed
+        if self.calibrate:
+            self.check_interval = max(1, int(self.nodes_per_second * self.max_delay / 1000))
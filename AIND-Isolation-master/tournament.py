@@ -11,20 +11,37 @@ players, and the players play each match twice -- once as the first player and
 once as the second player.  Randomizing the openings and switching the player
 order corrects for imbalances due to both starting position and initiative.
 """
+import argparse
+import contextlib
+import copy
 import itertools
+import os
 import random
+import time
 import warnings
 
 from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import Value
 
-from isolation import Board
+from isolation import Board, BitBoard
 from sample_players import (RandomPlayer, open_move_score,
                             improved_score, center_score)
+from game_records import RecordWriter
 from game_agent import (MinimaxPlayer, AlphaBetaPlayer, custom_score,
                         custom_score_2, custom_score_3)
+from mcts import MCTSPlayer
+from move_ordering import MoveOrderer
+from opening_book import OpeningBook
+from tablebase import Tablebase
+from sprt import SPRT
+from telemetry import JsonlWriter
+from time_manager import TimeManager
+from tuning import WeightedScore
 
 NUM_MATCHES = 5  # number of matches against each opponent
 TIME_LIMIT = 150  # number of milliseconds before timeout
+TT_SIZE = 2 ** 16  # number of transposition table buckets
 
 DESCRIPTION = """
 This script evaluates the performance of the custom_score evaluation
@@ -36,32 +53,66 @@ game_agent.py.
 
 Agent = namedtuple("Agent", ["player", "name"])
 
+# Agents of a worker process in a parallel tournament, set by _init_worker()
+_worker_agents = {}
 
-def play_round(cpu_agent, test_agents, win_counts, num_matches):
+
+def depth_recorders(*players):
+    """Return the players that record the depth of their searches during a
+    game (see `AlphaBetaPlayer.completed_depths`).
+    """
+    return [player for player in players if hasattr(player, "completed_depths")]
+
+
+def play_round(cpu_agent, test_agents, win_counts, num_matches, ponder=False,
+               telemetry=None, records=None, depths=None):
     """Compare the test agents to the cpu agent in "fair" matches.
 
     "Fair" matches use random starting locations and force the agents to
     play as both first and second player to control for advantages resulting
     from choosing better opening moves or having first initiative to move.
+    With `telemetry` (a `telemetry.JsonlWriter`), the records of every game
+    are written with the names of its players and its number in the round,
+    and with `records` (a `game_records.RecordWriter`) the moves of every
+    game are recorded. With `depths` (a dict of lists keyed by the players of
+    the test agents), the search depths that the test agents complete in
+    every game are appended to their lists.
     """
     timeout_count = 0
     forfeit_count = 0
+    game_count = 0
     for _ in range(num_matches):
 
-        games = sum([[Board(cpu_agent.player, agent.player),
-                      Board(agent.player, cpu_agent.player)]
-                    for agent in test_agents], [])
+        seats = sum([[(cpu_agent, agent), (agent, cpu_agent)]
+                     for agent in test_agents], [])
+        games = [Board(first.player, second.player) for first, second in seats]
 
         # initialize all games with a random move and response
+        opening = []
         for _ in range(2):
             move = random.choice(games[0].get_legal_moves())
+            opening.append(move)
             for game in games:
                 game.apply_move(move)
 
         # play all games and tally the results
-        for game in games:
-            winner, _, termination = game.play(time_limit=TIME_LIMIT)
+        for game, (first, second) in zip(games, seats):
+            game_count += 1
+            writer = None
+            if telemetry is not None:
+                writer = telemetry.bind(game=game_count, player_1=first.name,
+                                        player_2=second.name)
+            for player in depth_recorders(first.player, second.player):
+                player.completed_depths.clear()
+            winner, history, termination = game.play(time_limit=TIME_LIMIT, ponder=ponder,
+                                                     telemetry=writer)
             win_counts[winner] += 1
+            if depths is not None:
+                for player in depth_recorders(first.player, second.player):
+                    if player in depths:
+                        depths[player].extend(player.completed_depths)
+            if records is not None:
+                records.write(game.width, game.height, opening + history, termination)
 
             if termination == "timeout":
                 timeout_count += 1
@@ -71,15 +122,217 @@ def play_round(cpu_agent, test_agents, win_counts, num_matches):
     return timeout_count, forfeit_count
 
 
+def _init_worker(cpu_agents, test_agents, worker_count):
+    """Initialize a worker process of a parallel tournament with its own copy
+    of the agents, pinned to its own core when there are enough of them.
+    """
+    with worker_count.get_lock():
+        worker_id = worker_count.value
+        worker_count.value += 1
+    if hasattr(os, "sched_setaffinity"):
+        cores = sorted(os.sched_getaffinity(0))
+        if worker_id < len(cores):
+            os.sched_setaffinity(0, {cores[worker_id]})
+    _worker_agents["cpu"] = cpu_agents
+    _worker_agents["test"] = test_agents
+
+
+def play_game(cpu_idx, test_idx, cpu_first, opening, seed, ponder=False,
+              telemetry=False):
+    """Play a single game between two agents in a worker process.
+
+    The global random generator, which drives the move order of the board
+    and the choices of the random agent, is seeded for every game, and every
+    game is played by fresh copies of the agents (so that no transposition
+    table or move ordering history carries over from the previous games of
+    the worker), so that results do not depend on how games are spread among
+    the workers. Turns are timed with the CPU time of the process, so the
+    time limit holds even when the workers compete for the processor, but
+    with wall-clock time when pondering, as the CPU time of the process
+    would charge the active player for its opponent's pondering thread.
+    Agents that search in helper processes (see `lazy_smp`) are only charged
+    correctly when pondering.
+
+    Returns
+    -------
+    (bool, str, list<int>, list<dict>, list<(int, int)>)
+        Whether the test agent won, the termination reason, the search
+        depths the test agent completed during the game (if it records them),
+        the telemetry records of the game if `telemetry` is set, and every
+        move of the game including the opening.
+    """
+    random.seed(seed)
+    cpu_agent, test_agent = copy.deepcopy((_worker_agents["cpu"][cpu_idx],
+                                           _worker_agents["test"][test_idx]))
+    agents = (cpu_agent, test_agent) if cpu_first else (test_agent, cpu_agent)
+    game = Board(*(agent.player for agent in agents))
+    for move in opening:
+        game.apply_move(move)
+
+    records = []
+    writer = None
+    if telemetry:
+        # The records are written by the main process, see collect_round()
+        writer = lambda record: records.append(dict(
+            record, player_1=agents[0].name, player_2=agents[1].name))
+    test_player = test_agent.player
+    for player in depth_recorders(test_player):
+        player.completed_depths.clear()
+    timer = None if ponder else time.process_time
+    try:
+        winner, history, termination = game.play(time_limit=TIME_LIMIT, timer=timer,
+                                                 ponder=ponder, telemetry=writer)
+    finally:
+        # Stop the helper processes of the copies, see LazySMPPlayer
+        for agent in agents:
+            if hasattr(agent.player, "close"):
+                agent.player.close()
+    depths = getattr(test_player, "completed_depths", [])
+    return (winner is test_player, termination, list(depths), records,
+            list(opening) + history)
+
+
+def submit_round(executor, cpu_idx, test_agents, num_matches, rng, ponder=False,
+                 telemetry=False):
+    """Submit the games of a round of "fair" matches against one cpu agent to
+    a process pool; each match gives every test agent both player orders
+    from the same random opening.
+    """
+    futures = []
+    for _ in range(num_matches):
+        opening = random_opening(rng)
+        for test_idx in range(len(test_agents)):
+            for cpu_first in (True, False):
+                futures.append((test_idx, executor.submit(
+                    play_game, cpu_idx, test_idx, cpu_first, opening, rng.getrandbits(32),
+                    ponder, telemetry)))
+    return futures
+
+
+def collect_round(futures, cpu_agent, test_agents, win_counts, telemetry=None,
+                  records=None, depths=None):
+    """Tally the results of a round submitted with submit_round() in the same
+    way as play_round(), writing the telemetry records of the games to
+    `telemetry`, their moves to `records` and the depths completed by the
+    test agents to `depths` if they are set.
+    """
+    timeout_count = 0
+    forfeit_count = 0
+    for game_count, (test_idx, future) in enumerate(futures, 1):
+        test_won, termination, test_depths, game_telemetry, moves = future.result()
+        if telemetry is not None:
+            writer = telemetry.bind(game=game_count)
+            for record in game_telemetry:
+                writer(record)
+        if records is not None:
+            # The workers play on the default board size
+            records.write(7, 7, moves, termination)
+        test_player = test_agents[test_idx].player
+        win_counts[test_player if test_won else cpu_agent.player] += 1
+        if depths is not None and test_player in depths:
+            depths[test_player].extend(test_depths)
+
+        if termination == "timeout":
+            timeout_count += 1
+        elif termination == "forfeit":
+            forfeit_count += 1
+
+    return timeout_count, forfeit_count
+
+
+def random_opening(rng):
+    """Return the two placement moves of a random opening. """
+    game = Board("Player1", "Player2")
+    opening = []
+    for _ in range(2):
+        opening.append(rng.choice(game.get_blank_spaces()))
+        game.apply_move(opening[-1])
+    return opening
+
+
+def play_sprt(agent_a, agent_b, sprt, max_pairs, workers=1, seed=None):
+    """Play pairs of games between two agents until the sequential test
+    accepts a hypothesis about their Elo difference or `max_pairs` pairs have
+    been played, printing the progress of the test.
+
+    Each pair plays both player orders from the same random opening. The
+    games are played by a pool of worker processes as in play_matches(),
+    with up to `workers` pairs in flight at a time.
+
+    Returns
+    -------
+    str or None
+        "H1" if agent A was found stronger, "H0" if not, and None if the
+        test was inconclusive after `max_pairs` pairs.
+    """
+    rng = random.Random(seed)
+    executor = ProcessPoolExecutor(workers, initializer=_init_worker,
+                                   initargs=([agent_b], [agent_a], Value("i", 0)))
+    print("\nSPRT {} vs {}: H0 = {:+.0f} Elo, H1 = {:+.0f} Elo, LLR bounds [{:.2f}, {:.2f}]\n".format(
+        agent_a.name, agent_b.name, sprt.elo0, sprt.elo1, sprt.lower_bound, sprt.upper_bound))
+
+    status = None
+    while status is None and sprt.num_pairs < max_pairs:
+        batch = []
+        for _ in range(min(workers, max_pairs - sprt.num_pairs)):
+            opening = random_opening(rng)
+            batch.append([executor.submit(play_game, 0, 0, cpu_first, opening, rng.getrandbits(32))
+                          for cpu_first in (True, False)])
+        for pair in batch:
+            sprt.add_pair(sum(future.result()[0] for future in pair) / 2)
+            status = sprt.status()
+            if status is not None or sprt.num_pairs % 10 == 0:
+                elo, margin = sprt.elo()
+                print("Pairs: {:<6} Elo: {:+7.1f} +/- {:<7.1f} LLR: {:.2f}".format(
+                    sprt.num_pairs, elo, margin, sprt.llr()))
+            if status is not None:
+                break
+    executor.shutdown(cancel_futures=True)
+
+    elo, margin = sprt.elo()
+    if status == "H1":
+        print("\n{} is stronger than {}: H1 accepted".format(agent_a.name, agent_b.name))
+    elif status == "H0":
+        print("\n{} is not stronger than {}: H0 accepted".format(agent_a.name, agent_b.name))
+    else:
+        print("\nInconclusive after {} pairs".format(sprt.num_pairs))
+    print("Elo difference: {:+.1f} +/- {:.1f} (95%)".format(elo, margin))
+    return status
+
+
 def update(total_wins, wins):
     for player in total_wins:
         total_wins[player] += wins[player]
     return total_wins
 
 
-def play_matches(cpu_agents, test_agents, num_matches):
-    """Play matches between the test agent and each cpu_agent individually. """
+def play_matches(cpu_agents, test_agents, num_matches, workers=1, seed=None,
+                 ponder=False, telemetry=None, records=None):
+    """Play matches between the test agent and each cpu_agent individually.
+
+    With more than one worker the games are spread across a pool of
+    processes, and the openings and random choices of every game are drawn
+    from `seed` so that the tournament can be reproduced. With `ponder`,
+    agents that support it search on their opponent's time. With
+    `telemetry` (a `telemetry.JsonlWriter`), every move and game result is
+    recorded along with the round, game and players it belongs to. With
+    `records` (a `game_records.RecordWriter`), the moves of every game are
+    written to a compact binary file.
+    """
+    executor = None
+    if workers > 1:
+        executor = ProcessPoolExecutor(workers, initializer=_init_worker,
+                                       initargs=(cpu_agents, test_agents, Value("i", 0)))
+        rng = random.Random(seed)
+        rounds = [submit_round(executor, idx, test_agents, num_matches, rng, ponder,
+                               telemetry is not None)
+                  for idx in range(len(cpu_agents))]
+    elif seed is not None:
+        random.seed(seed)
+
     total_wins = {agent.player: 0 for agent in test_agents}
+    # Iterative deepening agents record the depth completed on every move
+    depths = {agent.player: [] for agent in test_agents}
     total_timeouts = 0.
     total_forfeits = 0.
     total_matches = 2 * num_matches * len(cpu_agents)
@@ -93,7 +346,13 @@ def play_matches(cpu_agents, test_agents, num_matches):
 
         print("{!s:^9}{:^13}".format(idx + 1, agent.name), end="", flush=True)
 
-        counts = play_round(agent, test_agents, wins, num_matches)
+        writer = None if telemetry is None else telemetry.bind(round=idx + 1)
+        if executor is None:
+            counts = play_round(agent, test_agents, wins, num_matches, ponder, writer,
+                                records, depths)
+        else:
+            counts = collect_round(rounds[idx], agent, test_agents, wins, writer, records,
+                                   depths)
         total_timeouts += counts[0]
         total_forfeits += counts[1]
         total_wins = update(total_wins, wins)
@@ -106,6 +365,9 @@ def play_matches(cpu_agents, test_agents, num_matches):
             ) for i in range(0, len(round_totals), 2)
         ]))
 
+    if executor is not None:
+        executor.shutdown()
+
     print("-" * 74)
     print('{:^9}{:^13}'.format("", "Win Rate:") +
         ''.join([
@@ -114,6 +376,12 @@ def play_matches(cpu_agents, test_agents, num_matches):
             ) for x in enumerate(test_agents)
     ]))
 
+    depths = [depths[agent.player] for agent in test_agents]
+    if all(depths):
+        print('{:^9}{:^13}'.format("", "Avg Depth:") +
+              ''.join(['{:^13}'.format("{:.2f}".format(sum(d) / len(d)))
+                       for d in depths]))
+
     if total_timeouts:
         print(("\nThere were {} timeouts during the tournament -- make sure " +
                "your agent handles search timeout correctly, and consider " +
@@ -124,7 +392,111 @@ def play_matches(cpu_agents, test_agents, num_matches):
                "legal moves available to play.\n").format(total_forfeits))
 
 
+def search_report(test_agents, num_positions, depth):
+    """Measure the effect of the transposition table and move ordering on the
+    search of each test agent's heuristic.
+
+    The same random positions are searched by iterative deepening up to a
+    fixed depth with plain alpha-beta, with a transposition table, and with
+    a transposition table plus move ordering. The total number of nodes
+    expanded is reported for each configuration, together with the table hit
+    rate and the fraction of cutoffs produced by the first move searched. The
+    positions use `BitBoard`, which generates moves in a fixed order, so that
+    every configuration starts from the same move order.
+    """
+    rng = random.Random(0)
+    openings = []
+    for _ in range(num_positions):
+        game = BitBoard("Player1", "Player2")
+        opening = []
+        for _ in range(6):
+            opening.append(rng.choice(game.get_legal_moves()))
+            game.apply_move(opening[-1])
+        openings.append(opening)
+
+    print("\n{:^13}{:^13}{:^13}{:^13}{:^13}{:^13}".format(
+        "Agent", "Nodes", "Nodes (TT)", "(TT+Order)", "Hit Rate", "1st Cutoff"))
+    for agent in test_agents:
+        nodes = []
+        # Each agent gets its own move orderer, so that the history and
+        # cutoff statistics of one agent do not carry over to the next
+        configs = [{}, {"tt_size": TT_SIZE},
+                   {"tt_size": TT_SIZE, "ordering": MoveOrderer()}]
+        for config in configs:
+            player = AlphaBetaPlayer(score_fn=agent.player.score, **config)
+            for opening in openings:
+                game = BitBoard(player, "Player2")
+                for move in opening:
+                    game.apply_move(move)
+                player.search_to_depth(game, depth)
+            nodes.append(player.nodes)
+        print("{:^13}{:^13}{:^13}{:^13}{:^13}{:^13}".format(
+            agent.name, nodes[0], nodes[1], nodes[2],
+            "{:.1f}%".format(100 * player.tt.hit_rate()),
+            "{:.1f}%".format(100 * player.ordering.first_move_cutoff_rate())))
+
+
 def main():
+    parser = argparse.ArgumentParser(description=DESCRIPTION)
+    parser.add_argument("--search-report", action="store_true",
+                        help="report the node reduction from the " +
+                             "transposition table and move ordering for the " +
+                             "test agents instead of playing matches")
+    parser.add_argument("--depth", type=int, default=6,
+                        help="search depth used by --search-report")
+    parser.add_argument("--pvs", action="store_true",
+                        help="compare alpha-beta with principal variation " +
+                             "search and aspiration windows instead of the " +
+                             "custom heuristics")
+    parser.add_argument("--mcts", action="store_true",
+                        help="add a Monte Carlo tree search agent to the " +
+                             "test agents")
+    parser.add_argument("--tuned", default=None,
+                        help="add an alpha-beta agent scoring positions " +
+                             "with the weights of a tuning checkpoint (see " +
+                             "tuning.py) to the test agents")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of processes playing games in parallel")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="seed for the random openings")
+    parser.add_argument("--ponder", action="store_true",
+                        help="let agents that support it search on their " +
+                             "opponent's time")
+    parser.add_argument("--book", default=None,
+                        help="opening book file (see opening_book.py) " +
+                             "consulted by the alpha-beta test agents")
+    parser.add_argument("--endgame", type=int, default=0,
+                        help="let the alpha-beta test agents solve " +
+                             "separated endgames with at most this many " +
+                             "open cells exactly (about 20 is practical)")
+    parser.add_argument("--tablebase", default=None,
+                        help="endgame tablebase file (see tablebase.py) " +
+                             "probed by the alpha-beta test agents")
+    parser.add_argument("--time-manager", action="store_true",
+                        help="let the alpha-beta test agents read the clock " +
+                             "every few nodes and skip iterations that are " +
+                             "predicted not to finish")
+    parser.add_argument("--telemetry", default=None,
+                        help="write the search statistics of every move " +
+                             "to this file as JSON lines")
+    parser.add_argument("--records", default=None,
+                        help="write the moves of every game to this file " +
+                             "in the binary format of game_records.py")
+    parser.add_argument("--sprt", action="store_true",
+                        help="play the first two test agents against each " +
+                             "other until a sequential probability ratio " +
+                             "test decides which one is stronger")
+    parser.add_argument("--elo0", type=float, default=0.,
+                        help="Elo difference under H0 for --sprt")
+    parser.add_argument("--elo1", type=float, default=50.,
+                        help="Elo difference under H1 for --sprt")
+    parser.add_argument("--alpha", type=float, default=0.05,
+                        help="false positive rate for --sprt")
+    parser.add_argument("--beta", type=float, default=0.05,
+                        help="false negative rate for --sprt")
+    parser.add_argument("--max-pairs", type=int, default=1000,
+                        help="maximum number of game pairs for --sprt")
+    args = parser.parse_args()
 
     # Define two agents to compare -- these agents will play from the same
     # starting position against the same adversaries in the tournament
@@ -135,6 +507,34 @@ def main():
         Agent(AlphaBetaPlayer(score_fn=custom_score_3), "AB_Custom_3")
     ]
 
+    if args.pvs:
+        # Both agents use the same heuristic, table and move ordering so that
+        # only the search algorithm differs
+        test_agents = [
+            Agent(AlphaBetaPlayer(score_fn=improved_score, tt_size=TT_SIZE,
+                                  ordering=MoveOrderer()), "AB_Ordered"),
+            Agent(AlphaBetaPlayer(score_fn=improved_score, tt_size=TT_SIZE,
+                                  ordering=MoveOrderer(), pvs=True,
+                                  aspiration=2.), "AB_PVS")
+        ]
+
+    if args.mcts:
+        test_agents.append(Agent(MCTSPlayer(), "MCTS"))
+
+    if args.tuned:
+        test_agents.append(Agent(AlphaBetaPlayer(score_fn=WeightedScore.load(args.tuned)),
+                                 "AB_Tuned"))
+
+    book = OpeningBook(args.book) if args.book else None
+    tablebase = Tablebase(args.tablebase) if args.tablebase else None
+    for agent in test_agents:
+        if isinstance(agent.player, AlphaBetaPlayer):
+            agent.player.book = book
+            agent.player.endgame_cells = args.endgame
+            agent.player.tablebase = tablebase
+            if args.time_manager:
+                agent.player.time_manager = TimeManager()
+
     # Define a collection of agents to compete against the test agents
     cpu_agents = [
         Agent(RandomPlayer(), "Random"),
@@ -146,11 +546,28 @@ def main():
         Agent(AlphaBetaPlayer(score_fn=improved_score), "AB_Improved")
     ]
 
+    if args.sprt:
+        play_sprt(test_agents[0], test_agents[1],
+                  SPRT(args.elo0, args.elo1, args.alpha, args.beta),
+                  args.max_pairs, max(1, args.workers), args.seed)
+        return
+
+    if args.search_report:
+        search_report(test_agents, 4 * NUM_MATCHES, args.depth)
+        return
+
     print(DESCRIPTION)
     print("{:^74}".format("*************************"))
     print("{:^74}".format("Playing Matches"))
     print("{:^74}".format("*************************"))
-    play_matches(cpu_agents, test_agents, NUM_MATCHES)
+    with contextlib.ExitStack() as stack:
+        telemetry = records = None
+        if args.telemetry is not None:
+            telemetry = JsonlWriter(stack.enter_context(open(args.telemetry, "w")))
+        if args.records is not None:
+            records = RecordWriter(stack.enter_context(open(args.records, "wb")))
+        play_matches(cpu_agents, test_agents, NUM_MATCHES, args.workers, args.seed,
+                     args.ponder, telemetry, records)
 
 
 if __name__ == "__main__":
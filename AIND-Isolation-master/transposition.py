@@ -0,0 +1,226 @@
+"""Bounded transposition table used by the alpha-beta search agents to reuse
+the results of positions that were already searched, either earlier in the
+same iteration (through a different move order) or during a previous
+iteration of iterative deepening.
+"""
+import struct
+from multiprocessing.shared_memory import SharedMemory
+
+# Bound types of a stored value
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+# Mixed into the board hash when the searching agent is the second player;
+# the stored values are scored from the agent's point of view, so the same
+# position must not be shared between an agent playing either side.
+SECOND_PLAYER_KEY = 0x9E3779B97F4A7C15
+
+
+class TranspositionTable:
+    """Fixed-size hash table mapping board hashes to search results.
+
+    Each bucket holds two entries: a depth-preferred slot that keeps the
+    deepest result seen for the bucket during the current search, and an
+    always-replace slot that takes everything else. Entries are tuples of
+    (key, depth, value, bound, best move, generation).
+
+    Parameters
+    ----------
+    size : int (optional)
+        The number of buckets, rounded up to the next power of two.
+    """
+
+    def __init__(self, size=2 ** 16):
+        self.size = 1 << max(0, size - 1).bit_length()
+        self._index_mask = self.size - 1
+        self.clear()
+
+    def clear(self):
+        """Remove every entry and reset the statistics. """
+        self._deep = [None] * self.size
+        self._recent = [None] * self.size
+        self.generation = 0
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+
+    def new_search(self):
+        """Mark the start of a new root search; entries stored by previous
+        searches stay available but lose their claim on depth-preferred slots.
+        """
+        self.generation += 1
+
+    def probe(self, key):
+        """Return the entry stored for `key`, or None if there is no entry. """
+        self.probes += 1
+        idx = key & self._index_mask
+        entry = self._deep[idx]
+        if entry is None or entry[0] != key:
+            entry = self._recent[idx]
+            if entry is None or entry[0] != key:
+                return None
+        self.hits += 1
+        return entry
+
+    def store(self, key, depth, value, bound, move):
+        """Record the result of searching the position with hash `key`.
+
+        Parameters
+        ----------
+        key : int
+            The hash of the position.
+
+        depth : int
+            The remaining search depth below the position.
+
+        value : float
+            The value returned by the search.
+
+        bound : int
+            EXACT, LOWER (the value is a lower bound) or UPPER (the value
+            is an upper bound).
+
+        move : (int, int) or None
+            The best move found in the position.
+        """
+        self.stores += 1
+        idx = key & self._index_mask
+        entry = (key, depth, value, bound, move, self.generation)
+        deep = self._deep[idx]
+        if (deep is None or deep[0] == key or depth >= deep[1] or
+                deep[5] != self.generation):
+            if deep is not None and deep[0] != key:
+                self._recent[idx] = deep
+            self._deep[idx] = entry
+        else:
+            self._recent[idx] = entry
+
+    def hit_rate(self):
+        """Return the fraction of probes that found an entry. """
+        return self.hits / self.probes if self.probes else 0.
+
+
+class SharedTranspositionTable:
+    """Transposition table kept in a shared memory block so that several
+    processes searching the same game can share their results (see
+    `lazy_smp.LazySMPPlayer`). It has the interface, bucket layout and
+    replacement policy of `TranspositionTable`.
+
+    Slots are read and written without locks. Each slot stores the key XORed
+    with the two 64-bit words of its data, so a slot torn by concurrent
+    writes fails the key check and reads as empty.
+
+    Parameters
+    ----------
+    size : int (optional)
+        The number of buckets, rounded up to the next power of two.
+
+    name : str or None (optional)
+        The name of an existing table to attach to; None creates a new table
+        owned (and removed on close()) by this object.
+    """
+
+    # check word; value, depth, bound + 1 (0 marks an empty slot), move
+    # row and column (0xFF for no move) and generation
+    _SLOT = struct.Struct("<QdhBBBxH")
+    _WORDS = struct.Struct("<QQQ")
+    _NO_MOVE = 0xFF
+
+    def __init__(self, size=2 ** 16, name=None):
+        self.size = 1 << max(0, size - 1).bit_length()
+        self._index_mask = self.size - 1
+        self._nbytes = 2 * self.size * self._SLOT.size
+        self._owner = name is None
+        if self._owner:
+            self._shm = SharedMemory(create=True, size=self._nbytes)
+        else:
+            self._shm = SharedMemory(name=name)
+        self.name = self._shm.name
+        self._buf = self._shm.buf
+        self.clear()
+
+    def __getstate__(self):
+        # A copy sent to another process attaches to the same block
+        return self.size, self.name
+
+    def __setstate__(self, state):
+        self.__init__(*state)
+
+    def close(self):
+        """Detach from the shared block, removing it if this object owns it. """
+        self._buf = None
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+
+    def clear(self):
+        """Reset the statistics; the owner also removes every entry. """
+        if self._owner:
+            self._buf[:self._nbytes] = bytes(self._nbytes)
+        self.generation = 0
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+
+    def new_search(self):
+        """Mark the start of a new root search; entries stored by previous
+        searches stay available but lose their claim on depth-preferred slots.
+        """
+        self.generation += 1
+
+    def _read(self, slot):
+        """Return the entry in `slot` as a tuple, or None if it is empty or
+        torn.
+        """
+        offset = slot * self._SLOT.size
+        # Check words and fields come from a single copy of the slot, so that
+        # a write by another process between two reads cannot pass the check
+        data = bytes(self._buf[offset:offset + self._SLOT.size])
+        check, low, high = self._WORDS.unpack(data)
+        _, value, depth, bound, row, col, generation = self._SLOT.unpack(data)
+        if not bound:
+            return None
+        move = None if row == self._NO_MOVE else (row, col)
+        return (check ^ low ^ high, depth, value, bound - 1, move, generation)
+
+    def _write(self, slot, entry):
+        key, depth, value, bound, move, generation = entry
+        row, col = (self._NO_MOVE, self._NO_MOVE) if move is None else move
+        data = self._SLOT.pack(0, value, depth, bound + 1, row, col, generation & 0xFFFF)
+        _, low, high = self._WORDS.unpack(data)
+        offset = slot * self._SLOT.size
+        self._buf[offset:offset + self._SLOT.size] = (
+            struct.pack("<Q", key ^ low ^ high) + data[8:])
+
+    def probe(self, key):
+        """Return the entry stored for `key`, or None if there is no entry. """
+        self.probes += 1
+        idx = key & self._index_mask
+        for slot in (2 * idx, 2 * idx + 1):
+            entry = self._read(slot)
+            if entry is not None and entry[0] == key:
+                self.hits += 1
+                return entry
+        return None
+
+    def store(self, key, depth, value, bound, move):
+        """Record the result of searching the position with hash `key`; see
+        `TranspositionTable.store()`.
+        """
+        self.stores += 1
+        idx = key & self._index_mask
+        generation = self.generation & 0xFFFF
+        entry = (key, depth, value, bound, move, generation)
+        deep = self._read(2 * idx)
+        if (deep is None or deep[0] == key or depth >= deep[1] or
+                deep[5] != generation):
+            if deep is not None and deep[0] != key:
+                self._write(2 * idx + 1, deep)
+            self._write(2 * idx, entry)
+        else:
+            self._write(2 * idx + 1, entry)
+
+    def hit_rate(self):
+        """Return the fraction of probes that found an entry. """
+        return self.hits / self.probes if self.probes else 0.
@@ -0,0 +1,420 @@
+"""Self-play tuning of a weighted evaluation function.
+
+`WeightedScore` scores a position as a weighted sum of features measured
+from the point of view of the player:
+
+- own_moves, opp_moves: the number of legal moves of each player;
+- own_center, opp_center: the squared distance of each player from the
+  center of the board, as in `sample_players.center_score()`;
+- own_second_order, opp_second_order: the number of legal moves summed over
+  the cells reached by each legal move of the player;
+- partition: once the players can no longer reach each other (see
+  `isolation.endgame.partition()`), the number of cells in the player's
+  region minus the number in the opponent's, and 0 before.
+
+Features with a zero weight are not computed. The default weights reproduce
+`sample_players.improved_score()` at the same cost, and only the two
+mobility features are tuned by default. The other features are tuned on
+request (see `--features`): the center features slow the search to about
+85% of its speed, and the second-order and partition features generate the
+moves of every cell around the players and halve it.
+
+`tune()` optimizes the weights with SPSA (simultaneous perturbation
+stochastic approximation): every iteration perturbs all the weights at once
+in a random direction, plays pairs of games between the two opposite
+perturbations in a process pool, and moves the weights towards the side that
+won. The games are searched to a fixed depth on `BitBoard`, so that their
+outcome depends only on the weights and the random openings, and the state of
+the tuner is written to a JSON checkpoint after every iteration, from which
+the tuning resumes. Tune from the command line with
+
+    python tuning.py --iterations 200 --pairs 16 --workers 4 --checkpoint tuned.json
+
+and play the tuned weights with `WeightedScore.load("tuned.json")`, or with
+`python tournament.py --tuned tuned.json`.
+"""
+import argparse
+import json
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+from evaluation import EvalContext
+from isolation import BitBoard
+from isolation.bitboard import board_tables
+from isolation.endgame import board_masks, partition
+from game_agent import AlphaBetaPlayer
+
+FEATURES = ["own_moves", "opp_moves", "own_center", "opp_center",
+            "own_second_order", "opp_second_order", "partition"]
+
+# The features tuned by default: the ones that keep the score as cheap to
+# compute as improved_score
+CHEAP_FEATURES = ["own_moves", "opp_moves"]
+
+# The weights of improved_score, from which the tuning starts by default
+DEFAULT_WEIGHTS = {"own_moves": 1., "opp_moves": -1.}
+
+# Squared distances from the center of every cell, see center_table()
+_CENTER_TABLES = {}
+
+# The size of the perturbation of each weight at the start of the tuning,
+# roughly the change that makes a noticeable difference to the play
+DEFAULT_SCALES = {"own_moves": .5, "opp_moves": .5, "own_center": .05, "opp_center": .05,
+                  "own_second_order": .1, "opp_second_order": .1, "partition": .2}
+
+
+class WeightedScore:
+    """Heuristic that scores a position for a player as the weighted sum of
+    the FEATURES, and as -inf / +inf when the player has lost / won.
+
+    Parameters
+    ----------
+    weights : dict (optional)
+        The weight of each feature; missing features have a weight of 0.
+    """
+
+    def __init__(self, weights=None):
+        weights = dict(DEFAULT_WEIGHTS if weights is None else weights)
+        unknown = set(weights) - set(FEATURES)
+        if unknown:
+            raise ValueError("unknown features: {}".format(", ".join(sorted(unknown))))
+        self.weights = {name: float(weights.get(name, 0.)) for name in FEATURES}
+        (self._own_moves, self._opp_moves, self._own_center, self._opp_center,
+         self._own_second, self._opp_second, self._partition) = (
+            self.weights[name] for name in FEATURES)
+        self._center = bool(self._own_center or self._opp_center)
+        self._second = bool(self._own_second or self._opp_second)
+
+    @classmethod
+    def load(cls, path):
+        """Return the score with the weights of a checkpoint written by
+        tune().
+        """
+        with open(path) as f:
+            return cls(json.load(f)["weights"])
+
+    def __repr__(self):
+        return "WeightedScore({!r})".format(
+            {name: weight for name, weight in self.weights.items() if weight})
+
+    def __call__(self, game, player, context=None):
+        if context is None:
+            context = EvalContext(game, player)
+        if context.utility:
+            return context.utility
+
+        score = self._own_moves * context.own_moves + self._opp_moves * context.opp_moves
+        if self._center:
+            centers = center_table(game.width, game.height)
+            score += (self._own_center * centers[game.get_player_location(player)] +
+                      self._opp_center * centers[game.get_player_location(
+                          game.get_opponent(player))])
+        if self._second:
+            own, opp = second_order_mobility(game, player)
+            score += self._own_second * own + self._opp_second * opp
+        if self._partition:
+            score += self._partition * partition_size(game, player)
+        return float(score)
+
+    def features(self, game, player):
+        """Return the value of every feature in `game` for `player`. """
+        context = EvalContext(game, player)
+        centers = center_table(game.width, game.height)
+        center = [centers[game.get_player_location(p)]
+                  for p in (player, game.get_opponent(player))]
+        second = second_order_mobility(game, player)
+        values = [context.own_moves, context.opp_moves, center[0], center[1],
+                  second[0], second[1], partition_size(game, player)]
+        return dict(zip(FEATURES, values))
+
+
+def center_table(width, height):
+    """Return a dict mapping every (row, column) cell of a board of the given
+    size to its squared distance from the center, and None (a player that
+    has not been placed) to 0.
+    """
+    if (width, height) not in _CENTER_TABLES:
+        w, h = width / 2., height / 2.
+        table = {(y, x): (h - y)**2 + (w - x)**2
+                 for x in range(width) for y in range(height)}
+        table[None] = 0.
+        _CENTER_TABLES[width, height] = table
+    return _CENTER_TABLES[width, height]
+
+
+def second_order_mobility(game, player):
+    """Return the second-order mobility of `player` and of its opponent: the
+    number of legal moves summed over the cells reached by each of their
+    legal moves; 0 for a player that has not been placed.
+    """
+    free, active, inactive = board_masks(game)
+    masks = board_tables(game.width, game.height)[0]
+    values = []
+    for loc in (active, inactive):
+        total = 0
+        if loc is not None:
+            moves = masks[loc] & free
+            while moves:
+                low = moves & -moves
+                total += (masks[low.bit_length() - 1] & free).bit_count()
+                moves ^= low
+        values.append(total)
+    if game.active_player != player:
+        values.reverse()
+    return values
+
+
+def partition_size(game, player):
+    """Return the number of cells in the region of `player` minus the number
+    in the region of its opponent once the players are separated, and 0
+    while they can still reach each other.
+    """
+    regions = partition(game)
+    if regions is None:
+        return 0
+    own, other = regions
+    if game.active_player != player:
+        own, other = other, own
+    return own.bit_count() - other.bit_count()
+
+
+class FixedDepthPlayer(AlphaBetaPlayer):
+    """`AlphaBetaPlayer` that searches every move to `search_depth` plies,
+    regardless of the time left.
+    """
+
+    def get_move(self, game, time_left):
+        return self.search_to_depth(game, self.search_depth)
+
+
+def random_opening(rng, width=7, height=7):
+    """Return the two placement moves of a random opening. """
+    cells = [(i, j) for j in range(width) for i in range(height)]
+    return rng.sample(cells, 2)
+
+
+def play_pair(weights_a, weights_b, opening, depth, width=7, height=7):
+    """Play two games between fixed-depth players scoring positions with the
+    weights `weights_a` and `weights_b`, one with each player moving first,
+    from the same opening.
+
+    Returns
+    -------
+    float
+        The score of the first weights: 0, 0.5 or 1.
+    """
+    score = 0.
+    for a_first in (True, False):
+        player_a = FixedDepthPlayer(depth, WeightedScore(weights_a))
+        player_b = FixedDepthPlayer(depth, WeightedScore(weights_b))
+        players = (player_a, player_b) if a_first else (player_b, player_a)
+        game = BitBoard(*players, width=width, height=height)
+        for move in opening:
+            game.apply_move(move)
+        winner, _, _ = game.play(time_limit=float("inf"))
+        score += (winner is player_a) / 2
+    return score
+
+
+class SPSA:
+    """Simultaneous perturbation stochastic approximation of the weights that
+    maximize the match score.
+
+    The weights are optimized in units of their `scales`: at iteration k
+    every tuned weight is perturbed by +/- c_k * scale, in a random
+    direction, and a match between the two perturbations scoring s (from 0
+    to 1) for the positive one moves each weight by
+
+        a_k * (2 * s - 1) / (2 * c_k) * direction * scale
+
+    with the gains a_k = a / (k + 1 + A) ** 0.602 and c_k = c / (k + 1) **
+    0.101 recommended by Spall.
+
+    Parameters
+    ----------
+    weights : dict
+        The starting weights of the features.
+
+    tuned : list<str>
+        The features whose weights are tuned; the others keep their weight.
+
+    iterations : int
+        The planned number of iterations.
+
+    scales : dict (optional)
+        The perturbation size of each weight; see DEFAULT_SCALES.
+
+    a, c : float (optional)
+        The step and perturbation gains.
+
+    stability : float or None (optional)
+        The constant A that damps the first steps; a tenth of the planned
+        iterations if None.
+
+    seed : int (optional)
+        Seed of the random directions, drawn independently at every
+        iteration so that a resumed tuning draws the same ones.
+    """
+
+    def __init__(self, weights, tuned, iterations, scales=None, a=1., c=1., stability=None,
+                 seed=0):
+        self.weights = {name: float(weights.get(name, 0.)) for name in FEATURES}
+        self.tuned = list(tuned)
+        self.iterations = iterations
+        self.scales = dict(DEFAULT_SCALES, **(scales or {}))
+        self.a = a
+        self.c = c
+        self.stability = iterations / 10 if stability is None else stability
+        self.seed = seed
+        self.k = 0
+
+    def gains(self):
+        """Return the step and perturbation gains of the current iteration. """
+        return (self.a / (self.k + 1 + self.stability) ** 0.602,
+                self.c / (self.k + 1) ** 0.101)
+
+    def perturbation(self):
+        """Return the random direction of the current iteration and the
+        weights perturbed in each sense along it.
+
+        Returns
+        -------
+        (dict, dict, dict)
+            The direction (+1 or -1 for every tuned feature) and the positive
+            and negative perturbations of the weights.
+        """
+        rng = random.Random("spsa-{}-{}".format(self.seed, self.k))
+        direction = {name: rng.choice((-1, 1)) for name in self.tuned}
+        c_k = self.gains()[1]
+        plus, minus = dict(self.weights), dict(self.weights)
+        for name, sign in direction.items():
+            plus[name] += c_k * sign * self.scales[name]
+            minus[name] -= c_k * sign * self.scales[name]
+        return direction, plus, minus
+
+    def update(self, direction, score):
+        """Move the weights according to the `score` (from 0 to 1) of the
+        positive perturbation along `direction` against the negative one, and
+        advance to the next iteration.
+        """
+        a_k, c_k = self.gains()
+        step = a_k * (2 * score - 1) / (2 * c_k)
+        for name, sign in direction.items():
+            self.weights[name] += step * sign * self.scales[name]
+        self.k += 1
+
+    def state(self):
+        """Return the state of the tuner as a dict that can be saved as JSON. """
+        return {"weights": self.weights, "tuned": self.tuned, "iterations": self.iterations,
+                "scales": self.scales, "a": self.a, "c": self.c,
+                "stability": self.stability, "seed": self.seed, "iteration": self.k}
+
+    @classmethod
+    def from_state(cls, state):
+        """Return a tuner restored from a dict returned by state(). """
+        spsa = cls(state["weights"], state["tuned"], state["iterations"], state["scales"],
+                   state["a"], state["c"], state["stability"], state["seed"])
+        spsa.k = state["iteration"]
+        return spsa
+
+
+def save_checkpoint(path, spsa, history):
+    """Write the state of the tuning to `path`, replacing the previous
+    checkpoint only once the new one is complete.
+    """
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(dict(spsa.state(), history=history), f, indent=2)
+    os.replace(tmp, path)
+
+
+def tune(spsa, pairs=8, depth=3, workers=1, checkpoint=None, history=None,
+         width=7, height=7, log=print):
+    """Run the remaining iterations of `spsa`, playing `pairs` pairs of games
+    at depth `depth` for every iteration across `workers` processes.
+
+    Parameters
+    ----------
+    checkpoint : str or None (optional)
+        The file the state of the tuning is written to after every
+        iteration; pass the loaded history (see main()) to resume.
+
+    log : callable or None (optional)
+        Called with a line of progress after every iteration.
+
+    Returns
+    -------
+    list<dict>
+        The history of the tuning: the score of the positive perturbation
+        and the weights after every iteration.
+    """
+    history = [] if history is None else history
+    executor = ProcessPoolExecutor(workers) if workers > 1 else None
+    try:
+        while spsa.k < spsa.iterations:
+            direction, plus, minus = spsa.perturbation()
+            rng = random.Random("openings-{}-{}".format(spsa.seed, spsa.k))
+            openings = [random_opening(rng, width, height) for _ in range(pairs)]
+            if executor is None:
+                scores = [play_pair(plus, minus, opening, depth, width, height)
+                          for opening in openings]
+            else:
+                scores = list(executor.map(play_pair, *zip(*[
+                    (plus, minus, opening, depth, width, height) for opening in openings])))
+            score = sum(scores) / pairs
+            spsa.update(direction, score)
+            history.append({"iteration": spsa.k, "score": score,
+                            "weights": dict(spsa.weights)})
+            if checkpoint is not None:
+                save_checkpoint(checkpoint, spsa, history)
+            if log is not None:
+                log("{:>5} score {:.3f}  ".format(spsa.k, score) + "  ".join(
+                    "{} {:+.3f}".format(name, spsa.weights[name]) for name in spsa.tuned))
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return history
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Tune the weights of WeightedScore with SPSA in self-play")
+    parser.add_argument("--iterations", type=int, default=200,
+                        help="number of SPSA iterations")
+    parser.add_argument("--pairs", type=int, default=8,
+                        help="game pairs played at every iteration")
+    parser.add_argument("--depth", type=int, default=3,
+                        help="search depth of the self-play games")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="number of processes playing games in parallel")
+    parser.add_argument("--features", nargs="+", default=CHEAP_FEATURES, choices=FEATURES,
+                        help="the features to tune (default: the mobility features; " +
+                             "the others slow the search down)")
+    parser.add_argument("--a", type=float, default=1., help="SPSA step gain")
+    parser.add_argument("--c", type=float, default=1., help="SPSA perturbation gain")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="seed of the perturbations and openings")
+    parser.add_argument("--checkpoint", default="tuned.json",
+                        help="file the tuning state is saved to after every " +
+                             "iteration and resumed from if it exists")
+    args = parser.parse_args()
+
+    if os.path.exists(args.checkpoint):
+        with open(args.checkpoint) as f:
+            state = json.load(f)
+        spsa = SPSA.from_state(state)
+        spsa.iterations = max(spsa.iterations, args.iterations)
+        history = state["history"]
+        print("Resuming from iteration {} of {}".format(spsa.k, args.checkpoint))
+    else:
+        spsa = SPSA(DEFAULT_WEIGHTS, args.features, args.iterations, a=args.a, c=args.c,
+                    seed=args.seed)
+        history = []
+
+    tune(spsa, args.pairs, args.depth, args.workers, args.checkpoint, history)
+    print("Tuned weights: {!r}".format(WeightedScore(spsa.weights)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Compare the puzzles per second of the dictionary solver, with the copying
+search() and with the trail-based search_in_place(), and of the bitmask solver.
+
+The puzzles are random diagonal Sudokus: the digits of a solved grid are
+relabeled at random (which keeps every unit valid) and all but a number of
+random clues are removed. The fewer the clues, the more the solvers have to
+search.
+
+Run from the project root with `python -m benchmarks.solvers [PUZZLES]`.
+"""
+import random
+import sys
+import timeit
+
+import bitmask_solution
+import solution
+
+SOLVED = ('267945381853716249491823576576438192384192657129657438'
+          '642379815935281764718564923')
+CLUES = [35, 28, 24, 20]
+
+
+def random_puzzle(rng, clues):
+    """Return a random diagonal Sudoku grid string with `clues` given boxes. """
+    digits = list('123456789')
+    rng.shuffle(digits)
+    relabeled = [digits[int(c) - 1] for c in SOLVED]
+    given = set(rng.sample(range(81), clues))
+    return ''.join(c if i in given else '.' for i, c in enumerate(relabeled))
+
+
+def puzzles_per_second(solve, puzzles):
+    """Return the number of puzzles `solve` solves per second. """
+    elapsed = timeit.timeit(lambda: [solve(grid) for grid in puzzles], number=1)
+    return len(puzzles) / elapsed
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    rng = random.Random(0)
+    print("{:<8}{:>14}{:>14}{:>14}{:>10}".format(
+        "Clues", "solution", "in place", "bitmask", "Speedup"))
+    for clues in CLUES:
+        puzzles = [random_puzzle(rng, clues) for _ in range(count)]
+        slow = puzzles_per_second(solution.solve, puzzles)
+        trail = puzzles_per_second(lambda grid: solution.solve(grid, in_place=True), puzzles)
+        fast = puzzles_per_second(bitmask_solution.solve, puzzles)
+        print("{:<8}{:>12.1f}/s{:>12.1f}/s{:>12.1f}/s{:>9.1f}x".format(
+            clues, slow, trail, fast, fast / slow))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""Diagonal Sudoku solver working on bitmasks of candidates.
+
+Same strategy as solution.py (eliminate, only choice and depth-first search
+on the box with the fewest candidates), but the puzzle is a flat list of 81
+integers: bit d of a box is set while digit d + 1 is a candidate for it.
+The units of every box are precomputed as lists of box indices, so
+constraint propagation is done with bit operations instead of string
+replacements and dict lookups.
+
+The steps are applied in the same order as in solution.py, which makes both
+solvers return the same grid, even for puzzles with several solutions.
+"""
+from solution import boxes, unitlist
+
+DIGITS = '123456789'
+ALL_DIGITS = (1 << 9) - 1
+
+# Index of every box in the flat list
+box_index = {box: i for i, box in enumerate(boxes)}
+unit_indices = [[box_index[box] for box in unit] for unit in unitlist]
+# Indices in unitlist of the units of every box
+box_units = [[u for u, unit in enumerate(unitlist) if box in unit] for box in boxes]
+
+# Number of candidates and string of candidates of every bitmask
+candidate_count = [bin(mask).count('1') for mask in range(ALL_DIGITS + 1)]
+is_solved = [count == 1 for count in candidate_count]
+candidate_digits = [''.join(d for i, d in enumerate(DIGITS) if mask >> i & 1)
+                    for mask in range(ALL_DIGITS + 1)]
+
+
+def grid_masks(grid):
+    """Convert a grid string into the list of candidate bitmasks of its boxes.
+    Args:
+        grid(string) - A grid in string form, '.' for empty boxes.
+    Returns:
+        A list of 81 bitmasks, ALL_DIGITS for the empty boxes.
+    """
+    masks = []
+    for c in grid:
+        if c == '.':
+            masks.append(ALL_DIGITS)
+        elif c in DIGITS:
+            masks.append(1 << DIGITS.index(c))
+    assert len(masks) == 81
+    return masks
+
+
+def masks_values(masks):
+    """Convert a list of candidate bitmasks into the dictionary form of solution.py.
+    """
+    return {box: candidate_digits[mask] for box, mask in zip(boxes, masks)}
+
+
+def eliminate(masks):
+    """Remove the digit of every box with a single candidate from its peers.
+
+    The digits of the solved boxes are gathered once per unit instead of
+    being removed from every peer in turn. Two solved peers with the same
+    digit empty each other, so the puzzle is found unsolvable in either case.
+    Args:
+        masks: Sudoku as a list of candidate bitmasks, updated in place.
+    Returns:
+        The list of bitmasks.
+    """
+    count = candidate_count
+    # For every unit, the digits of its solved boxes and those solved twice
+    solved = []
+    for unit in unit_indices:
+        once = twice = 0
+        for i in unit:
+            mask = masks[i]
+            if count[mask] == 1:
+                twice |= once & mask
+                once |= mask
+        solved.append((once, twice))
+    for i in range(81):
+        mask = masks[i]
+        if count[mask] == 1:
+            for u in box_units[i]:
+                if solved[u][1] & mask:
+                    masks[i] = 0
+        else:
+            for u in box_units[i]:
+                mask &= ~solved[u][0]
+            masks[i] = mask
+    return masks
+
+
+def only_choice(masks):
+    """Assign every digit that fits in a single box of a unit to that box.
+
+    The digits of a unit are visited in increasing order and the candidates
+    that fit only once are counted again after every assignment, as an
+    assignment can leave another digit with a single place in the unit.
+    Digits that are already solved in the unit are skipped.
+    Args:
+        masks: Sudoku as a list of candidate bitmasks, updated in place.
+    Returns:
+        The list of bitmasks.
+    """
+    count = candidate_count
+    for unit in unit_indices:
+        once = twice = solved = 0
+        for i in unit:
+            mask = masks[i]
+            twice |= once & mask
+            once |= mask
+            if count[mask] == 1:
+                solved |= mask
+        unique = once & ~twice & ~solved
+        while unique:
+            digit = unique & -unique
+            for i in unit:
+                if masks[i] & digit:
+                    break
+            masks[i] = digit
+            # Digits up to this one have been visited
+            visited = (digit << 1) - 1
+            once = twice = solved = 0
+            for j in unit:
+                mask = masks[j]
+                twice |= once & mask
+                once |= mask
+                if count[mask] == 1:
+                    solved |= mask
+            unique = once & ~twice & ~solved & ~visited
+    return masks
+
+
+def reduce_puzzle(masks):
+    """Iterate eliminate() and only_choice() until they no longer solve any box.
+    Input: A sudoku as a list of candidate bitmasks, updated in place.
+    Output: The list of bitmasks, or False if a box has no candidates left.
+    """
+    solved = is_solved.__getitem__
+    stalled = False
+    while not stalled:
+        solved_before = sum(map(solved, masks))
+        eliminate(masks)
+        only_choice(masks)
+        solved_after = sum(map(solved, masks))
+        stalled = solved_before == solved_after
+        if 0 in masks:
+            return False
+    return masks
+
+
+def search(masks):
+    """Using depth-first search and propagation, solve the sudoku.
+    Input: A sudoku as a list of candidate bitmasks, updated in place.
+    Output: The solved list of bitmasks, or False if there is no solution.
+    """
+    masks = reduce_puzzle(masks)
+    if not masks:
+        return False
+    # The last of the unfilled boxes with the fewest candidates, as in solution.py
+    count = candidate_count
+    best_box, fewest = None, 10
+    for i in range(81):
+        n = count[masks[i]]
+        if 1 < n <= fewest:
+            best_box, fewest = i, n
+    if best_box is None:
+        return masks
+
+    candidates = masks[best_box]
+    while candidates:
+        digit = candidates & -candidates
+        candidates ^= digit
+        sudoku = masks[:]
+        sudoku[best_box] = digit
+        outcome = search(sudoku)
+        if outcome:
+            return outcome
+    return False
+
+
+def solve(grid):
+    """
+    Find the solution to a Sudoku grid.
+    Args:
+        grid(string): a string representing a sudoku grid.
+            Example: '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'
+    Returns:
+        The dictionary representation of the final sudoku grid. False if no solution exists.
+    """
+    solution = search(grid_masks(grid))
+    if not solution:
+        return False
+    return masks_values(solution)
+
+
+if __name__ == '__main__':
+    from solution import display
+    display(solve('2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'))
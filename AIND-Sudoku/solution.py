@@ -99,7 +99,7 @@ def display(values):
     return
 
 
-def eliminate(values):
+def eliminate(values, trail=None):
     """Eliminate values from peers of each box with a single value.
 
         Go through all the boxes, and whenever there is a box with a single value,
@@ -107,40 +107,51 @@ def eliminate(values):
 
         Args:
             values: Sudoku in dictionary form.
+            trail: Optional list to which the (box, previous value) of every change is appended.
         Returns:
             Resulting Sudoku in dictionary form after eliminating values.
         """
     solved_values = [box for box in values.keys() if len(values[box]) == 1]
     for box in solved_values:
         digit = values[box]
+        if not digit:
+            # Emptied by a solved peer with the same digit earlier in the loop
+            continue
         for peer in peers[box]:
-            values[peer] = values[peer].replace(digit, '')
+            value = values[peer]
+            if digit in value:
+                if trail is not None:
+                    trail.append((peer, value))
+                values[peer] = value.replace(digit, '')
     return values
 
 
-def only_choice(values):
+def only_choice(values, trail=None):
     """Finalize all values that are the only choice for a unit.
 
         Go through all the units, and whenever there is a unit with a value
         that only fits in one box, assign the value to this box.
 
-        Input: Sudoku in dictionary form.
+        Input: Sudoku in dictionary form, and an optional list to which the
+        (box, previous value) of every change is appended.
         Output: Resulting Sudoku in dictionary form after filling in only choices.
         """
     for unit in unitlist:
         for digit in '123456789':
             dplaces = [box for box in unit if digit in values[box]]
             if len(dplaces) == 1:
+                if trail is not None and values[dplaces[0]] != digit:
+                    trail.append((dplaces[0], values[dplaces[0]]))
                 values[dplaces[0]] = digit
     return values
 
 
-def reduce_puzzle(values):
+def reduce_puzzle(values, trail=None):
     """
     Iterate eliminate() and only_choice(). If at some point, there is a box with no available values, return False.
     If the sudoku is solved, return the sudoku.
     If after an iteration of both functions, the sudoku remains the same, return the sudoku.
-    Input: A sudoku in dictionary form.
+    Input: A sudoku in dictionary form, and an optional undo trail (see eliminate()).
     Output: The resulting sudoku in dictionary form.
     """
     stalled = False
@@ -148,9 +159,9 @@ def reduce_puzzle(values):
         # Check how many boxes have a determined value
         solved_values_before = len([box for box in values.keys() if len(values[box]) == 1])
         # Use the Eliminate Strategy
-        values = eliminate(values)
+        values = eliminate(values, trail)
         # Use the Only Choice Strategy
-        values = only_choice(values)
+        values = only_choice(values, trail)
         # Check how many boxes have a determined value, to compare
         solved_values_after = len([box for box in values.keys() if len(values[box]) == 1])
         # If no new values were added, stop the loop.
@@ -204,16 +215,66 @@ def search(values):
     return values
 
 
-def solve(grid):
+def undo(values, trail, mark):
+    """Restore the boxes changed since the trail had `mark` entries."""
+    # Latest changes first, so that every box ends with its oldest recorded value
+    values.update(reversed(trail[mark:]))
+    del trail[mark:]
+
+
+def search_in_place(values, trail=None):
+    """Same depth-first search as search(), on a single dictionary.
+
+    Every change is recorded on an undo trail and the changes of a failed branch
+    are undone before the next candidate of the box is tried, so branches are
+    created one at a time instead of as copies of the whole sudoku.
+    Input: A sudoku in dictionary form, updated in place.
+    Output: The solved sudoku, or False if there is no solution (the sudoku is then restored).
+        Unlike search(), which returns the unsolved sudoku when every branch of the
+        first choice fails, an unsolvable sudoku always gives False.
+    """
+    if trail is None:
+        trail = []
+    mark = len(trail)
+    if not reduce_puzzle(values, trail):
+        undo(values, trail, mark)
+        return False
+
+    # Choose the last of the unfilled squares with the fewest possibilities, as search() does
+    best_box = None
+    fewest = 10
+    for box in boxes:
+        if 1 < len(values[box]) <= fewest:
+            best_box = box
+            fewest = len(values[box])
+    if best_box is None:
+        return values
+
+    branch = len(trail)
+    for value in values[best_box]:
+        trail.append((best_box, values[best_box]))
+        values[best_box] = value
+        if search_in_place(values, trail):
+            return values
+        undo(values, trail, branch)
+    undo(values, trail, mark)
+    return False
+
+
+def solve(grid, in_place=False):
     """
     Find the solution to a Sudoku grid.
     Args:
         grid(string): a string representing a sudoku grid.
             Example: '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'
+        in_place(bool): search with search_in_place() instead of search().
     Returns:
-        The dictionary representation of the final sudoku grid. False if no solution exists.
+        The dictionary representation of the final sudoku grid. False if no solution exists;
+        without in_place, some unsolvable grids give an unsolved grid instead (see search_in_place()).
     """
     values = grid_values(grid)
+    if in_place:
+        return search_in_place(values)
     solution = search(values)
     return solution
 
@@ -0,0 +1,57 @@
+import random
+import unittest
+
+import bitmask_solution
+import solution
+from benchmarks.solvers import random_puzzle
+
+
+def reduced_values(rng, clues):
+    """Return a random puzzle in dictionary form after one elimination pass. """
+    return solution.eliminate(solution.grid_values(random_puzzle(rng, clues)))
+
+
+class TestBitmaskSolution(unittest.TestCase):
+    diag_sudoku_grid = '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'
+
+    def test_round_trip(self):
+        values = solution.grid_values(self.diag_sudoku_grid)
+        masks = bitmask_solution.grid_masks(self.diag_sudoku_grid)
+        self.assertEqual(bitmask_solution.masks_values(masks), values)
+
+    def test_propagation_matches_solution(self):
+        rng = random.Random(0)
+        for _ in range(50):
+            values = reduced_values(rng, 30)
+            masks = [sum(1 << (int(d) - 1) for d in values[box]) for box in solution.boxes]
+            self.assertEqual(bitmask_solution.masks_values(bitmask_solution.eliminate(masks[:])),
+                             solution.eliminate(dict(values)))
+            self.assertEqual(bitmask_solution.masks_values(bitmask_solution.only_choice(masks[:])),
+                             solution.only_choice(dict(values)))
+
+    def test_solve_diagonal_sudoku(self):
+        self.assertEqual(bitmask_solution.solve(self.diag_sudoku_grid),
+                         solution.solve(self.diag_sudoku_grid))
+
+    def test_solve_matches_solution(self):
+        # Puzzles with few clues have several solutions: both solvers search
+        # the same tree and return the same one
+        rng = random.Random(1)
+        for clues in (22, 26, 35, 50):
+            for _ in range(25):
+                grid = random_puzzle(rng, clues)
+                expected = solution.solve(grid)
+                self.assertEqual(bitmask_solution.solve(grid), expected)
+                for unit in solution.unitlist:
+                    self.assertEqual(sorted(expected[box] for box in unit), list('123456789'))
+
+    def test_unsolvable(self):
+        # Two 2s on the main diagonal
+        grid = '2' + '.' * 9 + '2' + '.' * 70
+        self.assertFalse(bitmask_solution.solve(grid))
+        result = solution.solve(grid)
+        self.assertFalse(result and all(len(v) == 1 for v in result.values()))
+
+
+if __name__ == '__main__':
+    unittest.main()
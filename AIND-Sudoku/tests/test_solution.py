@@ -1,6 +1,9 @@
+import random
 import solution
 import unittest
 
+from benchmarks.solvers import random_puzzle
+
 
 class TestNakedTwins(unittest.TestCase):
     before_naked_twins_1 = {'I6': '4', 'H9': '3', 'I2': '6', 'E8': '1', 'H3': '5', 'H7': '8', 'I7': '1', 'I4': '8',
@@ -97,5 +100,43 @@ class TestDiagonalSudoku(unittest.TestCase):
         self.assertEqual(solution.solve(self.diagonal_grid), self.solved_diag_sudoku)
 
 
+class TestSearchInPlace(unittest.TestCase):
+
+    def test_matches_search(self):
+        rng = random.Random(0)
+        for clues in (20, 24, 30):
+            for _ in range(20):
+                grid = random_puzzle(rng, clues)
+                self.assertEqual(solution.solve(grid, in_place=True), solution.solve(grid))
+
+    def test_trail_restores_values(self):
+        grid = '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'
+        values = solution.grid_values(grid)
+        before = dict(values)
+        trail = []
+        solution.reduce_puzzle(values, trail)
+        self.assertNotEqual(values, before)
+        solution.undo(values, trail, 0)
+        self.assertEqual(values, before)
+        self.assertEqual(trail, [])
+
+    def test_trail_records_only_changes(self):
+        # A1 and B2 share a square and a diagonal: one of them empties the
+        # other, which must then not be eliminated from its peers
+        values = solution.grid_values('2' + '.' * 9 + '2' + '.' * 70)
+        before = dict(values)
+        trail = []
+        solution.eliminate(values, trail)
+        self.assertIn('', (values['A1'], values['B2']))
+        self.assertEqual(len(trail), sum(len(before[box]) - len(values[box]) for box in values))
+
+    def test_unsolvable(self):
+        # Two 2s on the main diagonal
+        values = solution.grid_values('2' + '.' * 9 + '2' + '.' * 70)
+        before = dict(values)
+        self.assertFalse(solution.search_in_place(values))
+        self.assertEqual(values, before)
+
+
 if __name__ == '__main__':
     unittest.main()